@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Recall vs latency of the IVF index against exact search
+
+Builds an IVFIndex over synthetic clustered unit vectors (no embedding
+model needed) and, for each nprobe, reports recall@k against exact
+float32 search with latency percentiles for both. --storage and
+--rescore measure the recall cost of quantized vectors.
+
+Run from project root: python3 benchmarks/bench_ann.py --size 1000000 --nprobe 1,4,8,16,32
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+import bench_utils
+from bench_utils import latency_summary, max_rss_mb, write_results
+
+from vectorstore.ann_index import IVFIndex, normalize_rows
+
+
+def clustered_vectors(size: int, dim: int, clusters: int, spread: float, rng: np.random.Generator) -> np.ndarray:
+    """Unit vectors scattered around random centres, closer to real embeddings than uniform noise"""
+    centres = normalize_rows(rng.standard_normal((clusters, dim)))
+    vectors = np.empty((size, dim), dtype=np.float32)
+    for start in range(0, size, 100_000):
+        end = min(start + 100_000, size)
+        labels = rng.integers(0, clusters, end - start)
+        noise = rng.standard_normal((end - start, dim)).astype(np.float32) * spread / np.sqrt(dim)
+        vectors[start:end] = normalize_rows(centres[labels] + noise)
+    return vectors
+
+
+def bench(reference: IVFIndex, index: IVFIndex, queries: np.ndarray, k: int, nprobes: List[int]) -> Dict[str, Any]:
+    exact_rows = []
+    samples = []
+    for query in queries:
+        started = time.perf_counter()
+        rows, _ = reference.search_exact(query, k)
+        samples.append(time.perf_counter() - started)
+        exact_rows.append(set(rows.tolist()))
+    result: Dict[str, Any] = {"exact": latency_summary(samples), "ivf": []}
+
+    for nprobe in nprobes:
+        samples = []
+        hits = 0
+        for query, truth in zip(queries, exact_rows):
+            started = time.perf_counter()
+            rows, _ = index.search(query, k, nprobe=nprobe)
+            samples.append(time.perf_counter() - started)
+            hits += len(truth & set(rows.tolist()))
+        result["ivf"].append({
+            "nprobe": nprobe,
+            f"recall@{k}": hits / (len(queries) * k),
+            "latency": latency_summary(samples),
+        })
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="IVF recall vs latency against exact search")
+    parser.add_argument("--size", type=int, default=200_000, help="Indexed vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension (all-MiniLM-L6-v2: 384)")
+    parser.add_argument("--clusters", type=int, default=1000, help="Synthetic topic clusters")
+    parser.add_argument("--spread", type=float, default=1.0,
+                        help="Distance of vectors from their cluster centre (higher is harder)")
+    parser.add_argument("--nlist", type=int, default=0, help="Inverted lists (default: sqrt(size))")
+    parser.add_argument("--nprobe", default="1,2,4,8,16,32,64")
+    parser.add_argument("--storage", choices=["float32", "float16", "int8"], default="float32")
+    parser.add_argument("--rescore", action="store_true",
+                        help="Re-rank quantized candidates from full-precision vectors on disk")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/ann-<date>.json)")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    vectors = clustered_vectors(args.size, args.dim, args.clusters, args.spread, rng)
+    # Queries are perturbed corpus vectors, like questions close to a chunk
+    picks = rng.choice(args.size, args.queries, replace=False)
+    queries = normalize_rows(vectors[picks] + rng.standard_normal((args.queries, args.dim)).astype(np.float32) * 0.02)
+
+    # Ground truth is always exact float32 search
+    reference = IVFIndex(args.dim, train_threshold=args.size + 1)
+    reference.add(vectors)
+
+    with tempfile.TemporaryDirectory(prefix="bench_ann_") as tmp:
+        rescore_path = os.path.join(tmp, "vectors.f32") if args.rescore else None
+        index = IVFIndex(args.dim, nlist=args.nlist or None, storage=args.storage, rescore_path=rescore_path)
+        started = time.perf_counter()
+        for start in range(0, args.size, 10_000):
+            index.add(vectors[start:start + 10_000])
+        if not index.trained:
+            index.train()
+        build_s = time.perf_counter() - started
+        del vectors
+
+        nprobes = [int(n) for n in args.nprobe.split(",") if n]
+        result = bench(reference, index, queries, args.k, nprobes)
+
+    exact = result["exact"]
+    print(
+        f"{args.size} vectors, dim {args.dim}, {len(index.centroids)} lists, {args.storage}"
+        f"{' + rescore' if args.rescore else ''}, {index.nbytes / args.size:.0f} B/vector, built in {build_s:.1f}s"
+    )
+    print(f"exact      p50 {exact['p50_ms']:>8.2f} ms  p99 {exact['p99_ms']:>8.2f} ms  recall 1.000")
+    for run in result["ivf"]:
+        latency = run["latency"]
+        print(
+            f"nprobe {run['nprobe']:>3}  p50 {latency['p50_ms']:>8.2f} ms  p99 {latency['p99_ms']:>8.2f} ms"
+            f"  recall {run[f'recall@{args.k}']:.3f}"
+        )
+
+    results = {
+        "benchmark": "ann",
+        "environment": bench_utils.environment_info(),
+        "config": {
+            "size": args.size, "dim": args.dim, "clusters": args.clusters, "spread": args.spread,
+            "nlist": len(index.centroids), "queries": args.queries, "k": args.k,
+            "storage": args.storage, "rescore": args.rescore,
+        },
+        "index_bytes_per_vector": index.nbytes / args.size,
+        "build_s": build_s,
+        "rss_peak_mb": max_rss_mb(),
+        **result,
+    }
+    print(f"Results written to {write_results('ann', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark: Router -> agent -> vector store -> OllamaClient
+
+Starts a fake Ollama server in the background, loads data/ into the
+selected vector store and replays questions at a fixed concurrency.
+
+Run from project root: python3 benchmarks/bench_e2e.py --concurrency 4
+"""
+import argparse
+import logging
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import bench_utils
+from bench_utils import DATA_DIR, latency_summary, max_rss_mb, write_results
+from fake_ollama import FakeOllamaServer, add_config_arguments, config_from_args
+
+from agents import CombinedAgent, DevFestAgent, KimanaAgent
+from coordinator.router import Router
+from utils import Deadline, OllamaClient
+
+logger = logging.getLogger(__name__)
+
+QUESTIONS = [
+    "À quelle heure commence le talk de Kimana ?",
+    "Quels sont les sponsors de DevFest ?",
+    "Où se déroule l'événement ?",
+    "Qui est Kimana Misago ?",
+    "C'est quoi Ivoire.pro ?",
+    "Quelle est l'expertise de Kimana ?",
+    "Parle-moi du speaker qui présente sur Kubernetes",
+]
+
+
+class TimingOllamaClient(OllamaClient):
+    """OllamaClient that streams responses and records time-to-first-token"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        self._local.first_token_at = None
+
+    @property
+    def first_token_at(self) -> float:
+        return getattr(self._local, "first_token_at", None)
+
+    def _on_token(self, piece: str) -> None:
+        if self.first_token_at is None:
+            self._local.first_token_at = time.perf_counter()
+
+    def generate(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        kwargs.setdefault("on_token", self._on_token)
+        return super().generate(*args, **kwargs)
+
+
+def build_store(kind: str, persist_dir: str):
+    """Instantiate the requested vector store backend"""
+    if kind == "simple":
+        from vectorstore.simple_store import SimpleVectorStore
+        return SimpleVectorStore()
+    if kind == "chroma":
+        from vectorstore.chroma_manager import ChromaManager
+        return ChromaManager(persist_dir=persist_dir)
+    if kind == "dense":
+        from vectorstore.dense_store import DenseVectorStore
+        return DenseVectorStore(persist_dir=persist_dir)
+
+    # auto: whatever the application itself would use
+    from vectorstore import ChromaManager
+    from vectorstore.simple_store import SimpleVectorStore
+    if ChromaManager is SimpleVectorStore:
+        return SimpleVectorStore()
+    # ChromaManager or DenseVectorStore, per VECTOR_STORE
+    return ChromaManager(persist_dir=persist_dir)
+
+
+def dispatch(system: Dict[str, Any], question: str) -> Dict[str, Any]:
+    """Answer a question the same way coordinator/app.py does"""
+    deadline_s = system["deadline_s"]
+    deadline = Deadline(deadline_s) if deadline_s else None
+    route = system["router"].route(question)
+    where = system["router"].infer_filter(question, route)
+    if route == "devfest":
+        result = system["devfest_agent"].answer(question, where=where, deadline=deadline)
+    elif route == "kimana":
+        result = system["kimana_agent"].answer(question, where=where, deadline=deadline)
+    elif system["multi_agent_mode"] == "combined":
+        result = system["combined_agent"].answer(question, deadline=deadline)
+    else:
+        devfest_result = system["devfest_agent"].answer(question, deadline=deadline)
+        kimana_result = system["kimana_agent"].answer(question, deadline=deadline)
+        result = {
+            "agent": "Combined",
+            "answer": devfest_result["answer"] + "\n" + kimana_result["answer"],
+            "sources": devfest_result["sources"] + kimana_result["sources"],
+        }
+    result["route"] = route
+    return result
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_start = max_rss_mb()
+
+    with FakeOllamaServer(config_from_args(args)) as server, \
+            tempfile.TemporaryDirectory(prefix="bench_chroma_") as persist_dir:
+        ollama_client = TimingOllamaClient(host=server.url)
+        store = build_store(args.store, persist_dir)
+
+        load_started = time.perf_counter()
+        store.load_json_data("devfest_docs", str(DATA_DIR / "devfest"))
+        store.load_json_data("kimana_docs", str(DATA_DIR / "kimana"))
+        load_s = time.perf_counter() - load_started
+
+        devfest_agent = DevFestAgent(ollama_client, store)
+        kimana_agent = KimanaAgent(ollama_client, store)
+        system = {
+            "devfest_agent": devfest_agent,
+            "kimana_agent": kimana_agent,
+            "combined_agent": CombinedAgent([devfest_agent, kimana_agent], ollama_client, store),
+            "multi_agent_mode": args.multi_agent,
+            "deadline_s": args.deadline_ms / 1000,
+            "router": Router(),
+        }
+
+        def one_request(question: str) -> Dict[str, Any]:
+            ollama_client.reset()
+            started = time.perf_counter()
+            result = dispatch(system, question)
+            finished = time.perf_counter()
+            first = ollama_client.first_token_at
+            return {
+                "latency_s": finished - started,
+                "ttft_s": (first - started) if first else None,
+                "route": result["route"],
+                "error": "error" in result.get("metadata", {}),
+                "partial": result.get("metadata", {}).get("partial", False),
+            }
+
+        for question in QUESTIONS[:args.warmup]:
+            one_request(question)
+
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.requests)]
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            samples = list(pool.map(one_request, questions))
+        wall_s = time.perf_counter() - started
+
+    routes: Dict[str, int] = {}
+    for sample in samples:
+        routes[sample["route"]] = routes.get(sample["route"], 0) + 1
+
+    memory = {"rss_start_mb": rss_start, "rss_peak_mb": max_rss_mb()}
+    if args.tracemalloc:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        memory["python_heap_peak_mb"] = peak / (1024 * 1024)
+
+    return {
+        "benchmark": "e2e",
+        "environment": bench_utils.environment_info(),
+        "config": {
+            "store": type(store).__name__,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "multi_agent": args.multi_agent,
+            "deadline_ms": args.deadline_ms,
+            "first_token_ms": args.first_token_ms,
+            "prefill_ms_per_1k_chars": args.prefill_ms_per_1k_chars,
+            "tokens_per_second": args.tokens_per_second,
+            "response_tokens": args.response_tokens,
+            "max_parallel": args.max_parallel,
+        },
+        "load_s": load_s,
+        "wall_s": wall_s,
+        "throughput_rps": len(samples) / wall_s if wall_s else 0.0,
+        "errors": sum(1 for s in samples if s["error"]),
+        "partial": sum(1 for s in samples if s["partial"]),
+        "routes": routes,
+        "latency": latency_summary([s["latency_s"] for s in samples]),
+        "ttft": latency_summary([s["ttft_s"] for s in samples if s["ttft_s"] is not None]),
+        "memory": memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end RAG benchmark against a fake Ollama")
+    parser.add_argument("--store", choices=["auto", "chroma", "dense", "simple"], default="auto")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--multi-agent", choices=["combined", "per_agent"], default="combined",
+                        help="How 'both' questions are answered (MULTI_AGENT_MODE)")
+    parser.add_argument("--deadline-ms", type=int, default=0,
+                        help="Per-request deadline (0: none, REQUEST_DEADLINE_MS in the app)")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="Track Python heap peak (slows the run down)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/e2e-<date>.json)")
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    results = run(args)
+    path = write_results("e2e", results, args.output)
+
+    latency, ttft = results["latency"], results["ttft"]
+    print(f"Store: {results['config']['store']}  concurrency={args.concurrency}")
+    print(f"Throughput: {results['throughput_rps']:.2f} req/s  errors={results['errors']}  partial={results['partial']}")
+    print(f"Latency p50/p95/p99: {latency['p50_ms']:.0f} / {latency['p95_ms']:.0f} / {latency['p99_ms']:.0f} ms")
+    print(f"TTFT    p50/p95/p99: {ttft['p50_ms']:.0f} / {ttft['p95_ms']:.0f} / {ttft['p99_ms']:.0f} ms")
+    print(f"Peak RSS: {results['memory']['rss_peak_mb']:.1f} MB")
+    print(f"Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
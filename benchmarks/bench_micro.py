@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks on synthetic corpora
+
+Measures vector store search (unfiltered and with a `type` filter
+covering a quarter of the corpus), _json_to_chunks and Router.route at
+corpus sizes from 1k up to 1M chunks.
+
+Run from project root: python3 benchmarks/bench_micro.py --sizes 1000,10000,100000
+"""
+import argparse
+import json
+import logging
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+import bench_utils
+from bench_utils import latency_summary, max_rss_mb, write_results
+from bench_e2e import QUESTIONS, build_store
+
+from coordinator.router import Router
+
+VOCABULARY = (
+    "kubernetes cloud gemma firebase flutter ia devops sécurité afrique abidjan "
+    "talk keynote panel sponsor hackathon pause quiz speaker agenda horaire "
+    "innovation startup identité digitale données modèle agent rag docker"
+).split()
+SPEAKERS = ["KIMANA MISAGO", "OMAR FAROUK", "CHRISTELLE VIGNON", "ROBERT JOHN", "Louis KOUASSI"]
+TYPES = ["talk", "panel", "keynote", "sponsor", "break"]
+# Chunk `type` metadata cycled over synthetic documents, for filtered search
+CHUNK_TYPES = ["schedule", "speakers", "event_info.sponsors", "event_info"]
+
+
+def synthetic_record(rng: random.Random, i: int) -> Dict[str, Any]:
+    hour = 9 + (i // 4) % 9
+    minute = (i % 4) * 15
+    return {
+        "time": f"{hour:02d}:{minute:02d}-{hour:02d}:{minute + 14:02d}",
+        "title": " ".join(rng.choice(VOCABULARY) for _ in range(8)).capitalize(),
+        "speaker": rng.choice(SPEAKERS),
+        "type": rng.choice(TYPES),
+    }
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    return {"schedule": [synthetic_record(rng, i) for i in range(size)]}
+
+
+def populate(store, collection_name: str, data: Dict[str, Any], batch_size: int = 5000) -> None:
+    """Fill a collection with pre-chunked synthetic documents, skipping embedding"""
+    documents = [f"schedule: {json.dumps(r, ensure_ascii=False)}" for r in data["schedule"]]
+    metadatas = [
+        {"source": "synthetic.json", "type": CHUNK_TYPES[i % len(CHUNK_TYPES)], "collection": collection_name}
+        for i in range(len(documents))
+    ]
+    ids = [f"{collection_name}_{i}" for i in range(len(documents))]
+
+    if store.embed_documents(documents[:1]) is None:
+        # Keyword store: no embeddings to fake
+        for start in range(0, len(documents), batch_size):
+            end = start + batch_size
+            store.add_documents(collection_name, documents[start:end], metadatas[start:end], ids[start:end])
+        return
+
+    import numpy as np
+    dim = store.embedding_model.get_sentence_embedding_dimension()
+    rng = np.random.default_rng(0)
+    for start in range(0, len(documents), batch_size):
+        end = start + batch_size
+        vectors = rng.standard_normal((len(documents[start:end]), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        store.add_documents(collection_name, documents[start:end], metadatas[start:end], ids[start:end], vectors)
+
+
+def time_calls(fn, inputs: List[Any]) -> List[float]:
+    samples = []
+    for item in inputs:
+        started = time.perf_counter()
+        fn(item)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_size(store, router: Router, size: int, queries: int) -> Dict[str, Any]:
+    data = synthetic_corpus(size)
+    result: Dict[str, Any] = {"size": size}
+
+    # _json_to_chunks: one pass over the whole synthetic file
+    started = time.perf_counter()
+    chunks = store._json_to_chunks(data, "synthetic.json")
+    chunk_s = time.perf_counter() - started
+    result["json_to_chunks"] = {
+        "seconds": chunk_s,
+        "chunks": len(chunks),
+        "chunks_per_s": len(chunks) / chunk_s if chunk_s else 0.0,
+    }
+    del chunks
+
+    # search on a collection of `size` chunks
+    collection_name = f"bench_{size}"
+    started = time.perf_counter()
+    populate(store, collection_name, data)
+    result["populate_s"] = time.perf_counter() - started
+
+    search_inputs = [QUESTIONS[i % len(QUESTIONS)] for i in range(queries)]
+    store.search(collection_name, search_inputs[0])  # warm-up
+    samples = time_calls(lambda q: store.search(collection_name, q, n_results=3), search_inputs)
+    result["search"] = latency_summary(samples)
+    where = {"type": "schedule"}
+    samples = time_calls(lambda q: store.search(collection_name, q, n_results=3, where=where), search_inputs)
+    result["search_filtered"] = latency_summary(samples)
+    stats = store.get_stats(collection_name)
+    if "memory" in stats:
+        result["memory"] = stats["memory"]
+
+    # Router.route over `size` questions
+    route_inputs = [f"{r['title']} {r['speaker']} ?" for r in data["schedule"]]
+    started = time.perf_counter()
+    for question in route_inputs:
+        router.route(question)
+    route_s = time.perf_counter() - started
+    result["router_route"] = {
+        "seconds": route_s,
+        "routes_per_s": len(route_inputs) / route_s if route_s else 0.0,
+        "us_per_route": route_s / len(route_inputs) * 1e6,
+    }
+
+    result["rss_peak_mb"] = max_rss_mb()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmarks on synthetic corpora")
+    parser.add_argument("--store", choices=["auto", "chroma", "dense", "simple"], default="auto")
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="Comma-separated corpus sizes in chunks, up to 1000000")
+    parser.add_argument("--queries", type=int, default=20, help="Search queries per size")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/micro-<date>.json)")
+    args = parser.parse_args()
+
+    # Router logs every decision at INFO level
+    logging.basicConfig(level=logging.WARNING)
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    router = Router()
+
+    runs = []
+    with tempfile.TemporaryDirectory(prefix="bench_chroma_") as persist_dir:
+        store = build_store(args.store, persist_dir)
+        for size in sizes:
+            run = bench_size(store, router, size, args.queries)
+            runs.append(run)
+            print(
+                f"{size:>9} chunks | chunk {run['json_to_chunks']['chunks_per_s']:>10.0f}/s"
+                f" | search p50 {run['search']['p50_ms']:>9.2f} ms p99 {run['search']['p99_ms']:>9.2f} ms"
+                f" | filtered p50 {run['search_filtered']['p50_ms']:>9.2f} ms"
+                f" | route {run['router_route']['us_per_route']:>6.1f} us"
+                + (f" | {run['memory']['bytes_per_chunk']:.0f} B/chunk" if "memory" in run else "")
+            )
+
+    results = {
+        "benchmark": "micro",
+        "environment": bench_utils.environment_info(),
+        "config": {"store": type(store).__name__, "sizes": sizes, "queries": args.queries},
+        "runs": runs,
+    }
+    print(f"Results written to {write_results('micro', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Retrieval quality and latency regression harness
+
+Replays the labelled questions of benchmarks/golden/retrieval.jsonl
+against one or more vector store backends, with and without the
+Router's inferred metadata filters, and reports recall@k, hit rate@k,
+MRR and search latency percentiles. No LLM is involved. Each run also
+reports what adaptive retrieval (agents.selection) would put in a
+prompt: chunks kept, questions answered as not covered, and how often
+a labelled chunk survives the cut. Unless --no-reference is given, the
+keyword SimpleVectorStore is evaluated too and every other backend is
+compared with it. With --rerank, every run is repeated
+with the second retrieval stage (agents.rerank) over RERANK_CANDIDATES
+first-stage results; its latency includes the reranking, whose own cost
+and budget fallbacks are reported.
+
+A label names the source file of a relevant chunk and substrings the
+chunk must contain, so labels survive re-chunking as long as the facts
+stay together. With --baseline, each run is compared with the stored
+one of the same name and the script exits 1 on a quality drop or a
+latency increase beyond the tolerances; --save-baseline records the
+current runs instead.
+
+Run from project root:
+    python3 benchmarks/bench_retrieval.py --store simple,dense --filters both
+    python3 benchmarks/bench_retrieval.py --save-baseline
+    python3 benchmarks/bench_retrieval.py --baseline benchmarks/baselines/retrieval.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import bench_utils
+from bench_utils import DATA_DIR, PROJECT_ROOT, latency_summary, write_results
+from bench_e2e import build_store
+
+from agents.base_agent import RETRIEVAL_CANDIDATES, RETRIEVAL_CONTEXT_TOKENS
+from agents.rerank import CrossEncoderScorer, LexicalScorer, Reranker
+from agents.selection import select_results
+from coordinator.router import Router
+
+GOLDEN_FILE = PROJECT_ROOT / "benchmarks" / "golden" / "retrieval.jsonl"
+BASELINE_FILE = PROJECT_ROOT / "benchmarks" / "baselines" / "retrieval.json"
+# Runs are named after the backend actually built ("auto" resolves to one of these)
+BACKEND_NAMES = {
+    "SimpleVectorStore": "simple",
+    "ChromaManager": "chroma",
+    "DenseVectorStore": "dense",
+    "ShardedVectorStore": "sharded",
+}
+
+
+def load_golden(path: str) -> List[Dict[str, Any]]:
+    """Labelled questions, one JSON object per line"""
+    questions = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                questions.append(json.loads(line))
+    return questions
+
+
+def is_relevant(result: Dict[str, Any], target: Dict[str, Any]) -> bool:
+    """Whether a search result is the chunk a label describes"""
+    if result.get("metadata", {}).get("source") != target["source"]:
+        return False
+    document = result.get("document", "").lower()
+    return all(text.lower() in document for text in target["contains"])
+
+
+def score_question(results: List[Dict[str, Any]], targets: List[Dict[str, Any]], ks: List[int]) -> Dict[str, Any]:
+    """Rank of each labelled chunk in the results and the metrics it gives"""
+    ranks: List[Optional[int]] = []
+    for target in targets:
+        rank = next((i for i, r in enumerate(results, 1) if is_relevant(r, target)), None)
+        ranks.append(rank)
+    found = [r for r in ranks if r is not None]
+    first = min(found) if found else None
+    return {
+        "ranks": ranks,
+        "recall": {k: sum(1 for r in found if r <= k) / len(targets) for k in ks},
+        "hit": {k: float(first is not None and first <= k) for k in ks},
+        "reciprocal_rank": 1.0 / first if first else 0.0,
+    }
+
+
+def evaluate(store, questions: List[Dict[str, Any]], ks: List[int], use_filters: bool, repeat: int,
+             reranker: Optional[Reranker] = None) -> Dict[str, Any]:
+    """Quality and latency of one store/configuration over the golden set"""
+    router = Router()
+    n_results = max(ks)
+    rerank_latencies: List[float] = []
+    max_gap = reranker.score_gap if reranker else store.SCORE_GAP
+    score = (lambda r: r.get("rerank_score", 0.0)) if reranker else (lambda r: 1 - r.get("distance", 1))
+    per_question = []
+    latencies: List[float] = []
+    for question in questions:
+        where = None
+        if use_filters:
+            where = router.infer_filter(question["question"], question["collection"].replace("_docs", ""))
+
+        results = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            if reranker is None:
+                results = store.search(question["collection"], question["question"], n_results=n_results, where=where)
+            else:
+                results = store.search(question["collection"], question["question"],
+                                       n_results=max(n_results, reranker.candidates), where=where)
+                reranked_at = time.perf_counter()
+                results = reranker.rerank(question["question"], results)
+                rerank_latencies.append(time.perf_counter() - reranked_at)
+            latencies.append(time.perf_counter() - started)
+
+        if reranker is None:
+            candidates = store.search(question["collection"], question["question"],
+                                      n_results=RETRIEVAL_CANDIDATES, where=where)
+        else:
+            candidates = results
+            results = results[:n_results]
+
+        kept, cut = select_results(candidates, 3, store.MIN_RELEVANCE, max_gap, RETRIEVAL_CONTEXT_TOKENS, score)
+
+        scores = score_question(results, question["relevant"], ks)
+        per_question.append({
+            "id": question["id"],
+            "filter": where,
+            "ranks": scores["ranks"],
+            "reciprocal_rank": scores["reciprocal_rank"],
+            "recall": scores["recall"],
+            "hit": scores["hit"],
+            "kept": len(kept),
+            "cut": cut,
+            "kept_hit": any(is_relevant(r, t) for r in kept for t in question["relevant"]),
+            "tags": question.get("tags", []),
+        })
+
+    count = len(per_question) or 1
+    return {
+        "metrics": {
+            **{f"recall@{k}": sum(q["recall"][k] for q in per_question) / count for k in ks},
+            **{f"hit@{k}": sum(q["hit"][k] for q in per_question) / count for k in ks},
+            "mrr": sum(q["reciprocal_rank"] for q in per_question) / count,
+        },
+        "latency": latency_summary(latencies),
+        "selection": {
+            "avg_kept": sum(q["kept"] for q in per_question) / count,
+            "no_match_rate": sum(1 for q in per_question if not q["kept"]) / count,
+            "hit_kept": sum(1 for q in per_question if q["kept_hit"]) / count,
+        },
+        **({"rerank": {**latency_summary(rerank_latencies), **reranker.report()}} if reranker else {}),
+        "misses": [q["id"] for q in per_question if q["reciprocal_rank"] == 0.0],
+        "questions": per_question,
+    }
+
+
+def compare(runs: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            max_drop: float, max_latency_ratio: float) -> List[str]:
+    """
+    Regressions of each run against the baseline run of the same name
+
+    A comparison where no run has a baseline entry is a failure too:
+    nothing was checked.
+    """
+    regressions = []
+    compared = 0
+    for name, run in runs.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"  {name}: no baseline, skipped")
+            continue
+        compared += 1
+        for metric, value in run["metrics"].items():
+            before = reference["metrics"].get(metric)
+            if before is not None and value < before - max_drop:
+                regressions.append(f"{name}: {metric} {before:.3f} -> {value:.3f}")
+        if max_latency_ratio > 0:
+            before = reference["latency"]["p95_ms"]
+            after = run["latency"]["p95_ms"]
+            if before > 0 and after > before * max_latency_ratio:
+                regressions.append(f"{name}: p95 latency {before:.2f} ms -> {after:.2f} ms")
+    if not compared:
+        regressions.append(f"no run matches the baseline runs ({', '.join(baseline) or 'none'})")
+    return regressions
+
+
+def print_reference_comparison(runs: Dict[str, Dict[str, Any]], ks: List[int]) -> None:
+    """Differences of each run with the SimpleVectorStore run of the same variant"""
+    lines = []
+    for name, run in runs.items():
+        if run["store"] == "simple":
+            continue
+        reference = runs.get("simple" + name[len(run["store"]):])
+        if reference is None:
+            continue
+        metrics, before = run["metrics"], reference["metrics"]
+        before_p95 = reference["latency"]["p95_ms"]
+        lines.append(
+            f"{name:<32} | " + " ".join(f"R@{k} {metrics[f'recall@{k}'] - before[f'recall@{k}']:+.3f}" for k in ks)
+            + f" | MRR {metrics['mrr'] - before['mrr']:+.3f}"
+            + (f" | p95 x{run['latency']['p95_ms'] / before_p95:.1f}" if before_p95 > 0 else "")
+        )
+    if lines:
+        print("Compared with SimpleVectorStore (keyword search):")
+        for line in lines:
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrieval quality and latency regression harness")
+    parser.add_argument("--golden", default=str(GOLDEN_FILE), help="Labelled questions (JSONL)")
+    parser.add_argument("--store", default="auto",
+                        help="Comma-separated backends: auto, simple, chroma, dense")
+    parser.add_argument("--no-reference", action="store_true",
+                        help="Do not add the SimpleVectorStore (keyword) reference run")
+    parser.add_argument("--filters", choices=["off", "on", "both"], default="both",
+                        help="Search with the Router's inferred metadata filters")
+    parser.add_argument("--k", default="1,3,5", help="Comma-separated cutoffs for recall@k / hit@k")
+    parser.add_argument("--repeat", type=int, default=5, help="Searches per question for latency")
+    parser.add_argument("--tag", help="Only evaluate questions with this tag (e.g. example)")
+    parser.add_argument("--rerank", choices=["off", "lexical", "cross-encoder"], default="off",
+                        help="Also evaluate every run with this second-stage reranker")
+    parser.add_argument("--rerank-model", default=os.getenv("RERANK_MODEL"), help="Cross-encoder model (path or name)")
+    parser.add_argument("--rerank-candidates", type=int, default=int(os.getenv("RERANK_CANDIDATES", "20")),
+                        help="First-stage results reranked")
+    parser.add_argument("--rerank-budget-ms", type=float, default=float(os.getenv("RERANK_BUDGET_MS", "50")),
+                        help="Reranking time budget per question")
+    parser.add_argument("--baseline", help="Baseline file to compare against (exit 1 on regression)")
+    parser.add_argument("--save-baseline", nargs="?", const=str(BASELINE_FILE),
+                        help=f"Record these runs as the baseline (default: {BASELINE_FILE.relative_to(PROJECT_ROOT)})")
+    parser.add_argument("--max-drop", type=float, default=0.02,
+                        help="Tolerated absolute drop of recall / hit rate / MRR")
+    parser.add_argument("--max-latency-ratio", type=float, default=1.5,
+                        help="Tolerated p95 latency increase factor (0: do not check latency)")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/retrieval-<date>.json, "
+                                         "the directory is created if needed)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    ks = sorted(int(k) for k in args.k.split(",") if k)
+    questions = load_golden(args.golden)
+    if args.tag:
+        questions = [q for q in questions if args.tag in q.get("tags", [])]
+    filter_modes = {"off": [False], "on": [True], "both": [False, True]}[args.filters]
+    scorer = None
+    if args.rerank == "lexical":
+        scorer = LexicalScorer()
+    elif args.rerank == "cross-encoder":
+        scorer = CrossEncoderScorer(args.rerank_model)
+    rerank_modes = [False, True] if scorer else [False]
+
+    kinds = [s for s in args.store.split(",") if s]
+    if not args.no_reference and "simple" not in kinds:
+        kinds.append("simple")
+    runs: Dict[str, Dict[str, Any]] = {}
+    evaluated = set()
+    for kind in kinds:
+        with tempfile.TemporaryDirectory(prefix="bench_retrieval_") as persist_dir:
+            store = build_store(kind, persist_dir)
+            backend = type(store).__name__
+            store_name = BACKEND_NAMES.get(backend, kind)
+            # "auto" may already have been the reference backend
+            if store_name in evaluated:
+                continue
+            evaluated.add(store_name)
+            started = time.perf_counter()
+            store.load_json_data("devfest_docs", str(DATA_DIR / "devfest"))
+            store.load_json_data("kimana_docs", str(DATA_DIR / "kimana"))
+            load_s = time.perf_counter() - started
+            for use_filters in filter_modes:
+                for rerank in rerank_modes:
+                    name = f"{store_name}+filters" if use_filters else store_name
+                    if rerank:
+                        name += f"+rerank-{scorer.name}"
+                    if args.tag:
+                        # A subset is only comparable with a baseline of the same subset
+                        name += f"[{args.tag}]"
+                    reranker = Reranker(scorer, args.rerank_candidates, args.rerank_budget_ms) if rerank else None
+                    run = evaluate(store, questions, ks, use_filters, args.repeat, reranker)
+                    run.update({"store": store_name, "backend": backend, "filters": use_filters, "load_s": load_s})
+                    runs[name] = run
+                    metrics = run["metrics"]
+                    print(
+                        f"{name:<32} | " + " ".join(f"R@{k} {metrics[f'recall@{k}']:.3f}" for k in ks)
+                        + f" | MRR {metrics['mrr']:.3f}"
+                        + f" | p50 {run['latency']['p50_ms']:.2f} ms p95 {run['latency']['p95_ms']:.2f} ms"
+                        + f" | misses {len(run['misses'])}"
+                    )
+                    selection = run["selection"]
+                    print(
+                        f"{'':<32} | adaptive: {selection['avg_kept']:.2f} chunks kept, "
+                        f"hit {selection['hit_kept']:.3f}, no match {selection['no_match_rate']:.3f}"
+                    )
+                    if rerank:
+                        cost = run["rerank"]
+                        print(
+                            f"{'':<32} | rerank: p50 {cost['p50_ms']:.2f} ms p95 {cost['p95_ms']:.2f} ms, "
+                            f"{cost['fallbacks']}/{cost['reranks']} over budget"
+                        )
+
+    if not args.no_reference:
+        print_reference_comparison(runs, ks)
+
+    results = {
+        "benchmark": "retrieval",
+        "environment": bench_utils.environment_info(),
+        "config": {
+            "golden": args.golden, "questions": len(questions), "k": ks, "repeat": args.repeat,
+            "tag": args.tag, "embedding_model": os.getenv("EMBEDDING_MODEL"),
+            "rerank": args.rerank, "rerank_candidates": args.rerank_candidates,
+            "rerank_budget_ms": args.rerank_budget_ms,
+        },
+        "runs": runs,
+    }
+    print(f"Results written to {write_results('retrieval', results, args.output)}")
+
+    if args.save_baseline:
+        baseline = {
+            name: {"metrics": run["metrics"], "latency": run["latency"], "misses": run["misses"]}
+            for name, run in runs.items()
+        }
+        path = Path(args.save_baseline)
+        if path.exists():
+            # Keep the runs of backends not evaluated this time
+            with open(path, 'r', encoding='utf-8') as f:
+                baseline = {**json.load(f), **baseline}
+        write_results("retrieval-baseline", baseline, str(path))
+        print(f"Baseline saved to {path}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        print(f"Comparing with {args.baseline}")
+        regressions = compare(runs, baseline, args.max_drop, args.max_latency_ratio)
+        if regressions:
+            print("REGRESSIONS:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("No regression")
+
+
+if __name__ == "__main__":
+    main()
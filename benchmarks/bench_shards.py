@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Scatter-gather scaling from 1 to N shards
+
+For each shard count, starts a ShardedVectorStore, fills it with random
+unit vectors (no embedding model needed) and measures search latency
+one query at a time and throughput at a fixed concurrency.
+
+Sharding only pays off once every shard holds a trained IVF index (below
+IVFIndex's train_threshold a shard scans all its rows) and each shard has
+a core to itself: the default corpus is sized for that, and smaller runs
+or fewer cores than shards are reported.
+
+Run from project root: python3 benchmarks/bench_shards.py --size 1000000 --shards 1,2,4,8
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+import numpy as np
+
+import bench_utils
+from bench_utils import latency_summary, write_results
+
+from vectorstore.sharded import ShardedVectorStore
+
+# Vectors a shard needs before its index is trained (IVFIndex default train_threshold)
+TRAIN_THRESHOLD = 10_000
+
+
+class VectorsOnly:
+    """Embedder stand-in: the benchmark passes vectors directly"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+def bench_shards(args: argparse.Namespace, num_shards: int, queries: np.ndarray) -> Dict[str, Any]:
+    rng = np.random.default_rng(42)
+    with tempfile.TemporaryDirectory(prefix="bench_shards_") as persist_dir:
+        store = ShardedVectorStore(
+            num_shards=num_shards,
+            persist_dir=persist_dir,
+            timeout=args.timeout_ms / 1000,
+            embedder=VectorsOnly(args.dim),
+            storage=args.storage,
+            nprobe=args.nprobe
+        )
+        try:
+            store.create_or_get_collection("bench")
+            started = time.perf_counter()
+            for start in range(0, args.size, args.batch_size):
+                end = min(start + args.batch_size, args.size)
+                vectors = rng.standard_normal((end - start, args.dim)).astype(np.float32)
+                store.add_documents(
+                    "bench",
+                    [f"chunk {i}" for i in range(start, end)],
+                    [{"source": "synthetic.json", "type": "schedule"}] * (end - start),
+                    [f"bench_{i}" for i in range(start, end)],
+                    vectors
+                )
+            load_s = time.perf_counter() - started
+
+            def one(query: np.ndarray) -> Dict[str, Any]:
+                started = time.perf_counter()
+                status = store.search_with_status("bench", query, args.k)
+                return {"latency_s": time.perf_counter() - started, "partial": status["partial"]}
+
+            one(queries[0])  # warm-up
+            sequential = [one(q) for q in queries]
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+                concurrent = list(pool.map(one, queries))
+            wall_s = time.perf_counter() - started
+        finally:
+            store.close()
+
+    samples = sequential + concurrent
+    return {
+        "shards": num_shards,
+        "load_s": load_s,
+        "latency": latency_summary([s["latency_s"] for s in sequential]),
+        "concurrent_latency": latency_summary([s["latency_s"] for s in concurrent]),
+        "throughput_qps": len(concurrent) / wall_s if wall_s else 0.0,
+        "partial_results": sum(1 for s in samples if s["partial"]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sharded scatter-gather scaling benchmark")
+    parser.add_argument(
+        "--size", type=int, default=1_000_000,
+        help="Total vectors across shards (large enough that per-shard search work dominates the scatter-gather overhead)"
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--shards", default="1,2,4", help="Comma-separated shard counts")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--storage", choices=["float32", "float16", "int8"], default="float16")
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--timeout-ms", type=int, default=2000, help="Per-shard search timeout")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/shards-<date>.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    queries = np.random.default_rng(7).standard_normal((args.queries, args.dim)).astype(np.float32)
+
+    shard_counts = [int(n) for n in args.shards.split(",") if n]
+    if args.size // max(shard_counts) < TRAIN_THRESHOLD:
+        print(
+            f"Warning: {args.size // max(shard_counts)} vectors per shard at {max(shard_counts)} shards is below "
+            f"the IVF train threshold ({TRAIN_THRESHOLD}): those shards search exhaustively"
+        )
+    if (os.cpu_count() or 1) < max(shard_counts):
+        print(f"Warning: {os.cpu_count()} CPUs for up to {max(shard_counts)} shards: shards share cores")
+
+    runs = []
+    for num_shards in shard_counts:
+        run = bench_shards(args, num_shards, queries)
+        runs.append(run)
+        print(
+            f"{num_shards:>3} shards | load {run['load_s']:>6.1f}s"
+            f" | p50 {run['latency']['p50_ms']:>7.2f} ms p99 {run['latency']['p99_ms']:>7.2f} ms"
+            f" | {run['throughput_qps']:>7.0f} q/s @ {args.concurrency}"
+            f" | partial {run['partial_results']}"
+        )
+
+    results = {
+        "benchmark": "shards",
+        "environment": bench_utils.environment_info(),
+        "config": {
+            "size": args.size, "dim": args.dim, "queries": args.queries, "k": args.k,
+            "concurrency": args.concurrency, "storage": args.storage, "nprobe": args.nprobe,
+            "timeout_ms": args.timeout_ms,
+        },
+        "runs": runs,
+    }
+    print(f"Results written to {write_results('shards', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
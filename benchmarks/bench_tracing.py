@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Overhead of the trace spans
+
+Times the span tree of one request (answer > router.route, agent.answer >
+retrieval, llm.generate, with their attributes) with tracing disabled
+and with the file exporter enabled, and reports the cost per span.
+
+Run from project root: python3 benchmarks/bench_tracing.py --requests 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import bench_utils
+from bench_utils import write_results
+
+from utils.tracing import SpanExporter, Tracer, set_tracer, span
+
+# Spans opened by request_tree()
+SPANS_PER_REQUEST = 5
+
+
+def request_tree(i: int) -> None:
+    """The spans of a routed RAG answer, without the work"""
+    with span("answer", **{"question.chars": 42}) as root:
+        with span("router.route") as s:
+            s.set_attributes(**{"route": "devfest", "score.devfest": 3, "score.kimana": 0})
+        root.set_attribute("route", "devfest")
+        with span("agent.answer", agent="DevFest", **{"retrieval.k": 3}) as a:
+            with span("retrieval", **{"db.collection.name": "devfest_docs", "retrieval.k": 3}) as s:
+                s.set_attribute("retrieval.results", 3)
+            with span("llm.generate", **{"gen_ai.system": "ollama", "gen_ai.request.max_tokens": 500}) as s:
+                s.set_attributes(**{"gen_ai.usage.output_tokens": 120 + i % 7, "llm.partial": False})
+            a.set_attribute("answer.sources", 2)
+
+
+def measure(requests: int) -> float:
+    """Microseconds per span"""
+    for i in range(min(1000, requests)):
+        request_tree(i)
+    start = time.perf_counter()
+    for i in range(requests):
+        request_tree(i)
+    return (time.perf_counter() - start) / (requests * SPANS_PER_REQUEST) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trace span overhead, disabled vs enabled")
+    parser.add_argument("--requests", type=int, default=20000, help="Span trees timed per mode")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/tracing-<date>.json)")
+    args = parser.parse_args()
+
+    results = {"environment": bench_utils.environment_info(), "requests": args.requests}
+
+    set_tracer(Tracer())
+    results["disabled_us_per_span"] = measure(args.requests)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exporter = SpanExporter(os.path.join(tmp, "spans.jsonl"))
+        set_tracer(Tracer(exporter))
+        results["enabled_us_per_span"] = measure(args.requests)
+        # Export happens off the request path; its time is reported apart
+        start = time.perf_counter()
+        exporter.close()
+        results["export_flush_s"] = time.perf_counter() - start
+        results["trace_file_mb"] = os.path.getsize(exporter.path) / 1024 / 1024
+        results["dropped_spans"] = exporter.dropped
+
+    print(f"disabled: {results['disabled_us_per_span']:.2f} us/span")
+    print(f"enabled:  {results['enabled_us_per_span']:.2f} us/span "
+          f"(+{results['export_flush_s']:.2f}s to flush {results['trace_file_mb']:.1f} MB, "
+          f"{results['dropped_spans']} dropped)")
+    print(f"Results written to {write_results('tracing', results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Shared helpers for the benchmark scripts
+"""
+import json
+import os
+import platform
+import resource
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / "data"
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+# Make src/ importable the same way scripts/prepare_data_standalone.py does
+if str(PROJECT_ROOT / "src") not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT / "src"))
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile (pct in 0..100) of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def latency_summary(samples_s: List[float]) -> Dict[str, float]:
+    """Summarize latency samples (in seconds) as milliseconds"""
+    return {
+        "count": len(samples_s),
+        "mean_ms": (sum(samples_s) / len(samples_s) * 1000) if samples_s else 0.0,
+        "p50_ms": percentile(samples_s, 50) * 1000,
+        "p95_ms": percentile(samples_s, 95) * 1000,
+        "p99_ms": percentile(samples_s, 99) * 1000,
+        "max_ms": max(samples_s) * 1000 if samples_s else 0.0,
+    }
+
+
+def max_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on Linux
+    if sys.platform == "darwin":
+        return rss / (1024 * 1024)
+    return rss / 1024
+
+
+def environment_info() -> Dict[str, Any]:
+    """Describe the machine a run was executed on"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(name: str, results: Dict[str, Any], output: str = None) -> Path:
+    """Write benchmark results as JSON and return the file path"""
+    if output:
+        path = Path(output)
+    else:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        path = RESULTS_DIR / f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    return path
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Stand-in Ollama HTTP server for offline benchmarks
+
+Implements the subset of the Ollama API used by OllamaClient
+(GET /api/tags, POST /api/chat with and without streaming) and
+simulates generation with configurable latency and throughput.
+
+Run standalone: python3 benchmarks/fake_ollama.py --port 11434
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+FILLER_WORDS = [
+    "Le", "DevFest", "Abidjan", "se", "déroule", "au", "Palm", "Club",
+    "Hôtel", "et", "le", "talk", "commence", "à", "12:25.",
+]
+
+
+class FakeOllamaConfig:
+    """Latency model of the fake server"""
+
+    def __init__(
+        self,
+        first_token_ms: float = 200.0,
+        prefill_ms_per_1k_chars: float = 50.0,
+        tokens_per_second: float = 30.0,
+        response_tokens: int = 120,
+        max_parallel: int = 1,
+        model: str = "gemma3:270m"
+    ):
+        self.first_token_ms = first_token_ms
+        self.prefill_ms_per_1k_chars = prefill_ms_per_1k_chars
+        self.tokens_per_second = tokens_per_second
+        self.response_tokens = response_tokens
+        # Ollama serves OLLAMA_NUM_PARALLEL requests at once and queues the rest
+        self.max_parallel = max_parallel
+        self.model = model
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler; the server instance carries the config"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        # Keep benchmark output clean
+        pass
+
+    def _send_json(self, payload: Dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/api/tags":
+            self._send_json({"models": [{"name": self.server.config.model}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self) -> None:
+        if self.path != "/api/chat":
+            self._send_json({"error": "not found"}, status=404)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        config: FakeOllamaConfig = self.server.config
+
+        prompt_chars = sum(len(m.get("content", "")) for m in request.get("messages", []))
+        num_predict = request.get("options", {}).get("num_predict", config.response_tokens)
+        n_tokens = max(1, min(config.response_tokens, num_predict))
+        done_reason = "length" if num_predict < config.response_tokens else "stop"
+        stream = request.get("stream", True)
+
+        with self.server.slots:
+            started = time.perf_counter()
+            prefill_s = (
+                config.first_token_ms
+                + config.prefill_ms_per_1k_chars * prompt_chars / 1000.0
+            ) / 1000.0
+            time.sleep(prefill_s)
+
+            if stream:
+                self._stream_tokens(config, n_tokens, prompt_chars, started, done_reason)
+            else:
+                time.sleep(n_tokens / config.tokens_per_second)
+                text = " ".join(self._token(i) for i in range(n_tokens))
+                self._send_json({
+                    "model": config.model,
+                    "message": {"role": "assistant", "content": text},
+                    "done": True,
+                    "done_reason": done_reason,
+                    **self._counters(n_tokens, prompt_chars, started, prefill_s),
+                })
+
+    def _stream_tokens(
+        self,
+        config: FakeOllamaConfig,
+        n_tokens: int,
+        prompt_chars: int,
+        started: float,
+        done_reason: str = "stop"
+    ) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        prefill_s = time.perf_counter() - started
+        for i in range(n_tokens):
+            if i:
+                time.sleep(1.0 / config.tokens_per_second)
+            self._write_chunk({
+                "model": config.model,
+                "message": {"role": "assistant", "content": self._token(i) + " "},
+                "done": False,
+            })
+        self._write_chunk({
+            "model": config.model,
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "done_reason": done_reason,
+            **self._counters(n_tokens, prompt_chars, started, prefill_s),
+        })
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, payload: Dict[str, Any]) -> None:
+        data = json.dumps(payload).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+    @staticmethod
+    def _token(i: int) -> str:
+        return FILLER_WORDS[i % len(FILLER_WORDS)]
+
+    @staticmethod
+    def _counters(
+        n_tokens: int,
+        prompt_chars: int,
+        started: float,
+        prefill_s: float
+    ) -> Dict[str, int]:
+        total_ns = int((time.perf_counter() - started) * 1e9)
+        prefill_ns = int(prefill_s * 1e9)
+        return {
+            "prompt_eval_count": prompt_chars // 4,
+            "prompt_eval_duration": prefill_ns,
+            "eval_count": n_tokens,
+            "eval_duration": max(0, total_ns - prefill_ns),
+            "total_duration": total_ns,
+        }
+
+
+class FakeOllamaServer:
+    """Threaded fake Ollama server that can run in the background"""
+
+    def __init__(self, config: FakeOllamaConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeOllamaConfig()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self.httpd.slots = threading.BoundedSemaphore(max(1, self.config.max_parallel))
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Register latency-model options on an argument parser"""
+    group = parser.add_argument_group("fake Ollama latency model")
+    group.add_argument("--first-token-ms", type=float, default=200.0,
+                       help="Fixed delay before the first token (default: 200)")
+    group.add_argument("--prefill-ms-per-1k-chars", type=float, default=50.0,
+                       help="Extra prefill delay per 1000 prompt characters (default: 50)")
+    group.add_argument("--tokens-per-second", type=float, default=30.0,
+                       help="Generation throughput per request (default: 30)")
+    group.add_argument("--response-tokens", type=int, default=120,
+                       help="Tokens generated per answer, capped by num_predict (default: 120)")
+    group.add_argument("--max-parallel", type=int, default=1,
+                       help="Requests served concurrently, like OLLAMA_NUM_PARALLEL (default: 1)")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeOllamaConfig:
+    return FakeOllamaConfig(
+        first_token_ms=args.first_token_ms,
+        prefill_ms_per_1k_chars=args.prefill_ms_per_1k_chars,
+        tokens_per_second=args.tokens_per_second,
+        response_tokens=args.response_tokens,
+        max_parallel=args.max_parallel,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(config_from_args(args), host=args.host, port=args.port)
+    print(f"Fake Ollama listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -21,8 +21,17 @@ docker build \
 echo -e "${GREEN}✓ Coordinator image built${NC}"
 echo ""
 
-echo -e "${YELLOW}Step 2: Pushing images to K3D registry...${NC}"
+echo -e "${YELLOW}Step 2: Building embedding service image...${NC}"
+docker build \
+  -f docker/embedding.Dockerfile \
+  -t ${REGISTRY}/devfest-embedding:${VERSION} \
+  .
+echo -e "${GREEN}✓ Embedding service image built${NC}"
+echo ""
+
+echo -e "${YELLOW}Step 3: Pushing images to K3D registry...${NC}"
 docker push ${REGISTRY}/devfest-coordinator:${VERSION}
+docker push ${REGISTRY}/devfest-embedding:${VERSION}
 echo -e "${GREEN}✓ Images pushed to registry${NC}"
 echo ""
 
@@ -32,6 +41,7 @@ echo "=================================================="
 echo ""
 echo "Images built and pushed:"
 echo "  - ${REGISTRY}/devfest-coordinator:${VERSION}"
+echo "  - ${REGISTRY}/devfest-embedding:${VERSION}"
 echo ""
 echo "Next step: ./scripts/4-deploy-k3d.sh"
 echo ""
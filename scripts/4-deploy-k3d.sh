@@ -20,12 +20,18 @@ kubectl apply -f k3d/configmap.yaml
 echo -e "${GREEN}✓ ConfigMap applied${NC}"
 echo ""
 
-echo -e "${YELLOW}Step 3: Deploying coordinator...${NC}"
+echo -e "${YELLOW}Step 3: Deploying embedding service...${NC}"
+kubectl apply -f k3d/deployments/embedding-service.yaml
+echo -e "${GREEN}✓ Embedding service deployed${NC}"
+echo ""
+
+echo -e "${YELLOW}Step 4: Deploying coordinator...${NC}"
 kubectl apply -f k3d/deployments/coordinator.yaml
 echo -e "${GREEN}✓ Coordinator deployed${NC}"
 echo ""
 
-echo -e "${YELLOW}Step 4: Waiting for pods to be ready...${NC}"
+echo -e "${YELLOW}Step 5: Waiting for pods to be ready...${NC}"
+kubectl wait --for=condition=ready pod -l app=embedding-service -n devfest --timeout=180s
 kubectl wait --for=condition=ready pod -l app=coordinator -n devfest --timeout=120s
 echo -e "${GREEN}✓ All pods ready${NC}"
 echo ""
@@ -49,6 +55,7 @@ echo ""
 echo "Monitor pods:"
 echo "  kubectl get pods -n devfest -w"
 echo "  kubectl logs -f deployment/coordinator -n devfest"
+echo "  kubectl logs -f deployment/embedding-service -n devfest"
 echo ""
 echo "Demo commands:"
 echo "  # Check deployment"
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Batch question answering from JSONL
+
+Reads {"id": ..., "question": ...} lines, embeds the questions of each
+batch in one call, answers them with bounded concurrency against Ollama
+and appends one JSONL result per question (route, answer, sources,
+timings) as soon as it is ready. Questions whose id is already in the
+output are skipped, so an interrupted run resumes where it stopped.
+
+Run from project root:
+    python3 scripts/batch_answer.py --input faq.jsonl --output answers.jsonl --concurrency 2
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Set
+
+import numpy as np
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from coordinator.dispatch import answer_automatic, create_system
+from utils import Deadline, OllamaClient
+from utils.profiling import RequestProfiler
+from vectorstore import ChromaManager
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class BatchQueryEmbedder:
+    """
+    Embedder wrapper serving query vectors computed a batch at a time
+
+    The vector stores embed each query with encode([query]); questions
+    registered with prefetch() are answered from memory instead.
+    """
+
+    def __init__(self, embedder):
+        self.embedder = embedder
+        self._vectors: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self, texts: List[str], batch_size: int = 64) -> None:
+        missing = [t for t in dict.fromkeys(texts) if t not in self._vectors]
+        if not missing:
+            return
+        vectors = np.asarray(self.embedder.encode(missing, batch_size=batch_size, show_progress_bar=False))
+        with self._lock:
+            self._vectors.update(zip(missing, vectors))
+
+    def release(self, text: str) -> None:
+        with self._lock:
+            self._vectors.pop(text, None)
+
+    def encode(self, sentences, *args, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        with self._lock:
+            cached = [self._vectors.get(t) for t in texts]
+        if any(v is None for v in cached):
+            return self.embedder.encode(sentences, *args, **kwargs)
+        vectors = np.stack(cached)
+        return vectors[0] if single else vectors
+
+    def __getattr__(self, name):
+        return getattr(self.embedder, name)
+
+
+class TimedOllamaClient(OllamaClient):
+    """OllamaClient recording per-thread generation time and time-to-first-token"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._local = threading.local()
+
+    def reset(self) -> None:
+        self._local.generation_s = 0.0
+        self._local.first_token_at = None
+
+    def timings(self) -> Dict[str, Any]:
+        return {"generation_s": self._local.generation_s, "first_token_at": self._local.first_token_at}
+
+    def _on_token(self, piece: str) -> None:
+        if self._local.first_token_at is None:
+            self._local.first_token_at = time.perf_counter()
+
+    def generate(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        kwargs.setdefault("on_token", self._on_token)
+        started = time.perf_counter()
+        try:
+            return super().generate(*args, **kwargs)
+        finally:
+            self._local.generation_s += time.perf_counter() - started
+
+
+def read_questions(path: str) -> Iterator[Dict[str, Any]]:
+    """Questions from JSONL; ids default to the line number"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            if isinstance(item, str):
+                item = {"question": item}
+            item.setdefault("id", line_no)
+            yield item
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already answered in an existing output file"""
+    done = set()
+    if not Path(path).exists():
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.add(str(json.loads(line)["id"]))
+            except (ValueError, KeyError):
+                # Truncated last line of an interrupted run
+                continue
+    return done
+
+
+def percentile(values: List[float], q: float) -> float:
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions offline")
+    parser.add_argument("--input", required=True, help="JSONL of {\"id\", \"question\"} (or plain strings)")
+    parser.add_argument("--output", required=True, help="JSONL results, appended (resumable)")
+    parser.add_argument("--concurrency", type=int, default=2, help="Questions answered in parallel")
+    parser.add_argument("--batch-size", type=int, default=64, help="Questions embedded per call")
+    parser.add_argument("--deadline-ms", type=int, default=0, help="Per-question deadline (0: none)")
+    parser.add_argument("--data-dir", default=str(project_root / "data"))
+    parser.add_argument("--progress-every", type=int, default=20)
+    args = parser.parse_args()
+
+    ollama_client = TimedOllamaClient()
+    if not ollama_client.health_check():
+        logger.error("Ollama is not reachable")
+        sys.exit(1)
+
+    chroma_manager = ChromaManager()
+    # Collections are loaded when a question first needs them
+    system = create_system(ollama_client, chroma_manager, Path(args.data_dir))
+
+    # Keyword-only stores (simple) have no embedding model to batch
+    embedder = None
+    if hasattr(chroma_manager, "embedding_model"):
+        embedder = BatchQueryEmbedder(chroma_manager.embedding_model)
+        chroma_manager.embedding_model = embedder
+
+    done = completed_ids(args.output)
+    questions = [q for q in read_questions(args.input) if str(q["id"]) not in done]
+    logger.info(f"{len(questions)} questions to answer ({len(done)} already in {args.output})")
+
+    # PROFILE_SAMPLE_RATE / PROFILE_REQUESTS apply to batch questions too
+    profiler = RequestProfiler()
+
+    def answer_one(item: Dict[str, Any]) -> Dict[str, Any]:
+        ollama_client.reset()
+        started = time.perf_counter()
+        deadline = Deadline(args.deadline_ms / 1000) if args.deadline_ms else None
+        try:
+            with profiler.profile(f"batch-{item['id']}", question=item["question"]):
+                result = answer_automatic(system, item["question"], deadline)
+            error = result.get("metadata", {}).get("error")
+        except Exception as e:
+            result, error = {"answer": "", "sources": []}, str(e)
+        total_s = time.perf_counter() - started
+        if embedder is not None:
+            embedder.release(item["question"])
+
+        timings = ollama_client.timings()
+        first = timings["first_token_at"]
+        return {
+            "id": item["id"],
+            "question": item["question"],
+            "route": result.get("route"),
+            "answer": result.get("answer", ""),
+            "sources": [
+                {k: s.get(k) for k in ("source", "collection", "relevance") if k in s}
+                for s in result.get("sources", [])
+            ],
+            "metadata": result.get("metadata", {}),
+            "error": error,
+            "timings": {
+                "total_ms": total_s * 1000,
+                "generation_ms": timings["generation_s"] * 1000,
+                "retrieval_ms": (total_s - timings["generation_s"]) * 1000,
+                "ttft_ms": (first - started) * 1000 if first else None,
+            },
+        }
+
+    latencies: List[float] = []
+    errors = 0
+    started = time.perf_counter()
+    # Keep the pool busy while bounding the number of queued questions
+    max_in_flight = args.concurrency * 2
+
+    with open(args.output, 'a', encoding='utf-8') as out, \
+            ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        # Terminate a line truncated by an interrupted run
+        if out.tell() > 0:
+            with open(args.output, 'rb') as f:
+                f.seek(-1, 2)
+                if f.read(1) != b"\n":
+                    out.write("\n")
+        in_flight = set()
+
+        def drain(until: int) -> None:
+            nonlocal in_flight, errors
+            while len(in_flight) > until:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    out.flush()
+                    latencies.append(record["timings"]["total_ms"])
+                    errors += record["error"] is not None
+                    if len(latencies) % args.progress_every == 0:
+                        elapsed = time.perf_counter() - started
+                        rate = len(latencies) / elapsed
+                        eta = (len(questions) - len(latencies)) / rate if rate else 0
+                        logger.info(
+                            f"{len(latencies)}/{len(questions)} answered, "
+                            f"{rate:.2f} q/s, ETA {eta:.0f}s, errors {errors}"
+                        )
+
+        for start in range(0, len(questions), args.batch_size):
+            batch = questions[start:start + args.batch_size]
+            if embedder is not None:
+                embedder.prefetch([item["question"] for item in batch], args.batch_size)
+            for item in batch:
+                drain(max_in_flight - 1)
+                in_flight.add(pool.submit(answer_one, item))
+        drain(0)
+
+    wall_s = time.perf_counter() - started
+    print()
+    print("=" * 50)
+    print("Batch Answering Complete!")
+    print("=" * 50)
+    print(f"Answered: {len(latencies)} ({errors} errors), skipped: {len(done)}")
+    if latencies:
+        print(f"Wall time: {wall_s:.1f}s  throughput: {len(latencies) / wall_s:.2f} q/s")
+        print(f"Latency p50/p95: {percentile(latencies, 50):.0f} / {percentile(latencies, 95):.0f} ms")
+    print(f"Results: {args.output}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    main()
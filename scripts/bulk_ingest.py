@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Bulk ingestion of large JSON corpora into the vector store
+Run from project root:
+    python3 scripts/bulk_ingest.py --collection devfest_docs --data-dir data/devfest
+"""
+import argparse
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore import ChromaManager, BulkIngestor
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel, batched, resumable JSON ingestion")
+    parser.add_argument("--collection", required=True, help="Target collection name")
+    parser.add_argument("--data-dir", required=True, help="Directory of JSON files (recursive)")
+    parser.add_argument("--batch-size", type=int, default=256, help="Chunks per embedding/write batch")
+    parser.add_argument("--workers", type=int, default=None, help="Chunking processes (default: CPU count)")
+    parser.add_argument("--max-pending-writes", type=int, default=2,
+                        help="Embedded batches allowed to wait for the writer")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="Where resume checkpoints are kept (default: CHROMA_PERSIST_DIR)")
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("DevFest RAG - Bulk Ingestion")
+    print("=" * 50)
+    print()
+
+    chroma_manager = ChromaManager()
+    ingestor = BulkIngestor(
+        chroma_manager,
+        batch_size=args.batch_size,
+        workers=args.workers,
+        max_pending_writes=args.max_pending_writes,
+        checkpoint_dir=args.checkpoint_dir
+    )
+    stats = ingestor.ingest(args.collection, args.data_dir)
+
+    print()
+    print("=" * 50)
+    print("Ingestion Complete!")
+    print("=" * 50)
+    print(f"Files: {stats['files']} ingested, {stats['files_skipped']} already done")
+    print(f"Chunks: {stats['chunks']} in {stats['seconds']:.1f}s ({stats['chunks_per_s']:.0f} chunks/s)")
+    print(f"Collection '{args.collection}': {chroma_manager.get_stats(args.collection).get('count', 0)} documents")
+    print("=" * 50)
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Compare chunking policies on a data directory
+Run from project root: python3 scripts/chunk_stats.py data/devfest data/kimana
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.chunking import ChunkingPolicy, ChunkStats, iter_file_chunks, is_supported
+
+
+def collect(data_dirs, policy):
+    stats = ChunkStats()
+    for data_dir in data_dirs:
+        for filename in sorted(os.listdir(data_dir)):
+            if is_supported(filename):
+                for _ in stats.track(iter_file_chunks(os.path.join(data_dir, filename), policy=policy)):
+                    pass
+    return stats.summary()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunk count and size statistics per chunking policy")
+    parser.add_argument("data_dirs", nargs="+", help="Directories of JSON / JSON Lines files")
+    parser.add_argument("--max-length", type=int, default=500)
+    parser.add_argument("--json", action="store_true", help="Print full statistics as JSON")
+    args = parser.parse_args()
+
+    policies = {
+        "legacy": ChunkingPolicy.legacy(args.max_length),
+        "structured": ChunkingPolicy(args.max_length),
+    }
+    results = {name: collect(args.data_dirs, policy) for name, policy in policies.items()}
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    print(f"{'policy':<12}{'chunks':>8}{'chars':>9}{'mean':>8}{'p95':>6}{'max':>6}")
+    for name, summary in results.items():
+        print(
+            f"{name:<12}{summary['chunks']:>8}{summary['total_chars']:>9}"
+            f"{summary.get('mean_chars', 0):>8}{summary.get('p95_chars', 0):>6}{summary.get('max_chars', 0):>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ from pathlib import Path
 project_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(project_root / "src"))
 
+from coordinator.agent_config import load_agent_config
 from vectorstore import ChromaManager
 import logging
 
@@ -32,32 +33,24 @@ def main():
     # Data directories
     data_dir = project_root / "data"
     
-    # Load DevFest data
-    logger.info("Loading DevFest data...")
-    devfest_count = chroma_manager.load_json_data(
-        collection_name="devfest_docs",
-        data_dir=str(data_dir / "devfest")
-    )
-    logger.info(f"✓ DevFest: {devfest_count} documents loaded")
-    
-    # Load Kimana data
-    logger.info("Loading Kimana data...")
-    kimana_count = chroma_manager.load_json_data(
-        collection_name="kimana_docs",
-        data_dir=str(data_dir / "kimana")
-    )
-    logger.info(f"✓ Kimana: {kimana_count} documents loaded")
+    # Load the collection of every agent in config/agents.json (AGENTS_CONFIG)
+    agents = load_agent_config()
+    for agent in agents:
+        logger.info(f"Loading {agent['name']} data...")
+        count = chroma_manager.load_json_data(
+            collection_name=agent["collection"],
+            data_dir=str(data_dir / agent["data_dir"])
+        )
+        logger.info(f"✓ {agent['name']}: {count} documents loaded")
     
     # Verify
-    devfest_stats = chroma_manager.get_stats("devfest_docs")
-    kimana_stats = chroma_manager.get_stats("kimana_docs")
-    
     print()
     print("=" * 50)
     print("Data Preparation Complete!")
     print("=" * 50)
-    print(f"DevFest Collection: {devfest_stats['count']} documents")
-    print(f"Kimana Collection: {kimana_stats['count']} documents")
+    for agent in agents:
+        stats = chroma_manager.get_stats(agent["collection"])
+        print(f"{agent['collection']}: {stats['count']} documents")
     print("=" * 50)
     print()
 
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Aggregate per-request profiles written by utils.profiling
+
+Sums the collapsed stacks of the selected dumps into one file that
+flamegraph.pl, speedscope or inferno read directly, and prints the
+functions with the most self time and the lines that allocated most.
+
+Run from project root:
+    python3 scripts/profile_report.py profiles/ --output flame.collapsed
+    flamegraph.pl flame.collapsed > flame.svg
+"""
+import argparse
+import json
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+
+def select_dumps(profile_dir: Path, request_ids: List[str], last: int) -> List[Path]:
+    """Collapsed-stack files of the requested dumps, oldest first"""
+    dumps = sorted(profile_dir.glob("*.collapsed"), key=lambda p: p.stat().st_mtime)
+    if request_ids:
+        wanted = set(request_ids)
+        dumps = [p for p in dumps if p.name[:-len(".collapsed")] in wanted]
+    if last:
+        dumps = dumps[-last:]
+    return dumps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate request profiles into flame-graph input")
+    parser.add_argument("profile_dir", nargs="?", default="profiles", help="PROFILE_DIR of the app")
+    parser.add_argument("--request", action="append", default=[], help="Only this request id (repeatable)")
+    parser.add_argument("--last", type=int, default=0, help="Only the N most recent dumps")
+    parser.add_argument("--output", help="Aggregated collapsed stacks (default: stdout)")
+    parser.add_argument("--top", type=int, default=15, help="Rows in the self-time and allocation tables")
+    args = parser.parse_args()
+
+    dumps = select_dumps(Path(args.profile_dir), args.request, args.last)
+    if not dumps:
+        print(f"No profile dumps in {args.profile_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    stacks: Counter = Counter()
+    for path in dumps:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                stack, _, value = line.rstrip("\n").rpartition(" ")
+                if stack:
+                    stacks[stack] += int(value)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            for stack, value in sorted(stacks.items()):
+                f.write(f"{stack} {value}\n")
+    else:
+        for stack, value in sorted(stacks.items()):
+            print(f"{stack} {value}")
+
+    # Tables go to stderr so stdout stays valid collapsed-stack input
+    total = sum(stacks.values()) or 1
+    self_time: Counter = Counter()
+    for stack, value in stacks.items():
+        self_time[stack.rsplit(";", 1)[-1]] += value
+    out = sys.stderr
+    print(f"\n{len(dumps)} requests, {total / 1000:.1f} ms profiled", file=out)
+    print(f"\n{'self ms':>10} {'%':>6}  function", file=out)
+    for frame, value in self_time.most_common(args.top):
+        print(f"{value / 1000:>10.1f} {value / total:>6.1%}  {frame}", file=out)
+
+    allocations: Counter = Counter()
+    peaks = []
+    for path in dumps:
+        alloc_path = path.with_name(path.name[:-len(".collapsed")] + ".alloc.json")
+        if not alloc_path.exists():
+            continue
+        with open(alloc_path, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+        peaks.append(report["peak_traced_mb"])
+        for entry in report["top_allocations"]:
+            allocations[f"{entry['file']}:{entry['line']}"] += entry["size_kb"]
+    if allocations:
+        print(f"\nPeak traced memory: max {max(peaks):.1f} MB over {len(peaks)} requests", file=out)
+        print(f"\n{'KB':>10}  allocation site (summed over requests)", file=out)
+        for site, size_kb in allocations.most_common(args.top):
+            print(f"{size_kb:>10.1f}  {site}", file=out)
+
+
+if __name__ == "__main__":
+    main()
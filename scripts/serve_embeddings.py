@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+HTTP embedding service (see src/embeddings/service.py)
+
+Loads the embedding model once and serves batched POST /encode requests.
+Coordinators use it with EMBEDDING_SERVICE_URL=http://<host>:<port>.
+
+Run from project root:
+    python3 scripts/serve_embeddings.py --port 8080
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from embeddings import EmbeddingService
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the embedding model over HTTP with dynamic batching")
+    parser.add_argument("--model", default=os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("EMBEDDING_SERVICE_PORT", "8080")))
+    parser.add_argument("--batch-size", type=int, default=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")),
+                        help="Maximum texts per model call")
+    parser.add_argument("--wait-ms", type=float, default=float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5")),
+                        help="How long a batch waits for more requests")
+    args = parser.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+    logger.info(f"Loading embedding model: {args.model}")
+    model = SentenceTransformer(args.model)
+
+    service = EmbeddingService(
+        model, args.model, host=args.host, port=args.port,
+        max_batch_size=args.batch_size, max_wait_ms=args.wait_ms
+    )
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Embedding service stopped")
+
+
+if __name__ == "__main__":
+    main()
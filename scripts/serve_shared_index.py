@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Loader process for multi-worker coordinators on one node
+
+Loads the DevFest and Kimana collections once, publishes them as
+memory-mapped snapshots and then serves the embedding model over a Unix
+socket. Start the workers with:
+    VECTOR_STORE=dense SHARED_INDEX_DIR=<dir> EMBEDDING_SOCKET=<socket>
+They attach the snapshots read-only and never load the model.
+
+Run from project root:
+    python3 scripts/serve_shared_index.py --shared-dir /dev/shm/devfest-rag --socket /tmp/devfest-embed.sock
+"""
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from coordinator.agent_config import load_agent_config
+from embeddings import EmbeddingServer
+from vectorstore.dense_store import DenseVectorStore
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish shared collections and serve embeddings")
+    parser.add_argument("--shared-dir", default=os.getenv("SHARED_INDEX_DIR", "/dev/shm/devfest-rag"),
+                        help="Snapshot directory (tmpfs or local disk)")
+    parser.add_argument("--socket", default=os.getenv("EMBEDDING_SOCKET", "/tmp/devfest-embed.sock"),
+                        help="Unix socket for the embedding server")
+    parser.add_argument("--data-dir", default=str(project_root / "data"))
+    parser.add_argument("--publish-only", action="store_true", help="Publish snapshots and exit")
+    args = parser.parse_args()
+
+    # This process owns the model and the writable collections
+    os.environ.pop("EMBEDDING_SOCKET", None)
+    os.environ.pop("EMBEDDING_SERVICE_URL", None)
+    os.environ.pop("SHARED_INDEX_DIR", None)
+    store = DenseVectorStore()
+
+    # Every collection of config/agents.json (AGENTS_CONFIG)
+    for agent in load_agent_config():
+        collection_name, subdir = agent["collection"], agent["data_dir"]
+        count = store.load_json_data(collection_name, os.path.join(args.data_dir, subdir))
+        path = store.publish(collection_name, args.shared_dir)
+        logger.info(f"{collection_name}: {count} documents published to {path}")
+
+    if args.publish_only:
+        return
+
+    authkey = os.getenv("EMBEDDING_AUTHKEY")
+    server = EmbeddingServer(store.embedding_model, args.socket, authkey.encode() if authkey else None)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Embedding server stopped")
+
+
+if __name__ == "__main__":
+    main()
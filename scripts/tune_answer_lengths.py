@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Generated answer lengths per question type, and suggested token budgets
+
+Reads the tokens Ollama actually generated (eval_count) for each answer
+from trace files (TRACE_FILE, "agent.answer" spans) or batch_answer.py
+outputs, groups them by question type (agents.answer_length) and prints
+their distribution, how often the budget cut an answer, and an
+ANSWER_TOKENS_<TYPE> value: the 95th percentile plus a margin, raised
+when too many answers were cut.
+
+Run from project root:
+    python3 scripts/tune_answer_lengths.py traces/spans.jsonl*
+    python3 scripts/tune_answer_lengths.py answers.jsonl --margin 1.5
+"""
+import argparse
+import json
+import math
+from collections import defaultdict
+from typing import Any, Dict, Iterator, List
+
+# Share of cut answers above which the current budget is too small
+MAX_TRUNCATED = 0.05
+
+
+def _attribute(value: Dict[str, Any]) -> Any:
+    if "intValue" in value:
+        return int(value["intValue"])
+    for key in ("boolValue", "doubleValue", "stringValue"):
+        if key in value:
+            return value[key]
+    return None
+
+
+def read_answers(path: str) -> Iterator[Dict[str, Any]]:
+    """(type, tokens, max_tokens, truncated) of the generated answers of a file"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "resourceSpans" in record:
+                for resource in record["resourceSpans"]:
+                    for scope in resource.get("scopeSpans", []):
+                        for span in scope.get("spans", []):
+                            if span["name"] != "agent.answer":
+                                continue
+                            attributes = {a["key"]: _attribute(a["value"]) for a in span.get("attributes", [])}
+                            if attributes.get("answer.type") and attributes.get("answer.tokens"):
+                                yield {
+                                    "type": attributes["answer.type"],
+                                    "tokens": attributes["answer.tokens"],
+                                    "max_tokens": attributes.get("answer.max_tokens"),
+                                    "truncated": attributes.get("answer.truncated", False),
+                                }
+            else:
+                metadata = record.get("metadata", {})
+                if metadata.get("answer_type") and metadata.get("tokens"):
+                    yield {
+                        "type": metadata["answer_type"],
+                        "tokens": metadata["tokens"],
+                        "max_tokens": metadata.get("max_tokens"),
+                        "truncated": metadata.get("truncated", False),
+                    }
+
+
+def percentile(values: List[int], q: float) -> int:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(math.ceil(q / 100 * len(ordered))) - 1)]
+
+
+def suggest(answers: List[Dict[str, Any]], margin: float) -> int:
+    """Budget covering the 95th percentile with a margin, larger if answers were cut"""
+    budget = percentile([a["tokens"] for a in answers], 95) * margin
+    truncated = sum(1 for a in answers if a["truncated"]) / len(answers)
+    if truncated > MAX_TRUNCATED:
+        # Cut answers only tell that the budget was too small, not by how much
+        budget = max(budget, max(a["max_tokens"] or 0 for a in answers) * 1.5)
+    return max(32, int(math.ceil(budget / 16)) * 16)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest ANSWER_TOKENS_* budgets from recorded answers")
+    parser.add_argument("files", nargs="+", help="Trace files (OTLP/JSON) or batch_answer.py outputs")
+    parser.add_argument("--margin", type=float, default=1.25, help="Budget over the 95th percentile")
+    args = parser.parse_args()
+
+    by_type: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for path in args.files:
+        for answer in read_answers(path):
+            by_type[answer["type"]].append(answer)
+    if not by_type:
+        print("No generated answers with a question type found")
+        return
+
+    print(f"{'type':<12} {'answers':>7} {'p50':>5} {'p95':>5} {'max':>5} {'budget':>6} {'cut':>6}  suggested")
+    suggestions = {}
+    for answer_type, answers in sorted(by_type.items()):
+        tokens = [a["tokens"] for a in answers]
+        budgets = [a["max_tokens"] for a in answers if a["max_tokens"]]
+        truncated = sum(1 for a in answers if a["truncated"]) / len(answers)
+        suggestions[answer_type] = suggest(answers, args.margin)
+        print(
+            f"{answer_type:<12} {len(answers):>7} {percentile(tokens, 50):>5} {percentile(tokens, 95):>5} "
+            f"{max(tokens):>5} {max(budgets) if budgets else '-':>6} {truncated:>6.1%}  {suggestions[answer_type]}"
+        )
+
+    print()
+    for answer_type, budget in suggestions.items():
+        if answer_type != "default":
+            print(f"ANSWER_TOKENS_{answer_type.upper()}={budget}")
+
+
+if __name__ == "__main__":
+    main()
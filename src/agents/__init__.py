@@ -1,5 +1,7 @@
 from .base_agent import BaseAgent
+from .combined_agent import CombinedAgent
+from .configured_agent import ConfiguredAgent
 from .devfest_agent import DevFestAgent
 from .kimana_agent import KimanaAgent
 
-__all__ = ["BaseAgent", "DevFestAgent", "KimanaAgent"]
+__all__ = ["BaseAgent", "CombinedAgent", "ConfiguredAgent", "DevFestAgent", "KimanaAgent"]
@@ -0,0 +1,86 @@
+"""
+Generation length by question type
+
+On CPU inference generated tokens dominate latency, so a talk time or a
+venue should not be given the budget of an explanation. A keyword
+classifier sorts questions into:
+    factual      one fact (when, where, who presents, how many)
+    list         several items (sponsors, speakers, projects)
+    explanation  everything else, with the full budget
+Each type maps to a num_predict budget (ANSWER_TOKENS_<TYPE>), a
+temperature, stop sequences and a length instruction added to the
+prompt. Unclear questions fall back to explanation, so only answers
+that are short by nature are capped. Agents record the tokens actually
+generated and whether the budget cut the answer (see
+scripts/tune_answer_lengths.py).
+"""
+import os
+import re
+from typing import Any, Dict
+
+from .event_index import normalize
+
+ANSWER_TYPES = ("factual", "list", "explanation")
+
+# Cues are matched on the lowercased, accent-free question, punctuation as spaces
+_EXPLANATION = re.compile(
+    r"\b(pourquoi|comment|explique\w*|decri\w*|detaille\w*|parle moi|presente moi|c est quoi"
+    r"|qu est ce qu\w*|qui est|why|how(?! (many|much|long))|explain|describe|tell me|who is)\b"
+)
+# A count is one fact, even of list items ("how many speakers")
+_COUNT = re.compile(r"\b(combien|how (many|much|long))\b")
+_LIST = re.compile(
+    r"\b(quels|quelles|liste\w*|enumere\w*|tous les|toutes les|qui participe\w*|sponsors|partenaires"
+    r"|speakers|intervenants|which|list)\b"
+)
+_FACTUAL = re.compile(
+    r"\b(quand|quelle heure|quel jour|quelle date|ou se|ou a lieu|ou est|quel lieu"
+    r"|qui (presente|anime|parle|ouvre|cloture|organise)"
+    r"|quel est (le|l) (site|theme|lieu|date|jour|prix|lien|nom|adresse)"
+    r"|when|what time|where|who presents)\b"
+)
+
+# The model continuing the prompt template instead of stopping
+TEMPLATE_STOP = ["\nQuestion:", "\nContexte:"]
+
+ANSWER_PROFILES: Dict[str, Dict[str, Any]] = {
+    "factual": {
+        "max_tokens": int(os.getenv("ANSWER_TOKENS_FACTUAL", "128")),
+        "temperature": 0.3,
+        # One paragraph: the fact, then stop
+        "stop": TEMPLATE_STOP + ["\n\n"],
+        "instruction": "Réponds en une ou deux phrases",
+    },
+    "list": {
+        "max_tokens": int(os.getenv("ANSWER_TOKENS_LIST", "320")),
+        "temperature": 0.5,
+        "stop": TEMPLATE_STOP,
+        "instruction": "Réponds par une liste à puces courte, sans longue introduction",
+    },
+    "explanation": {
+        "max_tokens": int(os.getenv("ANSWER_TOKENS_EXPLANATION", "500")),
+        "temperature": 0.7,
+        "stop": TEMPLATE_STOP,
+        "instruction": None,
+    },
+}
+
+
+def classify_question(question: str) -> str:
+    """Answer type of a question: factual, list or explanation"""
+    text = re.sub(r"[^a-z0-9]+", " ", normalize(question))
+    if _EXPLANATION.search(text):
+        return "explanation"
+    if _COUNT.search(text):
+        return "factual"
+    if _LIST.search(text):
+        return "list"
+    if _FACTUAL.search(text):
+        return "factual"
+    return "explanation"
+
+
+def answer_profile(question: str) -> Dict[str, Any]:
+    """Generation settings for a question, with its "type" """
+    answer_type = classify_question(question)
+    return {"type": answer_type, **ANSWER_PROFILES[answer_type]}
@@ -2,18 +2,50 @@
 Base Agent class for RAG agents
 """
 import logging
+import os
 from typing import Dict, Any, List, Optional
 from abc import ABC, abstractmethod
 
+from utils.deadline import Deadline
 from utils.ollama_client import OllamaClient
+from utils.tracing import current_span, span
 from vectorstore import ChromaManager
 
+from .answer_length import answer_profile
+from .rerank import get_reranker
+from .selection import relevance, select_results
+
 logger = logging.getLogger(__name__)
 
+# Share of the remaining request time given to retrieval; generation gets the rest
+RETRIEVAL_BUDGET_SHARE = float(os.getenv("RETRIEVAL_BUDGET_SHARE", "0.25"))
+
+# Adaptive retrieval (see agents.selection): candidates fetched per search
+# and token budget of the chunks. The relevance floor and the drop that ends
+# the context default to the store's MIN_RELEVANCE and SCORE_GAP.
+ADAPTIVE_RETRIEVAL = os.getenv("ADAPTIVE_RETRIEVAL", "true").lower() == "true"
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "8"))
+RETRIEVAL_CONTEXT_TOKENS = int(os.getenv("RETRIEVAL_CONTEXT_TOKENS", "1024"))
+RETRIEVAL_MIN_RELEVANCE = os.getenv("RETRIEVAL_MIN_RELEVANCE")
+RETRIEVAL_SCORE_GAP = os.getenv("RETRIEVAL_SCORE_GAP")
+
+# Generation length, temperature and stop sequences by question type
+# (see agents.answer_length); off: 500 tokens at temperature 0.7
+ADAPTIVE_GENERATION = os.getenv("ADAPTIVE_GENERATION", "true").lower() == "true"
+DEFAULT_GENERATION = {"type": "default", "max_tokens": 500, "temperature": 0.7, "stop": None, "instruction": None}
+
+NO_MATCH_ANSWER = (
+    "Je n'ai trouvé aucune information sur ce sujet dans la base de connaissances. "
+    "Essayez de reformuler la question ou de préciser l'événement ou la personne concernés."
+)
+
 
 class BaseAgent(ABC):
     """Base class for RAG agents"""
     
+    # What the agent's collection covers (prompts of combined agents)
+    description = ""
+    
     def __init__(
         self,
         name: str,
@@ -35,13 +67,86 @@ class BaseAgent(ABC):
         """Return default system prompt for this agent"""
         pass
     
-    def search_knowledge(self, query: str, n_results: int = 3) -> List[Dict[str, Any]]:
-        """Search in the agent's knowledge base"""
-        return self.chroma_manager.search(
-            collection_name=self.collection_name,
-            query=query,
-            n_results=n_results
+    def search_knowledge(
+        self,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search in the agent's knowledge base
+        
+        With a metadata filter, only the matching chunks are searched; if the
+        filter leaves nothing, the search is retried on the whole collection
+        (unless the deadline has passed).
+        """
+        with span(
+            "retrieval",
+            **{
+                "db.collection.name": self.collection_name,
+                "retrieval.k": n_results,
+                "retrieval.filter": where,
+                "retrieval.backend": type(getattr(self.chroma_manager, "store", self.chroma_manager)).__name__,
+            }
+        ) as s:
+            if where:
+                results = self.chroma_manager.search(
+                    collection_name=self.collection_name,
+                    query=query,
+                    n_results=n_results,
+                    where=where,
+                    deadline=deadline
+                )
+                if results or (deadline is not None and deadline.expired()):
+                    s.set_attribute("retrieval.results", len(results))
+                    return results
+                logger.info(f"[{self.name}] No results for filter {where}, searching whole collection")
+                s.set_attribute("retrieval.filter_fallback", True)
+            
+            results = self.chroma_manager.search(
+                collection_name=self.collection_name,
+                query=query,
+                n_results=n_results,
+                deadline=deadline
+            )
+            s.set_attribute("retrieval.results", len(results))
+            return results
+    
+    def _selection_thresholds(self) -> Dict[str, float]:
+        """Relevance floor and score gap of adaptive retrieval for this agent's store"""
+        return {
+            "min_relevance": float(RETRIEVAL_MIN_RELEVANCE or getattr(self.chroma_manager, "MIN_RELEVANCE", 0.0)),
+            "max_gap": float(RETRIEVAL_SCORE_GAP or getattr(self.chroma_manager, "SCORE_GAP", 0.15)),
+        }
+    
+    def _max_context_results(self, n_results: int) -> int:
+        """Most chunks put in the prompt for a requested n_results"""
+        return n_results
+    
+    def _select_results(self, search_results: List[Dict[str, Any]], n_results: int) -> List[Dict[str, Any]]:
+        """Cut over-fetched candidates down to the chunks worth sending (agents.selection)"""
+        thresholds = self._selection_thresholds()
+        reranker = get_reranker()
+        reranked = reranker is not None and bool(search_results) and "rerank_score" in search_results[0]
+        if reranked:
+            # Rerank scores have their own scale (the floor stays on the first stage)
+            thresholds["max_gap"] = reranker.score_gap
+        selected, cut = select_results(
+            search_results,
+            max_results=self._max_context_results(n_results),
+            token_budget=RETRIEVAL_CONTEXT_TOKENS,
+            score=(lambda r: r["rerank_score"]) if reranked else relevance,
+            **thresholds
         )
+        logger.info(f"[{self.name}] Kept {len(selected)}/{len(search_results)} candidates ({cut})")
+        current_span().set_attributes(**{
+            "retrieval.candidates": len(search_results),
+            "retrieval.kept": len(selected),
+            "retrieval.cut": cut,
+            "retrieval.reranked": reranked,
+        })
+        return selected
     
     def _build_context(self, search_results: List[Dict[str, Any]]) -> str:
         """Build context from search results"""
@@ -56,9 +161,26 @@ class BaseAgent(ABC):
         
         return "\n".join(context_parts)
     
-    def _build_prompt(self, question: str, context: str) -> str:
-        """Build the final prompt for the LLM"""
-        prompt = f"""Contexte:
+    def _format_source(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Source entry returned with an answer for one search result"""
+        return {
+            "document": result['document'],
+            # Chunks merged by ingestion dedup list every file they came from
+            "source": result['metadata'].get('sources') or result['metadata'].get('source', 'unknown'),
+            "relevance": 1 - result.get('distance', 1)
+        }
+    
+    def _build_prompt(
+        self,
+        question: str,
+        context: str,
+        history: Optional[str] = None,
+        instruction: Optional[str] = None
+    ) -> str:
+        """Build the final prompt for the LLM (instruction: answer length hint)"""
+        conversation = f"Conversation précédente:\n{history}\n\n" if history else ""
+        length = f"\n- {instruction}" if instruction else ""
+        prompt = f"""{conversation}Contexte:
 {context}
 
 Question: {question}
@@ -68,7 +190,7 @@ Instructions:
 - Base ta réponse sur le contexte fourni
 - Si l'information n'est pas dans le contexte, dis-le clairement
 - Cite les sources quand c'est pertinent
-- Réponds en français
+- Réponds en français{length}
 
 Réponse:"""
         return prompt
@@ -77,56 +199,131 @@ Réponse:"""
         self,
         question: str,
         n_results: int = 3,
-        temperature: float = 0.7
+        temperature: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        history: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Answer a question using RAG
         
         Args:
             question: User question
-            n_results: Number of documents to retrieve
-            temperature: LLM temperature
+            n_results: Most documents put in the prompt. With a reranker
+                (agents.rerank), RERANK_CANDIDATES are fetched and reordered
+                first. With ADAPTIVE_RETRIEVAL, candidates are cut by
+                relevance, so fewer (or none: the question is answered as not
+                covered, without calling the LLM) may be used
+            temperature: LLM temperature (default: the question type's, see
+                agents.answer_length, which also sets the token budget)
+            where: Optional metadata filter for retrieval (see Router.infer_filter)
+            deadline: Optional request deadline. Retrieval gets
+                RETRIEVAL_BUDGET_SHARE of it and generation the rest; when it
+                passes, the partial answer (or the retrieved sources) is
+                returned with metadata partial=True.
+            history: Optional conversation so far (see ConversationMemory.context),
+                given to the LLM but not used for retrieval
             
         Returns:
             Dict with answer, sources, and metadata
         """
+        with span("agent.answer", agent=self.name) as s:
+            result = self._answer(question, n_results, temperature, where, deadline, history)
+            metadata = result["metadata"]
+            s.set_attributes(**{
+                "answer.sources": len(result["sources"]),
+                "answer.partial": metadata.get("partial", False),
+                "answer.no_match": metadata.get("no_match", False),
+                "answer.type": metadata.get("answer_type"),
+                "answer.max_tokens": metadata.get("max_tokens"),
+                "answer.tokens": metadata.get("tokens"),
+                "answer.truncated": metadata.get("truncated", False),
+                "deadline.stage": metadata.get("deadline_stage"),
+            })
+            if "error" in metadata:
+                s.set_error(str(metadata["error"]))
+            return result
+    
+    def _answer(
+        self,
+        question: str,
+        n_results: int,
+        temperature: Optional[float],
+        where: Optional[Dict[str, Any]],
+        deadline: Optional[Deadline],
+        history: Optional[str] = None
+    ) -> Dict[str, Any]:
         try:
             logger.info(f"[{self.name}] Processing question: {question}")
             
             # 1. Search knowledge base
-            search_results = self.search_knowledge(question, n_results)
+            retrieval_deadline = deadline.share(RETRIEVAL_BUDGET_SHARE) if deadline else None
+            reranker = get_reranker()
+            fetch = max(n_results, RETRIEVAL_CANDIDATES) if ADAPTIVE_RETRIEVAL else n_results
+            if reranker is not None:
+                fetch = max(fetch, reranker.candidates)
+            search_results = self.search_knowledge(question, fetch, where, retrieval_deadline)
+            if reranker is not None:
+                search_results = reranker.rerank(question, search_results, retrieval_deadline)
+            if ADAPTIVE_RETRIEVAL:
+                search_results = self._select_results(search_results, n_results)
+            elif reranker is not None:
+                search_results = search_results[:self._max_context_results(n_results)]
+            sources = [self._format_source(r) for r in search_results]
+            
+            if deadline is not None and deadline.expired():
+                logger.warning(f"[{self.name}] Deadline passed after retrieval")
+                return self._partial_answer(question, "", sources, "retrieval")
+            
+            if ADAPTIVE_RETRIEVAL and not search_results:
+                logger.info(f"[{self.name}] Nothing relevant retrieved, skipping generation")
+                return {
+                    "agent": self.name,
+                    "question": question,
+                    "answer": NO_MATCH_ANSWER,
+                    "sources": [],
+                    "metadata": {"model": "none", "tokens": 0, "num_sources": 0, "no_match": True}
+                }
             
             # 2. Build context
             context = self._build_context(search_results)
             
-            # 3. Build prompt
-            prompt = self._build_prompt(question, context)
+            # 3. Build prompt, sized for the kind of answer expected
+            generation = answer_profile(question) if ADAPTIVE_GENERATION else DEFAULT_GENERATION
+            prompt = self._build_prompt(question, context, history, generation["instruction"])
             
             # 4. Generate answer
             response = self.ollama_client.generate(
                 prompt=prompt,
                 system=self.system_prompt,
-                temperature=temperature
+                temperature=temperature if temperature is not None else generation["temperature"],
+                max_tokens=generation["max_tokens"],
+                deadline=deadline,
+                stop=generation["stop"]
             )
             
+            if deadline is not None and (response.get("partial") or response.get("error") == "timeout"):
+                text = response.get("text", "") if response.get("partial") else ""
+                return self._partial_answer(question, text, sources, "generation", response)
+            
             # 5. Format response
+            metadata = {
+                "model": response.get("model", "unknown"),
+                "tokens": response.get("tokens", 0),
+                "num_sources": len(search_results),
+                # Tokens generated against the budget, to tune ANSWER_TOKENS_*
+                "answer_type": generation["type"],
+                "max_tokens": response.get("num_predict", generation["max_tokens"]),
+                "truncated": response.get("done_reason") == "length"
+            }
+            if "error" in response:
+                metadata["error"] = response["error"]
             return {
                 "agent": self.name,
                 "question": question,
                 "answer": response.get("text", ""),
-                "sources": [
-                    {
-                        "document": r['document'],
-                        "source": r['metadata'].get('source', 'unknown'),
-                        "relevance": 1 - r.get('distance', 1)
-                    }
-                    for r in search_results
-                ],
-                "metadata": {
-                    "model": response.get("model", "unknown"),
-                    "tokens": response.get("tokens", 0),
-                    "num_sources": len(search_results)
-                }
+                "sources": sources,
+                "metadata": metadata
             }
             
         except Exception as e:
@@ -139,6 +336,38 @@ Réponse:"""
                 "metadata": {"error": str(e)}
             }
     
+    def _partial_answer(
+        self,
+        question: str,
+        text: str,
+        sources: List[Dict[str, Any]],
+        stage: str,
+        response: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Best answer available when the deadline passed during `stage`"""
+        if text.strip():
+            answer = f"{text}\n\n_(Réponse interrompue : délai dépassé)_"
+        elif sources:
+            listing = "\n".join(f"- {s['source']} : {s['document'][:200]}" for s in sources)
+            answer = f"Le délai de réponse est dépassé. Voici les documents les plus pertinents trouvés :\n{listing}"
+        else:
+            answer = "Désolé, le délai de réponse est dépassé."
+        
+        response = response or {}
+        return {
+            "agent": self.name,
+            "question": question,
+            "answer": answer,
+            "sources": sources,
+            "metadata": {
+                "model": response.get("model", "unknown"),
+                "tokens": response.get("tokens", 0),
+                "num_sources": len(sources),
+                "partial": True,
+                "deadline_stage": stage
+            }
+        }
+    
     def health_check(self) -> Dict[str, Any]:
         """Check agent health"""
         try:
@@ -150,7 +379,8 @@ Réponse:"""
             
             return {
                 "agent": self.name,
-                "status": "healthy" if ollama_ok and stats['status'] == 'ready' else "degraded",
+                # Lazily loaded collections are healthy until their first search
+                "status": "healthy" if ollama_ok and stats['status'] in ('ready', 'not_loaded') else "degraded",
                 "collection": stats,
                 "ollama": "connected" if ollama_ok else "disconnected"
             }
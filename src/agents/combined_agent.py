@@ -0,0 +1,125 @@
+"""
+Combined Agent - Answers multi-agent questions with a single LLM call
+"""
+import logging
+import os
+from typing import Dict, Any, List, Optional
+
+from utils.deadline import Deadline
+from utils.tokens import estimate_tokens
+from utils.tracing import span
+
+from .base_agent import BaseAgent
+
+logger = logging.getLogger(__name__)
+
+
+class CombinedAgent(BaseAgent):
+    """
+    Agent answering from the collections of several agents at once
+
+    Retrieves from every agent's collection, packs the merged results
+    under one context budget and generates a single answer, instead of
+    one full answer() per agent.
+
+    Args:
+        agents: Agents whose collections are searched
+        ollama_client: Client used for the single generation
+        chroma_manager: Vector store shared by the agents
+        context_tokens: Context budget (default: COMBINED_CONTEXT_TOKENS)
+    """
+    
+    def __init__(
+        self,
+        agents: List[BaseAgent],
+        ollama_client,
+        chroma_manager,
+        context_tokens: Optional[int] = None
+    ):
+        self.agents = agents
+        self.context_tokens = context_tokens or int(os.getenv("COMBINED_CONTEXT_TOKENS", "1024"))
+        super().__init__(
+            name="Combined Agent",
+            collection_name="+".join(agent.collection_name for agent in agents),
+            ollama_client=ollama_client,
+            chroma_manager=chroma_manager
+        )
+    
+    def _default_system_prompt(self) -> str:
+        sources = "\n".join(
+            f"- {agent.name} : {agent.description}" if agent.description else f"- {agent.name}"
+            for agent in self.agents
+        )
+        return f"""Tu es un assistant qui répond à partir de plusieurs bases de connaissances :
+{sources}
+
+Ta mission:
+- Répondre en une seule réponse cohérente, en croisant les sources si besoin
+- Distinguer ce qui provient de chacune des bases
+- Citer les sources utilisées
+
+Réponds toujours en français."""
+    
+    def search_knowledge(
+        self,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search every agent's collection and pack the results into the budget
+        
+        Results are taken rank by rank, alternating between collections, so
+        each collection is represented before lower-ranked chunks of another.
+        Chunks that would exceed the context budget are skipped, and
+        collections not reached before the deadline are left out.
+        """
+        with span("retrieval.combined", **{"retrieval.k": n_results, "context.budget_tokens": self.context_tokens}) as s:
+            per_agent = []
+            for agent in self.agents:
+                # One child "retrieval" span per collection
+                results = agent.search_knowledge(query, n_results, where, deadline)
+                per_agent.append([
+                    {**r, "metadata": {**r.get("metadata", {}), "collection": agent.collection_name}}
+                    for r in results
+                ])
+            
+            packed = []
+            used = 0
+            for rank in range(max((len(results) for results in per_agent), default=0)):
+                for results in per_agent:
+                    if rank >= len(results):
+                        continue
+                    cost = estimate_tokens(results[rank]["document"])
+                    if used + cost > self.context_tokens:
+                        continue
+                    packed.append(results[rank])
+                    used += cost
+            
+            found = sum(len(results) for results in per_agent)
+            logger.info(f"[{self.name}] Packed {len(packed)}/{found} chunks (~{used}/{self.context_tokens} tokens)")
+            s.set_attributes(**{"retrieval.results": found, "context.packed": len(packed), "context.tokens": used})
+            return packed
+    
+    def _max_context_results(self, n_results: int) -> int:
+        # n_results applies to each collection
+        return n_results * len(self.agents)
+    
+    def _build_context(self, search_results: List[Dict[str, Any]]) -> str:
+        """Build context labelled with each chunk's collection"""
+        if not search_results:
+            return "Aucun document pertinent trouvé dans la base de connaissances."
+        
+        context_parts = ["Documents pertinents:\n"]
+        for i, result in enumerate(search_results, 1):
+            metadata = result['metadata']
+            source = metadata.get('source', 'unknown')
+            context_parts.append(f"\n[Document {i}] (Source: {metadata['collection']}/{source})\n{result['document']}\n")
+        
+        return "\n".join(context_parts)
+    
+    def _format_source(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        source = super()._format_source(result)
+        source["collection"] = result['metadata']['collection']
+        return source
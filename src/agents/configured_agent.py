@@ -0,0 +1,49 @@
+"""
+Configured Agent - RAG agent defined entirely in config/agents.json
+"""
+from typing import Optional
+
+from .base_agent import BaseAgent
+
+
+class ConfiguredAgent(BaseAgent):
+    """
+    Plain RAG agent over one collection (type "rag" in config/agents.json)
+
+    Args:
+        name: Agent name shown in answers and logs
+        collection_name: Collection searched
+        ollama_client: Client used for generation
+        chroma_manager: Vector store holding the collection
+        system_prompt: System prompt (default: generic assistant prompt)
+        description: What the collection covers, used by the default prompt
+    """
+
+    def __init__(
+        self,
+        name: str,
+        collection_name: str,
+        ollama_client,
+        chroma_manager,
+        system_prompt: Optional[str] = None,
+        description: str = ""
+    ):
+        self.description = description
+        super().__init__(
+            name=name,
+            collection_name=collection_name,
+            ollama_client=ollama_client,
+            chroma_manager=chroma_manager,
+            system_prompt=system_prompt
+        )
+
+    def _default_system_prompt(self) -> str:
+        topic = f" sur {self.description}" if self.description else ""
+        return f"""Tu es un assistant expert{topic}.
+
+Ta mission:
+- Répondre aux questions à partir des documents fournis
+- Dire clairement quand l'information n'y figure pas
+- Citer les sources pertinentes
+
+Réponds toujours en français."""
@@ -1,19 +1,85 @@
 """
 DevFest Agent - Specialized in DevFest Abidjan event information
 """
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+from utils.deadline import Deadline
+from utils.tracing import span
+
 from .base_agent import BaseAgent
+from .event_index import EventIndex
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIR = Path(__file__).parent.parent.parent / "data" / "devfest"
 
 
 class DevFestAgent(BaseAgent):
-    """Agent specialized in DevFest event information"""
+    """
+    Agent specialized in DevFest event information
     
-    def __init__(self, ollama_client, chroma_manager):
+    Also used (type "event" in config/agents.json) for other events laid
+    out like data/devfest, with their own name, collection and prompt.
+    """
+    
+    description = "l'événement DevFest Abidjan 2025"
+    
+    def __init__(
+        self,
+        ollama_client,
+        chroma_manager,
+        data_dir: Optional[str] = None,
+        name: str = "DevFest Agent",
+        collection_name: str = "devfest_docs",
+        system_prompt: Optional[str] = None
+    ):
         super().__init__(
-            name="DevFest Agent",
-            collection_name="devfest_docs",
+            name=name,
+            collection_name=collection_name,
             ollama_client=ollama_client,
-            chroma_manager=chroma_manager
+            chroma_manager=chroma_manager,
+            system_prompt=system_prompt
         )
+        
+        # Deterministic answers for agenda/speaker/venue facts (skips RAG + LLM)
+        self.event_index = None
+        if os.getenv("STRUCTURED_FAST_PATH", "true").lower() == "true":
+            data_dir = data_dir or os.getenv("DEVFEST_DATA_DIR", str(DEFAULT_DATA_DIR))
+            self.event_index = EventIndex(data_dir)
+    
+    def answer(
+        self,
+        question: str,
+        n_results: int = 3,
+        temperature: Optional[float] = None,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        history: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Answer from the structured index when possible, otherwise with RAG"""
+        with span("fast_path.lookup", agent=self.name) as s:
+            hit = self.event_index.lookup(question) if self.event_index else None
+            s.set_attribute("fast_path.intent", hit["intent"] if hit else None)
+        if hit is None:
+            return super().answer(question, n_results, temperature, where, deadline, history)
+        
+        logger.info(f"[{self.name}] Structured fast path ({hit['intent']}): {question}")
+        return {
+            "agent": self.name,
+            "question": question,
+            "answer": hit["answer"],
+            "sources": hit["sources"],
+            "metadata": {
+                "model": "structured-index",
+                "tokens": 0,
+                "num_sources": len(hit["sources"]),
+                "fast_path": True,
+                "intent": hit["intent"]
+            }
+        }
     
     def _default_system_prompt(self) -> str:
         return """Tu es un assistant expert sur DevFest Abidjan 2025.
@@ -0,0 +1,307 @@
+"""
+Structured index over the DevFest agenda for deterministic lookups
+
+Built once from agenda.json, speakers.json and event_info.json, it
+answers factual questions (talk times, who speaks when, venue, date,
+sponsors) without retrieval or generation. Anything it is not confident
+about returns None so the caller falls back to RAG.
+"""
+import json
+import logging
+import os
+import re
+import unicodedata
+from typing import List, Dict, Any, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+TIME_WORDS = {'heure', 'heures', 'quand', 'horaire', 'horaires', 'commence', 'debut',
+              'termine', 'fin', 'when', 'time', 'start', 'starts'}
+WHO_WORDS = {'qui', 'who'}
+# "Qui est Kimana ?" asks who a person is, not which session they give
+IDENTITY_PATTERN = re.compile(r"^(qui (est|etait)|who is|who's)\b")
+# Explanations ("pourquoi ... en retard ?") are not in the agenda
+EXPLANATION_WORDS = {'pourquoi', 'comment', 'explique', 'expliquer', 'why', 'how', 'explain'}
+SPONSOR_WORDS = {'sponsor', 'sponsors', 'partenaire', 'partenaires', 'sponsorise'}
+# Asks for the sponsor list, not about one sponsor ("le sponsor Google a-t-il un stand ?")
+SPONSOR_LIST_PATTERN = re.compile(r"\b(quels|quelles|quel|quelle|liste|lister|qui sont|which|list|what are|who are)\b")
+DATE_WORDS = {'date', 'jour', 'quand', 'when'}
+EVENT_WORDS = {'devfest', 'evenement', 'event', 'conference'}
+# Whole words only: "où" must not match inside another word
+VENUE_PATTERN = re.compile(r"(?<!\w)(où|lieu|adresse|where|venue|se d[ée]roule)(?!\w)")
+# Places within the venue the index knows nothing about ("où est le stand...")
+PLACE_WORDS = {'stand', 'stands', 'salle', 'salles', 'parking', 'toilettes', 'vestiaire',
+               'entree', 'etage', 'amphi', 'amphitheatre', 'room', 'booth', 'restaurant'}
+# "avoir lieu" means "take place": a date question, not a venue one
+TAKES_PLACE = re.compile(r"\b(a|aura|ont|auront) lieu\b")
+
+# Question words mapped to agenda session types
+TYPE_WORDS = {
+    'pause': 'break', 'dejeuner': 'break', 'break': 'break',
+    'keynote': 'keynote', 'ouverture': 'keynote',
+    'panel': 'panel',
+    'hackathon': 'hackathon', 'finalistes': 'hackathon',
+    'accueil': 'registration', 'badge': 'registration', 'badges': 'registration',
+    'cloture': 'closing',
+    'quiz': 'activities', 'jeux': 'activities', 'reseautage': 'activities',
+}
+
+STOPWORDS = {
+    'les', 'des', 'une', 'est', 'sur', 'dans', 'pour', 'avec', 'par', 'que', 'quel',
+    'quelle', 'quels', 'quelles', 'talk', 'presentation', 'session', 'the', 'and',
+    'sponsor', 'devfest', 'abidjan', 'cloud', 'gdg', 'evenement', 'event',
+}
+
+TIME_PATTERN = re.compile(r"\b(\d{1,2})\s*(?:h|:)\s*(\d{2})?")
+SLOT_PATTERN = re.compile(r"(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})")
+
+
+def normalize(text: str) -> str:
+    """Lowercase and strip accents"""
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", normalize(text)))
+
+
+class EventIndex:
+    """Sessions indexed by speaker, time slot, type and title tokens"""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self.sessions: List[Dict[str, Any]] = []
+        self.event: Dict[str, Any] = {}
+        self.speaker_tokens: Dict[str, Set[int]] = {}
+        self.title_tokens: Dict[str, Set[int]] = {}
+        self.by_type: Dict[str, Set[int]] = {}
+        self.by_start: Dict[int, int] = {}
+
+        try:
+            self._load()
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Structured index unavailable ({data_dir}): {e}")
+        logger.info(f"EventIndex built with {len(self.sessions)} sessions")
+
+    def _read(self, filename: str) -> Dict[str, Any]:
+        path = os.path.join(self.data_dir, filename)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load(self) -> None:
+        agenda = self._read("agenda.json")
+        speakers = self._read("speakers.json").get("speakers", [])
+        self.event = self._read("event_info.json").get("event_info", {})
+        if not self.event and agenda.get("event"):
+            self.event = dict(agenda["event"])
+
+        for record in agenda.get("schedule", []):
+            slot = SLOT_PATTERN.match(record.get("time", ""))
+            if not slot:
+                continue
+            h1, m1, h2, m2 = (int(g) for g in slot.groups())
+            names = record.get("speakers") or ([record["speaker"]] if record.get("speaker") else [])
+            self.sessions.append({
+                "record": record,
+                "title": record.get("title", ""),
+                "type": record.get("type", ""),
+                "start": h1 * 60 + m1,
+                "end": h2 * 60 + m2,
+                "speakers": list(names),
+            })
+
+        for i, session in enumerate(self.sessions):
+            self.by_start[session["start"]] = i
+            self.by_type.setdefault(session["type"], set()).add(i)
+            for name in session["speakers"]:
+                self._index_speaker(name, i)
+            for token in tokenize(session["title"]):
+                if len(token) >= 4 and token not in STOPWORDS:
+                    self.title_tokens.setdefault(token, set()).add(i)
+
+        # speakers.json links full names to agenda slots
+        for speaker in speakers:
+            talks = speaker.get("talks") or ([speaker["talk"]] if speaker.get("talk") else [])
+            for talk in talks:
+                slot = SLOT_PATTERN.match(talk.get("time", ""))
+                if slot:
+                    start = int(slot.group(1)) * 60 + int(slot.group(2))
+                    if start in self.by_start:
+                        self._index_speaker(speaker.get("name", ""), self.by_start[start])
+
+    def _index_speaker(self, name: str, session: int) -> None:
+        for token in tokenize(name):
+            if len(token) >= 3 and token not in STOPWORDS and token not in {'dg'}:
+                self.speaker_tokens.setdefault(token, set()).add(session)
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    def _candidates(self, tokens: Set[str], q_norm: str) -> Optional[Set[int]]:
+        """Sessions designated by the question (None when it names no session)"""
+        signals: List[Set[int]] = []
+
+        speaker_hits: Dict[int, int] = {}
+        for token in tokens & set(self.speaker_tokens):
+            for i in self.speaker_tokens[token]:
+                speaker_hits[i] = speaker_hits.get(i, 0) + 1
+        if speaker_hits:
+            best = max(speaker_hits.values())
+            signals.append({i for i, hits in speaker_hits.items() if hits == best})
+
+        types = {TYPE_WORDS[t] for t in tokens if t in TYPE_WORDS}
+        if types:
+            signals.append(set().union(*(self.by_type.get(t, set()) for t in types)))
+
+        # Only distinctive title words (found in at most two sessions)
+        title_hits: Dict[int, int] = {}
+        for token in tokens & set(self.title_tokens):
+            if len(self.title_tokens[token]) <= 2:
+                for i in self.title_tokens[token]:
+                    title_hits[i] = title_hits.get(i, 0) + 1
+        if title_hits:
+            best = max(title_hits.values())
+            signals.append({i for i, hits in title_hits.items() if hits == best})
+
+        for match in TIME_PATTERN.finditer(q_norm):
+            minute = int(match.group(1)) * 60 + int(match.group(2) or 0)
+            at_time = {i for i, s in enumerate(self.sessions) if s["start"] <= minute < s["end"]}
+            if at_time:
+                signals.append(at_time)
+
+        if not signals:
+            return None
+        # Empty when signals conflict (e.g. a speaker and a time that don't match)
+        return set.intersection(*signals)
+
+    def lookup(self, question: str) -> Optional[Dict[str, Any]]:
+        """
+        Answer a factual question from the index
+
+        Returns:
+            Dict with answer, sources and intent, or None when not confident
+        """
+        if not self.sessions and not self.event:
+            return None
+
+        q_lower = question.lower()
+        q_norm = normalize(question)
+        tokens = tokenize(question)
+        if tokens & EXPLANATION_WORDS:
+            return None
+
+        candidates = self._candidates(tokens, q_norm)
+        wants_time = bool(tokens & TIME_WORDS) or "a quelle" in q_norm
+        # Only a leading "qui" asks for a person ("le speaker qui présente" does not)
+        wants_who = q_norm.split(" ", 1)[0] in WHO_WORDS and not IDENTITY_PATTERN.match(q_norm)
+        wants_venue = bool(VENUE_PATTERN.search(TAKES_PLACE.sub("", q_lower)))
+        wants_date = bool(tokens & DATE_WORDS) and bool(tokens & EVENT_WORDS)
+
+        if candidates is not None and (wants_who or wants_time or wants_venue):
+            if not candidates or len(candidates) > 3:
+                return None
+            sessions = [self.sessions[i] for i in sorted(candidates)]
+            if wants_who and len(sessions) == 1:
+                return self._session_answer(sessions, "who")
+            # The agenda has slots, not rooms: a "where" about a session goes to RAG
+            if wants_time:
+                return self._session_answer(sessions, "time")
+            return None
+
+        wants_sponsors = bool(tokens & SPONSOR_WORDS) and bool(SPONSOR_LIST_PATTERN.search(q_norm))
+        if wants_sponsors and not tokens & PLACE_WORDS and self.event.get("sponsors"):
+            return self._sponsors_answer()
+        if candidates is not None:
+            return None
+        if wants_date and self.event.get("date"):
+            return self._event_answer("date")
+        # Only the event's own address: "où est le parking" names another place
+        if wants_venue and tokens & EVENT_WORDS and not tokens & PLACE_WORDS and self.event.get("location"):
+            return self._event_answer("venue")
+        return None
+
+    # ------------------------------------------------------------------
+    # Answer formatting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _hhmm(minutes: int) -> str:
+        return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+    def _venue(self) -> str:
+        location = self.event.get("location", "")
+        if isinstance(location, dict):
+            parts = [location.get("venue"), location.get("city"), location.get("country")]
+            return ", ".join(p for p in parts if p)
+        return location
+
+    def _session_answer(self, sessions: List[Dict[str, Any]], intent: str) -> Dict[str, Any]:
+        lines = []
+        for s in sessions:
+            by = f" par {', '.join(s['speakers'])}" if s["speakers"] else ""
+            start, end = self._hhmm(s["start"]), self._hhmm(s["end"])
+            if intent == "who":
+                lines.append(f"De {start} à {end} : « {s['title']} »{by}.")
+            else:
+                lines.append(f"« {s['title']} »{by} a lieu de {start} à {end}.")
+        where_when = ", ".join(p for p in [self.event.get("date"), self._venue()] if p)
+        answer = "\n".join(lines if len(lines) == 1 else [f"- {line}" for line in lines])
+        if where_when:
+            answer += f"\n\n({self.event.get('name', 'DevFest')} — {where_when})"
+        return {
+            "intent": intent,
+            "answer": answer,
+            "sources": [
+                {
+                    "document": "schedule: " + json.dumps(s["record"], ensure_ascii=False),
+                    "source": "agenda.json",
+                    "relevance": 1.0
+                }
+                for s in sessions
+            ]
+        }
+
+    def _event_answer(self, intent: str) -> Dict[str, Any]:
+        name = self.event.get("name", "L'événement")
+        if intent == "venue":
+            answer = f"{name} se déroule au {self._venue()}"
+            answer += f", le {self.event['date']}." if self.event.get("date") else "."
+            fields = {"location": self.event.get("location"), "date": self.event.get("date")}
+        else:
+            answer = f"{name} a lieu le {self.event.get('date')}"
+            answer += f" au {self._venue()}." if self._venue() else "."
+            fields = {"date": self.event.get("date"), "location": self.event.get("location")}
+        return {
+            "intent": intent,
+            "answer": answer,
+            "sources": [{
+                "document": "event_info: " + json.dumps(fields, ensure_ascii=False),
+                "source": "event_info.json",
+                "relevance": 1.0
+            }]
+        }
+
+    def _sponsors_answer(self) -> Dict[str, Any]:
+        sponsors = [s for s in self.event["sponsors"] if s.get("type") != "organizer"]
+        organizers = [s["name"] for s in self.event["sponsors"] if s.get("type") == "organizer"]
+        listed = ", ".join(
+            f"{s['name']} ({s['type']})" if s.get("type") else s["name"] for s in sponsors
+        )
+        answer = f"Les sponsors de {self.event.get('name', 'DevFest')} sont : {listed}."
+        organizer = self.event.get("organizer") or ", ".join(organizers)
+        if organizer:
+            answer += f"\nOrganisation : {organizer}."
+        return {
+            "intent": "sponsors",
+            "answer": answer,
+            "sources": [{
+                "document": "event_info.sponsors: " + json.dumps(self.event["sponsors"], ensure_ascii=False),
+                "source": "event_info.json",
+                "relevance": 1.0
+            }]
+        }
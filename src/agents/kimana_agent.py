@@ -1,18 +1,30 @@
 """
 Kimana Agent - Specialized in Kimana Misago's professional profile and projects
 """
+from typing import Optional
+
 from .base_agent import BaseAgent
 
 
 class KimanaAgent(BaseAgent):
     """Agent specialized in Kimana Misago's professional information"""
     
-    def __init__(self, ollama_client, chroma_manager):
+    description = "le profil professionnel de Kimana Misago"
+    
+    def __init__(
+        self,
+        ollama_client,
+        chroma_manager,
+        name: str = "Kimana Agent",
+        collection_name: str = "kimana_docs",
+        system_prompt: Optional[str] = None
+    ):
         super().__init__(
-            name="Kimana Agent",
-            collection_name="kimana_docs",
+            name=name,
+            collection_name=collection_name,
             ollama_client=ollama_client,
-            chroma_manager=chroma_manager
+            chroma_manager=chroma_manager,
+            system_prompt=system_prompt
         )
     
     def _default_system_prompt(self) -> str:
@@ -0,0 +1,295 @@
+"""
+Second retrieval stage: rerank first-stage candidates on the CPU
+
+The vector search over-fetches RERANK_CANDIDATES chunks; a scorer that
+reads the question and each chunk together reorders them, so fewer
+chunks are needed in the prompt for the same recall. Scorers:
+    cross-encoder  sentence-transformers CrossEncoder (RERANK_MODEL, a
+                   local path or cached model), pair scores cached
+    lexical        offline default: BM25 over the candidates, query
+                   bigram matches and the first-stage relevance, from
+                   per-chunk features cached across questions
+Reranking has a strict time budget (RERANK_BUDGET_MS, within the
+retrieval deadline); when it runs out, the first-stage order is kept.
+"""
+import logging
+import math
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.deadline import Deadline
+from utils.tracing import span
+
+from .selection import relevance
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Words that carry no subject (words under 2 letters are ignored too)
+_STOPWORDS = {
+    "le", "la", "les", "un", "une", "des", "du", "de", "et", "ou", "en", "au", "aux", "à", "a",
+    "qui", "que", "quoi", "quel", "quelle", "quels", "quelles", "est", "sont", "dans", "pour",
+    "avec", "sur", "par", "ce", "ces", "se", "sa", "son", "ses", "il", "elle", "on", "ne", "pas",
+    "the", "of", "and", "to", "in", "is", "are", "for", "on", "what", "who", "when", "where", "how",
+}
+
+
+def _terms(text: str) -> List[str]:
+    """Lowercased, accent-free words of a text, light plural stemming"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    terms = []
+    for word in _WORD.findall(text):
+        if len(word) < 2 or word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("s"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class LexicalScorer:
+    """
+    Term overlap scorer that needs no model
+
+    Score in [0, 1]: BM25 of the question terms (idf over the candidate
+    set), share of the question's consecutive term pairs found in the
+    chunk, and the first-stage relevance, weighted by WEIGHTS.
+
+    Args:
+        cache_size: Chunks whose features are kept (LRU)
+    """
+
+    name = "lexical"
+    # Rerank score drop that ends the context (agents.selection)
+    SCORE_GAP = 0.15
+    WEIGHTS = {"bm25": 0.6, "bigrams": 0.2, "first_stage": 0.2}
+    K1 = 1.2
+    # No length normalization: chunks are whole records, so a short one is
+    # a small record (a URL, a name), not a more focused passage
+    B = 0.0
+    # Chunks scored between two budget checks
+    BATCH_SIZE = 32
+
+    def __init__(self, cache_size: int = 4096):
+        self.cache_size = cache_size
+        self._features: "OrderedDict[str, Tuple[Counter, set, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def features(self, document: str) -> Tuple[Counter, set, int]:
+        """Term counts, term bigrams and length of a chunk (cached)"""
+        with self._lock:
+            cached = self._features.get(document)
+            if cached is not None:
+                self._features.move_to_end(document)
+                return cached
+        terms = _terms(document)
+        features = (Counter(terms), set(zip(terms, terms[1:])), len(terms))
+        with self._lock:
+            self._features[document] = features
+            while len(self._features) > self.cache_size:
+                self._features.popitem(last=False)
+        return features
+
+    def score(self, query: str, results: List[Dict[str, Any]], deadline: Deadline) -> Optional[List[float]]:
+        """Scores of the results, or None if the deadline passed first"""
+        query_terms = list(dict.fromkeys(_terms(query)))
+        if not query_terms:
+            return [relevance(r) for r in results]
+        query_bigrams = set(zip(query_terms, query_terms[1:]))
+
+        features = []
+        for start in range(0, len(results), self.BATCH_SIZE):
+            if deadline.expired():
+                return None
+            features.extend(self.features(r["document"]) for r in results[start:start + self.BATCH_SIZE])
+
+        count = len(features)
+        average_length = sum(f[2] for f in features) / count or 1
+        idf = {
+            term: math.log(1 + (count + 1) / (1 + sum(1 for f in features if term in f[0])))
+            for term in query_terms
+        }
+        max_bm25 = sum(idf.values()) * (self.K1 + 1)
+
+        scores = []
+        for result, (counts, bigrams, length) in zip(results, features):
+            norm = self.K1 * (1 - self.B + self.B * length / average_length)
+            bm25 = sum(idf[t] * counts[t] * (self.K1 + 1) / (counts[t] + norm) for t in query_terms if counts[t])
+            proximity = len(query_bigrams & bigrams) / len(query_bigrams) if query_bigrams else 0.0
+            scores.append(
+                self.WEIGHTS["bm25"] * bm25 / max_bm25
+                + self.WEIGHTS["bigrams"] * proximity
+                + self.WEIGHTS["first_stage"] * min(1.0, max(0.0, relevance(result)))
+            )
+        return scores
+
+
+class CrossEncoderScorer:
+    """
+    sentence-transformers cross-encoder, scores squashed to [0, 1]
+
+    Args:
+        model_name: Local path or name of a cached CrossEncoder model
+        batch_size: Pairs scored between two budget checks
+        cache_size: (question, chunk) scores kept (LRU)
+
+    Raises:
+        ImportError: sentence-transformers is not installed
+    """
+
+    name = "cross-encoder"
+    SCORE_GAP = 0.2
+
+    def __init__(self, model_name: str, batch_size: int = 8, cache_size: int = 4096):
+        from sentence_transformers import CrossEncoder
+        logger.info(f"Loading reranking model: {model_name}")
+        self.model = CrossEncoder(model_name)
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def score(self, query: str, results: List[Dict[str, Any]], deadline: Deadline) -> Optional[List[float]]:
+        """Scores of the results, or None if the deadline passed first"""
+        with self._lock:
+            scores = {r["document"]: self._scores.get((query, r["document"])) for r in results}
+        missing = [document for document, score in scores.items() if score is None]
+        for start in range(0, len(missing), self.batch_size):
+            if deadline.expired():
+                return None
+            batch = missing[start:start + self.batch_size]
+            logits = self.model.predict([(query, document) for document in batch])
+            with self._lock:
+                for document, logit in zip(batch, logits):
+                    scores[document] = self._scores[(query, document)] = 1 / (1 + math.exp(-float(logit)))
+                while len(self._scores) > self.cache_size:
+                    self._scores.popitem(last=False)
+        return [scores[r["document"]] for r in results]
+
+
+class Reranker:
+    """
+    Budgeted second stage over first-stage candidates
+
+    Args:
+        scorer: LexicalScorer, CrossEncoderScorer or any object with
+            name, SCORE_GAP and score(query, results, deadline)
+        candidates: First-stage results to fetch and rerank
+        budget_ms: Time allowed for scoring one candidate list
+        score_gap: Rerank score drop that ends the context (default: the scorer's)
+    """
+
+    def __init__(self, scorer, candidates: int = 20, budget_ms: float = 50, score_gap: Optional[float] = None):
+        self.scorer = scorer
+        self.candidates = candidates
+        self.budget_ms = budget_ms
+        self.score_gap = score_gap if score_gap is not None else scorer.SCORE_GAP
+        self.stats = {"reranks": 0, "fallbacks": 0, "total_ms": 0.0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["Reranker"]:
+        """
+        Reranker of RERANKER (auto, cross-encoder, lexical or off)
+
+        auto uses the RERANK_MODEL cross-encoder when it is set and loads,
+        the lexical scorer otherwise. Returns None when off.
+        """
+        kind = os.getenv("RERANKER", "auto").lower()
+        if kind == "off":
+            return None
+        model_name = os.getenv("RERANK_MODEL")
+        scorer = None
+        if kind == "cross-encoder" or (kind == "auto" and model_name):
+            try:
+                scorer = CrossEncoderScorer(model_name, batch_size=int(os.getenv("RERANK_BATCH_SIZE", "8")))
+            except Exception as e:
+                logger.warning(f"Cross-encoder '{model_name}' unavailable ({e}), using the lexical reranker")
+        if scorer is None:
+            scorer = LexicalScorer()
+        score_gap = os.getenv("RERANK_SCORE_GAP")
+        return cls(
+            scorer,
+            candidates=int(os.getenv("RERANK_CANDIDATES", "20")),
+            budget_ms=float(os.getenv("RERANK_BUDGET_MS", "50")),
+            score_gap=float(score_gap) if score_gap else None
+        )
+
+    def rerank(
+        self,
+        query: str,
+        results: List[Dict[str, Any]],
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Results best first, each with a "rerank_score"
+
+        Returns the results unchanged (first-stage order, no rerank_score)
+        when scoring does not finish within budget_ms or the deadline.
+        """
+        if len(results) < 2:
+            return results
+        budget = Deadline(self.budget_ms / 1000, parent=deadline)
+        with span(
+            "retrieval.rerank",
+            **{"rerank.scorer": self.scorer.name, "rerank.candidates": len(results), "rerank.budget_ms": self.budget_ms}
+        ) as s:
+            started = time.perf_counter()
+            try:
+                scores = self.scorer.score(query, results, budget)
+            except Exception as e:
+                logger.warning(f"Reranking failed ({e}), keeping first-stage order")
+                s.set_error(str(e))
+                scores = None
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            with self._lock:
+                self.stats["reranks"] += 1
+                self.stats["total_ms"] += elapsed_ms
+                if scores is None:
+                    self.stats["fallbacks"] += 1
+            s.set_attributes(**{"rerank.ms": round(elapsed_ms, 3), "rerank.fallback": scores is None})
+
+            if scores is None:
+                logger.info(f"Rerank budget of {self.budget_ms:.0f} ms exceeded, keeping first-stage order")
+                return results
+            ranked = sorted(zip(scores, range(len(results))), key=lambda pair: -pair[0])
+            return [{**results[i], "rerank_score": score} for score, i in ranked]
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            reranks = self.stats["reranks"]
+            return {
+                **self.stats,
+                "scorer": self.scorer.name,
+                "avg_ms": self.stats["total_ms"] / reranks if reranks else 0.0,
+            }
+
+
+_reranker: Optional[Reranker] = None
+_reranker_loaded = False
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Process-wide reranker, configured from the environment on first use"""
+    global _reranker, _reranker_loaded
+    if not _reranker_loaded:
+        with _reranker_lock:
+            if not _reranker_loaded:
+                _reranker = Reranker.from_env()
+                _reranker_loaded = True
+    return _reranker
+
+
+def set_reranker(reranker: Optional[Reranker]) -> None:
+    """Replace the process-wide reranker (None: no second stage)"""
+    global _reranker, _reranker_loaded
+    with _reranker_lock:
+        _reranker = reranker
+        _reranker_loaded = True
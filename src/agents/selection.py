@@ -0,0 +1,63 @@
+"""
+Adaptive choice of the retrieved chunks put in a prompt
+
+Agents over-fetch candidates (searches are cheap next to generation)
+and keep, best first, only those that:
+    - reach the backend's relevance floor (MIN_RELEVANCE of the store,
+      or RETRIEVAL_MIN_RELEVANCE),
+    - come before the first drop in relevance larger than
+      RETRIEVAL_SCORE_GAP, so a clearly dominant chunk is sent alone,
+    - fit in RETRIEVAL_CONTEXT_TOKENS.
+An empty selection means the knowledge base has nothing on the question.
+Reranked candidates (agents.rerank) are ordered and cut by their rerank
+score instead; the floor still applies to the first-stage relevance,
+whose scale is known for each backend.
+"""
+from typing import Any, Callable, Dict, List, Tuple
+
+from utils.tokens import estimate_tokens
+
+
+def relevance(result: Dict[str, Any]) -> float:
+    """Relevance of a search result (1 - distance, as shown with the sources)"""
+    return 1 - result.get('distance', 1)
+
+
+def select_results(
+    results: List[Dict[str, Any]],
+    max_results: int,
+    min_relevance: float,
+    max_gap: float,
+    token_budget: int,
+    score: Callable[[Dict[str, Any]], float] = relevance
+) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Chunks worth sending to the LLM, and why the list stops there
+
+    Args:
+        results: Search results, any order
+        max_results: Most chunks kept
+        min_relevance: Relevance floor; nothing below it is kept
+        max_gap: Score drop between consecutive chunks that ends the list
+        token_budget: Context tokens available for the chunks (the first
+            kept chunk is always included)
+        score: Score the chunks are ordered and cut by (default: relevance)
+
+    Returns:
+        (selected results best first, cut reason: "threshold", "gap",
+        "budget", "max_results" or "exhausted")
+    """
+    candidates = [r for r in results if relevance(r) >= min_relevance]
+    selected: List[Dict[str, Any]] = []
+    used = 0
+    for result in sorted(candidates, key=score, reverse=True):
+        if selected and score(selected[-1]) - score(result) > max_gap:
+            return selected, "gap"
+        if len(selected) >= max_results:
+            return selected, "max_results"
+        cost = estimate_tokens(result['document'])
+        if selected and used + cost > token_budget:
+            return selected, "budget"
+        selected.append(result)
+        used += cost
+    return selected, "threshold" if len(candidates) < len(results) else "exhausted"
@@ -1,3 +1,5 @@
+from .memory import ConversationMemory
+from .precompute import PrecomputeScheduler
 from .router import Router
 
-__all__ = ["Router"]
+__all__ = ["ConversationMemory", "PrecomputeScheduler", "Router"]
@@ -0,0 +1,59 @@
+"""
+Agent declarations (config/agents.json)
+
+Each agent entry gives:
+    id             Route name (also used by the router and the badges)
+    name           Agent name shown in answers
+    type           "event" (agenda/speaker fast path), "profile" or "rag"
+    collection     Collection searched
+    data_dir       Directory of its JSON files, relative to the data root
+    system_prompt  Prompt text, or system_prompt_file (relative to the config)
+    description    What it covers (routing explanation, default and combined prompts)
+    label          Badge text in the app
+    keywords       Router keywords
+    filters        [{"keywords": [...], "where": {...}}] metadata filter rules
+    examples       Example questions shown (and precomputed) by the app
+Only id and collection are required.
+"""
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CONFIG = Path(__file__).parent.parent.parent / "config" / "agents.json"
+AGENT_TYPES = ("event", "profile", "rag")
+
+
+def load_agent_config(path: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Validated agent entries of AGENTS_CONFIG (default: config/agents.json)
+
+    Raises:
+        ValueError: Missing id/collection, duplicate id or unknown type
+    """
+    path = Path(path or os.getenv("AGENTS_CONFIG", str(DEFAULT_CONFIG)))
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+
+    agents = []
+    seen = set()
+    for entry in config.get("agents", []):
+        if not entry.get("id") or not entry.get("collection"):
+            raise ValueError(f"{path}: every agent needs an id and a collection ({entry})")
+        if entry["id"] in seen or entry["id"] == "both":
+            raise ValueError(f"{path}: agent id '{entry['id']}' is reserved or used twice")
+        agent_type = entry.get("type", "rag")
+        if agent_type not in AGENT_TYPES:
+            raise ValueError(f"{path}: unknown type '{agent_type}' for agent '{entry['id']}'")
+        seen.add(entry["id"])
+
+        entry = {**entry, "type": agent_type, "name": entry.get("name", entry["id"])}
+        entry.setdefault("data_dir", entry["id"])
+        if "system_prompt_file" in entry:
+            with open(path.parent / entry["system_prompt_file"], 'r', encoding='utf-8') as f:
+                entry["system_prompt"] = f.read().strip()
+        agents.append(entry)
+
+    if not agents:
+        raise ValueError(f"{path}: no agents declared")
+    return agents
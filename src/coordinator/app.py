@@ -6,15 +6,18 @@ import streamlit as st
 import os
 import sys
 import logging
+from contextlib import nullcontext
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from agents import DevFestAgent, KimanaAgent
-from utils import OllamaClient
+from utils import Deadline, OllamaClient
+from utils.profiling import RequestProfiler
 from vectorstore import ChromaManager
-from coordinator.router import Router
+from coordinator.dispatch import answer_automatic, create_system
+from coordinator.memory import ConversationMemory
+from coordinator.precompute import PrecomputeScheduler
 
 # Configure logging
 logging.basicConfig(
@@ -23,6 +26,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Badge styles, cycled over the agents of config/agents.json
+BADGE_STYLES = ["devfest-badge", "kimana-badge"]
+
+# Chat messages kept for display; the prompt only sees ConversationMemory
+MAX_DISPLAYED_MESSAGES = 100
+
 # Page config
 st.set_page_config(
     page_title="DevFest RAG Assistant",
@@ -93,47 +102,50 @@ def initialize_system():
     
     # Initialize ChromaDB
     chroma_manager = ChromaManager()
-    
-    # Load data if not already loaded
     data_dir = Path(__file__).parent.parent.parent / "data"
     
-    devfest_count = chroma_manager.load_json_data(
-        collection_name="devfest_docs",
-        data_dir=str(data_dir / "devfest")
-    )
-    logger.info(f"DevFest collection: {devfest_count} documents")
-    
-    kimana_count = chroma_manager.load_json_data(
-        collection_name="kimana_docs",
-        data_dir=str(data_dir / "kimana")
-    )
-    logger.info(f"Kimana collection: {kimana_count} documents")
+    # Agents and router from config/agents.json; collections are loaded
+    # on their first search (LAZY_AGENTS, COLLECTION_MEMORY_MB)
+    system = create_system(ollama_client, chroma_manager, data_dir)
+    system["precompute"] = None
+    registry = system["registry"]
     
-    # Initialize agents
-    devfest_agent = DevFestAgent(ollama_client, chroma_manager)
-    kimana_agent = KimanaAgent(ollama_client, chroma_manager)
+    # Answer example and frequent questions in the background, refreshed
+    # whenever the data files of the collections change
+    if os.getenv("PRECOMPUTE_ENABLED", "true").lower() == "true":
+        scheduler = PrecomputeScheduler(
+            answer_fn=lambda question, deadline: answer_automatic(system, question, deadline),
+            version_fn=registry.collections.version,
+            questions=[q for questions in registry.examples().values() for q in questions]
+        )
+        scheduler.start()
+        system["precompute"] = scheduler
     
-    # Initialize router
-    router = Router()
+    # cProfile + tracemalloc on sampled or flagged requests (PROFILE_SAMPLE_RATE)
+    system["profiler"] = RequestProfiler()
     
     logger.info("System initialized successfully!")
     
-    return {
-        "devfest_agent": devfest_agent,
-        "kimana_agent": kimana_agent,
-        "router": router,
-        "chroma_manager": chroma_manager
-    }
+    return system
+
 
+def profile_requested() -> bool:
+    """Request flagged for profiling with an X-Profile header or ?profile=1"""
+    # st.context (headers) and st.query_params only exist in recent Streamlit
+    context = getattr(st, "context", None)
+    if context is not None and context.headers.get("X-Profile", "").lower() in ("1", "true"):
+        return True
+    query_params = getattr(st, "query_params", None)
+    return query_params is not None and query_params.get("profile") in ("1", "true")
 
-def display_agent_badge(agent_type: str):
+
+def display_agent_badge(registry, agent_type: str):
     """Display agent badge"""
-    badges = {
-        "devfest": ('<span class="agent-badge devfest-badge">🎯 Agent DevFest</span>', "devfest-badge"),
-        "kimana": ('<span class="agent-badge kimana-badge">👤 Agent Kimana</span>', "kimana-badge"),
-        "both": ('<span class="agent-badge both-badge">🤝 Agents Combinés</span>', "both-badge")
-    }
-    badge_html, _ = badges.get(agent_type, badges["both"])
+    if agent_type in registry.entries:
+        style = BADGE_STYLES[registry.ids.index(agent_type) % len(BADGE_STYLES)]
+    else:
+        style = "both-badge"
+    badge_html = f'<span class="agent-badge {style}">{registry.label(agent_type)}</span>'
     st.markdown(badge_html, unsafe_allow_html=True)
 
 
@@ -145,9 +157,10 @@ def display_sources(sources):
     with st.expander("📚 Sources utilisées", expanded=False):
         for i, source in enumerate(sources, 1):
             relevance_pct = int(source.get('relevance', 0) * 100)
+            origin = f"{source['collection']}/{source['source']}" if 'collection' in source else source['source']
             st.markdown(f"""
             <div class="source-card">
-                <strong>Source {i}</strong> ({source['source']}) - Pertinence: {relevance_pct}%<br>
+                <strong>Source {i}</strong> ({origin}) - Pertinence: {relevance_pct}%<br>
                 <small>{source['document'][:200]}...</small>
             </div>
             """, unsafe_allow_html=True)
@@ -169,6 +182,7 @@ def main():
     except Exception as e:
         st.error(f"Erreur d'initialisation: {e}")
         st.stop()
+    registry = system["registry"]
     
     # Sidebar
     with st.sidebar:
@@ -184,7 +198,8 @@ def main():
         if agent_mode == "Manuel":
             selected_agent = st.selectbox(
                 "Choisir un agent",
-                ["DevFest Agent", "Kimana Agent"]
+                registry.ids,
+                format_func=lambda agent_id: registry.entries[agent_id]["name"]
             )
         
         st.markdown("---")
@@ -192,52 +207,49 @@ def main():
         # System status
         st.markdown("## 📊 Statut du Système")
         
-        devfest_health = system["devfest_agent"].health_check()
-        kimana_health = system["kimana_agent"].health_check()
-        
-        col1, col2 = st.columns(2)
-        with col1:
-            status_icon = "✅" if devfest_health['status'] == 'healthy' else "⚠️"
-            st.metric("DevFest Agent", devfest_health['status'], status_icon)
-        with col2:
-            status_icon = "✅" if kimana_health['status'] == 'healthy' else "⚠️"
-            st.metric("Kimana Agent", kimana_health['status'], status_icon)
+        ollama_ok = system["ollama_client"].health_check()
+        st.metric("Ollama", "connected" if ollama_ok else "disconnected", "✅" if ollama_ok else "⚠️")
         
-        # Collection stats
+        # Collection stats (collections not searched yet are not loaded)
         st.markdown("### 📚 Base de Connaissances")
-        devfest_stats = system["chroma_manager"].get_stats("devfest_docs")
-        kimana_stats = system["chroma_manager"].get_stats("kimana_docs")
-        
-        st.metric("Docs DevFest", devfest_stats.get('count', 0))
-        st.metric("Docs Kimana", kimana_stats.get('count', 0))
+        for agent_id, entry in registry.entries.items():
+            stats = system["chroma_manager"].get_stats(entry["collection"])
+            count = stats.get('count', 0) if stats['status'] != 'not_loaded' else "non chargée"
+            st.markdown(f"**{entry['name']}** : {count} docs")
+        report = registry.collections.report()
+        st.caption(f"Mémoire des collections : {report['loaded_mb']:.1f} / {report['budget_mb']:.0f} MB")
+        if system["reranker"] is not None:
+            rerank = system["reranker"].report()
+            st.caption(
+                f"Re-classement ({rerank['scorer']}) : {rerank['avg_ms']:.1f} ms en moyenne, "
+                f"{rerank['fallbacks']}/{rerank['reranks']} hors budget"
+            )
         
         st.markdown("---")
         
         # Example questions
         st.markdown("## 💡 Questions Exemples")
         
-        example_questions = {
-            "DevFest": [
-                "À quelle heure commence le talk de Kimana ?",
-                "Quels sont les sponsors de DevFest ?",
-                "Où se déroule l'événement ?",
-            ],
-            "Kimana": [
-                "Qui est Kimana Misago ?",
-                "C'est quoi Ivoire.pro ?",
-                "Quelle est l'expertise de Kimana ?",
-            ]
-        }
-        
-        for category, questions in example_questions.items():
+        for category, questions in registry.examples().items():
             with st.expander(f"📌 {category}"):
                 for q in questions:
                     if st.button(q, key=f"example_{q}"):
                         st.session_state.example_question = q
+        
+        st.markdown("---")
+        if st.button("🧹 Nouvelle conversation"):
+            st.session_state.messages = []
+            if st.session_state.get("memory"):
+                st.session_state.memory.clear()
     
     # Initialize chat history
     if "messages" not in st.session_state:
         st.session_state.messages = []
+    # Token-bounded history given to the agents (CONVERSATION_MEMORY)
+    if "memory" not in st.session_state:
+        enabled = os.getenv("CONVERSATION_MEMORY", "true").lower() == "true"
+        st.session_state.memory = ConversationMemory(system["ollama_client"], router=system["router"]) if enabled else None
+    memory = st.session_state.memory
     
     # Display chat history
     for message in st.session_state.messages:
@@ -265,40 +277,36 @@ def main():
         with st.chat_message("assistant"):
             with st.spinner("Réflexion en cours..."):
                 try:
+                    # One deadline for the whole answer (REQUEST_DEADLINE_MS)
+                    deadline = Deadline.from_env()
+                    precompute = system["precompute"]
+                    # Live requests pause background precomputation
+                    live = precompute.live() if precompute else nullcontext()
+                    # No-op unless this request is sampled or flagged
+                    profile = system["profiler"].profile(force=profile_requested(), question=question)
+                    # Follow-ups are retrieved with a standalone query
+                    query = memory.rewrite(question) if memory else question
+                    history = memory.context() if memory else None
+                    
                     # Routing
                     if agent_mode == "Automatique (Routing intelligent)":
-                        route = system["router"].route(question)
-                        display_agent_badge(route)
-                        
-                        if route == "devfest":
-                            result = system["devfest_agent"].answer(question)
-                        elif route == "kimana":
-                            result = system["kimana_agent"].answer(question)
-                        else:  # both
-                            # Query both agents and combine
-                            devfest_result = system["devfest_agent"].answer(question)
-                            kimana_result = system["kimana_agent"].answer(question)
-                            
-                            # Combine answers
-                            combined_answer = f"""**Agent DevFest:**
-{devfest_result['answer']}
-
-**Agent Kimana:**
-{kimana_result['answer']}
-"""
-                            result = {
-                                "agent": "Combined",
-                                "answer": combined_answer,
-                                "sources": devfest_result['sources'] + kimana_result['sources']
-                            }
+                        result = None
+                        # Precomputed answers only fit standalone questions
+                        if precompute and query == question:
+                            precompute.record(question)
+                            result = precompute.get(question)
+                        precomputed = result is not None
+                        if not precomputed:
+                            with live, profile:
+                                result = answer_automatic(system, question, deadline, history=history, query=query)
+                        display_agent_badge(registry, result["route"])
+                        if precomputed:
+                            st.caption("⚡ Réponse pré-calculée")
                     else:
                         # Manual mode
-                        if selected_agent == "DevFest Agent":
-                            display_agent_badge("devfest")
-                            result = system["devfest_agent"].answer(question)
-                        else:
-                            display_agent_badge("kimana")
-                            result = system["kimana_agent"].answer(question)
+                        with live, profile:
+                            display_agent_badge(registry, selected_agent)
+                            result = registry.get(selected_agent).answer(query, deadline=deadline, history=history)
                     
                     # Display answer
                     st.markdown(result['answer'])
@@ -313,6 +321,10 @@ def main():
                         "content": result['answer'],
                         "sources": result.get('sources', [])
                     })
+                    del st.session_state.messages[:-MAX_DISPLAYED_MESSAGES]
+                    if memory:
+                        # Summarizes turns leaving the window in the background
+                        memory.add_turn(question, result['answer'], query)
                     
                 except Exception as e:
                     st.error(f"Erreur: {e}")
@@ -0,0 +1,113 @@
+"""
+Agent set-up and question dispatch shared by the app and offline tools
+"""
+import logging
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from agents.rerank import get_reranker
+from utils.deadline import Deadline
+from utils.tokens import estimate_tokens
+from utils.tracing import span
+
+from .agent_config import load_agent_config
+from .registry import AgentRegistry
+from .router import Router
+
+logger = logging.getLogger(__name__)
+
+
+def create_system(ollama_client, chroma_manager, data_dir: Path, config_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Agents and router declared in config/agents.json (AGENTS_CONFIG)
+    
+    Agents are built and their collections loaded on first use, unless
+    LAZY_AGENTS=false. The reranker (and its model, if any) is loaded now.
+    
+    Args:
+        ollama_client: Client shared by the agents
+        chroma_manager: Vector store the collections are loaded into
+        data_dir: Data root the agents' data_dir are relative to
+        config_path: Agent config (default: AGENTS_CONFIG)
+        
+    Returns:
+        System dict used by answer_automatic
+    """
+    agents = load_agent_config(config_path)
+    registry = AgentRegistry(agents, ollama_client, chroma_manager, data_dir)
+    if os.getenv("LAZY_AGENTS", "true").lower() != "true":
+        registry.preload()
+    
+    return {
+        "registry": registry,
+        "multi_agent_mode": os.getenv("MULTI_AGENT_MODE", "combined").lower(),
+        "router": Router(agents),
+        "ollama_client": ollama_client,
+        "reranker": get_reranker(),
+        # Searches and stats go through the lazy loader
+        "chroma_manager": registry.collections
+    }
+
+
+def answer_automatic(
+    system: Dict[str, Any],
+    question: str,
+    deadline: Optional[Deadline] = None,
+    history: Optional[str] = None,
+    query: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Route a question and answer it; the route is stored in result['route']
+    
+    With a conversation memory, `query` is the standalone query from
+    ConversationMemory.rewrite() and `history` its context(). Routing
+    uses the question as asked, the agents answer the query.
+    """
+    # Root span of the request: router, retrieval and generation nest under it
+    with span("answer", **{"question.chars": len(question), "history.tokens": estimate_tokens(history or "")}) as root:
+        result = _answer(system, question, query or question, deadline, history)
+        root.set_attributes(route=result["route"], partial=result.get("metadata", {}).get("partial", False))
+        return result
+
+
+def _answer(
+    system: Dict[str, Any],
+    question: str,
+    query: str,
+    deadline: Optional[Deadline],
+    history: Optional[str]
+) -> Dict[str, Any]:
+    registry = system["registry"]
+    candidates = system["router"].candidates(question)
+    
+    if len(candidates) == 1:
+        route = candidates[0]
+        where = system["router"].infer_filter(question, route)
+        result = registry.get(route).answer(query, where=where, deadline=deadline, history=history)
+    elif system["multi_agent_mode"] == "combined":
+        # "both" questions: one retrieval over the candidates' collections and one LLM call
+        route = "both"
+        result = registry.combined(candidates).answer(query, deadline=deadline, history=history)
+    else:  # both, per agent
+        route = "both"
+        # Query each candidate agent and combine
+        results = [
+            registry.get(agent_id).answer(query, deadline=deadline, history=history)
+            for agent_id in candidates
+        ]
+        
+        # Combine answers
+        combined_answer = "\n\n".join(
+            f"**{registry.label(agent_id)}:**\n{agent_result['answer']}"
+            for agent_id, agent_result in zip(candidates, results)
+        )
+        result = {
+            "agent": "Combined",
+            "answer": combined_answer + "\n",
+            "sources": [source for agent_result in results for source in agent_result['sources']]
+        }
+    
+    result["route"] = route
+    result["candidates"] = candidates
+    return result
@@ -0,0 +1,217 @@
+"""
+Bounded multi-turn conversation memory
+
+A conversation is kept as a running summary plus a window of the most
+recent turns that fits in MEMORY_WINDOW_TOKENS. Turns pushed out of the
+window are folded into the summary (at most MEMORY_SUMMARY_TOKENS) by
+the LLM on a background thread, after the answer has been shown, so
+the history added to each prompt stays the same size however long the
+session runs.
+
+Follow-up questions ("et à quelle heure ?") are rewritten into
+standalone retrieval queries by carrying over the subject terms of the
+previous query, without an LLM call on the request path.
+"""
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from utils.tokens import CHARS_PER_TOKEN, estimate_tokens
+from utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"\w+")
+# Questions opening with a connector
+_CONNECTOR = re.compile(r"^\s*(et|mais|alors|puis|aussi|sinon|and)\b", re.IGNORECASE)
+# Questions referring back with a pronoun. Inverted subjects ("y a-t-il",
+# "faut-il") and "il y a" are impersonal, not a reference
+_PRONOUN = re.compile(
+    r"(?<![-\w])(il(?!\s+y\b)|elle|ils|elles|lui|leur|leurs|son|sa|ses|ça|cela|celui|celle|ceux|celles|là"
+    r"|lequel|laquelle|lesquels|lesquelles)\b",
+    re.IGNORECASE
+)
+# Words that do not identify a subject (words under 3 letters are ignored too)
+_STOPWORDS = {
+    "qui", "que", "quoi", "quel", "quelle", "quels", "quelles", "est", "sont", "les", "des", "une",
+    "dans", "pour", "avec", "sur", "par", "comment", "combien", "pourquoi", "quand", "elle", "elles",
+    "ils", "lui", "leur", "leurs", "son", "ses", "aussi", "alors", "mais", "puis", "sinon", "cela",
+    "celui", "celle", "ceux", "celles", "lequel", "laquelle", "lesquels", "lesquelles",
+    "fait", "faire", "peux", "peut", "moi", "nous", "vous",
+    "the", "and", "what", "who", "when", "where", "how", "dis", "parle", "plus",
+}
+# Subject terms carried over to a follow-up query
+MAX_CARRIED_TERMS = 8
+
+# One compaction at a time across sessions: summaries are not urgent
+_compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memory-compaction")
+
+
+def _content_words(text: str) -> List[str]:
+    return [w for w in _WORD.findall(text) if len(w) >= 3 and w.lower() not in _STOPWORDS]
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+class ConversationMemory:
+    """
+    Summary + recent-turns window of one conversation
+
+    Args:
+        ollama_client: Client used to write the summary (None: extractive summary)
+        window_tokens: Budget of the recent turns kept verbatim
+        summary_tokens: Budget of the summary of older turns
+        router: Router whose keywords mark a question that names its own subject
+    """
+
+    def __init__(self, ollama_client=None, window_tokens: int = None, summary_tokens: int = None, router=None):
+        self.ollama_client = ollama_client
+        self.router = router
+        self.window_tokens = window_tokens or int(os.getenv("MEMORY_WINDOW_TOKENS", "600"))
+        self.summary_tokens = summary_tokens or int(os.getenv("MEMORY_SUMMARY_TOKENS", "150"))
+        self.summary = ""
+        # Turns: {"question", "answer", "query" (standalone query used), "tokens"}
+        self._turns: List[Dict[str, Any]] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._compacting = False
+        self._last_query: Optional[str] = None
+        # Bumped by clear() so a compaction already running is discarded
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def rewrite(self, question: str) -> str:
+        """
+        Standalone retrieval query for a question
+
+        A follow-up (opening connector, pronoun, or fewer than two subject
+        words) gets the subject terms of the previous query that it does
+        not already contain; other questions are returned unchanged. Only
+        an opening connector makes a follow-up of a question that matches
+        a router keyword ("y a-t-il un atelier au DevFest ?" is new).
+
+        The rewrite is for retrieval: route on the original question.
+        """
+        with self._lock:
+            previous = self._last_query
+        if previous is None:
+            return question
+        words = _content_words(question)
+        if _CONNECTOR.search(question) is None:
+            if self.router is not None and any(self.router.scores(question).values()):
+                return question
+            if not _PRONOUN.search(question) and len(words) >= 2:
+                return question
+        present = {w.lower() for w in words}
+        carried = []
+        for word in _content_words(previous):
+            if word.lower() not in present:
+                present.add(word.lower())
+                carried.append(word)
+        if not carried:
+            return question
+        query = f"{question.strip()} ({' '.join(carried[:MAX_CARRIED_TERMS])})"
+        logger.info(f"Follow-up rewritten: {question!r} -> {query!r}")
+        return query
+
+    def context(self) -> str:
+        """History to put in the prompt (empty for a new conversation)"""
+        with self._lock:
+            parts = []
+            if self.summary:
+                parts.append(f"Résumé de la conversation : {self.summary}")
+            if self._pending:
+                # Not summarized yet: at least keep what was asked
+                questions = " ; ".join(t["question"].strip() for t in self._pending)
+                parts.append(f"Questions précédentes : {_clip(questions, self.summary_tokens)}")
+            for turn in self._turns:
+                parts.append(f"Utilisateur : {turn['question']}\nAssistant : {turn['answer']}")
+        return "\n\n".join(parts)
+
+    def add_turn(self, question: str, answer: str, query: Optional[str] = None) -> None:
+        """
+        Record an answered turn; turns leaving the window are summarized
+        in the background
+        """
+        # One long answer must not take the whole window
+        answer = _clip(answer, self.window_tokens // 2)
+        turn = {
+            "question": question,
+            "answer": answer,
+            "query": query or question,
+            "tokens": estimate_tokens(question) + estimate_tokens(answer),
+        }
+        with self._lock:
+            self._last_query = turn["query"]
+            self._turns.append(turn)
+            used = sum(t["tokens"] for t in self._turns)
+            while len(self._turns) > 1 and used > self.window_tokens:
+                evicted = self._turns.pop(0)
+                used -= evicted["tokens"]
+                self._pending.append(evicted)
+            if self._pending and not self._compacting:
+                self._compacting = True
+                _compactor.submit(self._compact)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.summary = ""
+            self._turns.clear()
+            self._pending.clear()
+            self._last_query = None
+            self._generation += 1
+
+    def _compact(self) -> None:
+        finished = False
+        try:
+            while True:
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    summary = self.summary
+                    generation = self._generation
+                    if not pending:
+                        # Under the lock add_turn() checks it with, so no turn is left pending
+                        self._compacting = False
+                        finished = True
+                        return
+                with span("memory.compact", **{"memory.turns": len(pending)}):
+                    summary = self._summarize(summary, pending)
+                with self._lock:
+                    if generation == self._generation:
+                        self.summary = summary
+        finally:
+            if not finished:
+                # An error must not block compaction for the rest of the conversation
+                with self._lock:
+                    self._compacting = False
+
+    def _summarize(self, summary: str, turns: List[Dict[str, Any]]) -> str:
+        exchanges = "\n".join(f"Utilisateur : {t['question']}\nAssistant : {t['answer']}" for t in turns)
+        if self.ollama_client is not None:
+            prompt = f"""Résumé actuel :
+{summary or "(vide)"}
+
+Nouveaux échanges :
+{exchanges}
+
+Mets à jour le résumé de cette conversation en au plus {self.summary_tokens * 3 // 4} mots.
+Garde les sujets, noms, dates et horaires mentionnés. Réponds uniquement par le résumé."""
+            try:
+                response = self.ollama_client.generate(
+                    prompt=prompt, temperature=0.2, max_tokens=self.summary_tokens
+                )
+                if "error" not in response and response.get("text", "").strip():
+                    return _clip(response["text"].strip(), self.summary_tokens)
+                logger.warning(f"Conversation summary failed ({response.get('error')}), keeping questions only")
+            except Exception as e:
+                logger.warning(f"Conversation summary failed ({e}), keeping questions only")
+        # Extractive fallback: the most recent questions that fit
+        questions = " ; ".join(t["question"].strip() for t in turns)
+        combined = f"{summary} ; {questions}" if summary else f"Questions précédentes : {questions}"
+        limit = self.summary_tokens * CHARS_PER_TOKEN
+        return combined if len(combined) <= limit else "…" + combined[-limit:].lstrip()
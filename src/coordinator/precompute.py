@@ -0,0 +1,246 @@
+"""
+Background precomputation of hot answers
+
+Example questions and the most frequent recent questions are answered
+ahead of time and served from memory. Answers are tagged with the
+collection version they were computed against (see version_fn) and
+recomputed when it changes. Precomputation only runs while no live
+request is in flight, one question at a time, and a live request cuts
+the running one short through its deadline, so it never competes with
+users for Ollama.
+"""
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional
+
+from utils.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """Cache key of a question: case, spacing and final punctuation ignored"""
+    return re.sub(r"\s+", " ", question.strip().lower()).rstrip(" ?!.")
+
+
+class PrecomputeScheduler:
+    """
+    Answer hot questions in the background and serve them instantly
+
+    Args:
+        answer_fn: Answers a question like a live request would, given
+            (question, deadline)
+        version_fn: Returns a value that changes when the collections change
+        questions: Questions always kept precomputed (sidebar examples...)
+        top_n: Most frequent recent questions added to the hot set
+        min_count: Times a question must be asked to become hot
+        history: Recent questions considered for frequency
+        check_interval: Seconds between collection version checks
+        idle: Seconds without live traffic before a precompute starts
+    """
+
+    def __init__(
+        self,
+        answer_fn: Callable[[str, Deadline], Dict[str, Any]],
+        version_fn: Callable[[], Hashable],
+        questions: Iterable[str] = (),
+        top_n: int = None,
+        min_count: int = 2,
+        history: int = 500,
+        check_interval: float = None,
+        idle: float = None
+    ):
+        self.answer_fn = answer_fn
+        self.version_fn = version_fn
+        self.questions = list(questions)
+        extra = os.getenv("PRECOMPUTE_QUESTIONS", "")
+        self.questions += [q.strip() for q in extra.split("|") if q.strip()]
+        self.top_n = top_n if top_n is not None else int(os.getenv("PRECOMPUTE_TOP_N", "5"))
+        self.min_count = min_count
+        self.check_interval = check_interval or float(os.getenv("PRECOMPUTE_CHECK_S", "60"))
+        self.idle = idle if idle is not None else int(os.getenv("PRECOMPUTE_IDLE_MS", "2000")) / 1000
+
+        self._recent = deque(maxlen=history)
+        self._counts: Counter = Counter()
+        self._originals: Dict[str, str] = {}
+        self._answers: Dict[str, Dict[str, Any]] = {}
+        self._version: Optional[Hashable] = None
+
+        self._lock = threading.Lock()
+        self._live = 0
+        self._last_live = 0.0
+        self._idle_cond = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._current: Optional[Deadline] = None
+        self.timeout = int(os.getenv("PRECOMPUTE_TIMEOUT_MS", "120000")) / 1000
+
+    # Live traffic
+
+    def record(self, question: str) -> None:
+        """Count a live question towards the hot set"""
+        key = normalize_question(question)
+        with self._lock:
+            if len(self._recent) == self._recent.maxlen:
+                oldest = self._recent[0]
+                self._counts[oldest] -= 1
+                if self._counts[oldest] <= 0:
+                    del self._counts[oldest]
+            self._recent.append(key)
+            self._counts[key] += 1
+            self._originals.setdefault(key, question)
+            became_hot = self._counts[key] == self.min_count
+        if became_hot:
+            self._wakeup.set()
+
+    def get(self, question: str) -> Optional[Dict[str, Any]]:
+        """Precomputed answer for the current collection version, if any"""
+        with self._lock:
+            entry = self._answers.get(normalize_question(question))
+            if entry is None or entry["version"] != self._version:
+                return None
+            return entry["result"]
+
+    def live(self) -> "_LiveRequest":
+        """Context manager marking a live request (pauses precomputation)"""
+        return _LiveRequest(self)
+
+    def _enter_live(self) -> None:
+        with self._lock:
+            self._live += 1
+            if self._current is not None:
+                # Yield to the user: the precompute stops at its next token
+                self._current.expires_at = time.monotonic()
+
+    def _exit_live(self) -> None:
+        with self._lock:
+            self._live -= 1
+            self._last_live = time.monotonic()
+            self._idle_cond.notify_all()
+
+    # Background work
+
+    def hot_questions(self) -> List[str]:
+        """Configured questions followed by the most frequent recent ones"""
+        with self._lock:
+            frequent = [
+                self._originals[key] for key, count in self._counts.most_common(self.top_n)
+                if count >= self.min_count
+            ]
+        seen = set()
+        hot = []
+        for question in self.questions + frequent:
+            key = normalize_question(question)
+            if key not in seen:
+                seen.add(key)
+                hot.append(question)
+        return hot
+
+    def start(self) -> threading.Thread:
+        """Start the background thread (precomputes the hot set right away)"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="precompute", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+        with self._lock:
+            self._idle_cond.notify_all()
+
+    def invalidate(self) -> None:
+        """Drop every precomputed answer (e.g. after reloading data)"""
+        with self._lock:
+            self._answers.clear()
+        self._wakeup.set()
+
+    def _wait_idle(self) -> bool:
+        """Block until no live request ran for `idle` seconds; False if stopped"""
+        with self._lock:
+            while not self._stop.is_set():
+                quiet = time.monotonic() - self._last_live
+                if self._live == 0 and quiet >= self.idle:
+                    return True
+                self._idle_cond.wait(timeout=max(self.idle - quiet, 0.05))
+        return False
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                version = self.version_fn()
+            except Exception as e:
+                logger.error(f"Precompute version check failed: {e}")
+                version = None
+            if version is not None:
+                with self._lock:
+                    if version != self._version:
+                        if self._version is not None:
+                            logger.info(f"Collections changed ({self._version} -> {version}), refreshing answers")
+                        self._version = version
+                self._refresh(version)
+
+            self._wakeup.wait(timeout=self.check_interval)
+            self._wakeup.clear()
+
+    def _refresh(self, version: Hashable) -> None:
+        pending = deque(self.hot_questions())
+        interrupted = set()
+        while pending:
+            question = pending.popleft()
+            key = normalize_question(question)
+            with self._lock:
+                entry = self._answers.get(key)
+            if entry is not None and entry["version"] == version:
+                continue
+            if not self._wait_idle():
+                return
+
+            started = time.perf_counter()
+            deadline = Deadline(self.timeout)
+            with self._lock:
+                self._current = deadline
+            try:
+                result = self.answer_fn(question, deadline)
+            except Exception as e:
+                logger.error(f"Precompute failed for '{question}': {e}")
+                continue
+            finally:
+                with self._lock:
+                    self._current = None
+
+            metadata = result.get("metadata", {})
+            if "error" in metadata or metadata.get("partial"):
+                # Usually cut short by live traffic: retry once, when idle again
+                if key not in interrupted:
+                    interrupted.add(key)
+                    pending.append(question)
+                logger.warning(f"Precompute of '{question}' did not complete, not cached")
+                continue
+            with self._lock:
+                self._answers[key] = {"version": version, "result": result, "computed_at": time.time()}
+            logger.info(f"Precomputed '{question}' in {time.perf_counter() - started:.1f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        hot = len(self.hot_questions())
+        with self._lock:
+            fresh = sum(1 for entry in self._answers.values() if entry["version"] == self._version)
+            return {"answers": fresh, "hot": hot, "version": self._version}
+
+
+class _LiveRequest:
+    def __init__(self, scheduler: PrecomputeScheduler):
+        self.scheduler = scheduler
+
+    def __enter__(self):
+        self.scheduler._enter_live()
+        return self
+
+    def __exit__(self, *exc):
+        self.scheduler._exit_live()
+        return False
@@ -0,0 +1,132 @@
+"""
+Agents built from config/agents.json, on first use
+
+Startup only reads the agent declarations: an agent (and its structured
+index, for events) is built the first time a question is routed to it,
+and its collection is loaded by its first search through
+LazyCollections, which unloads the least recently used collections past
+COLLECTION_MEMORY_MB. Startup cost therefore stays flat as events are
+added to the config.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from agents import BaseAgent, CombinedAgent, ConfiguredAgent, DevFestAgent, KimanaAgent
+from vectorstore import LazyCollections
+
+from .agent_config import load_agent_config
+
+logger = logging.getLogger(__name__)
+
+# Combined agents kept for recently asked combinations of agents
+MAX_COMBINATIONS = 32
+
+
+class AgentRegistry:
+    """
+    Agent entries, agents built on demand and their lazily loaded collections
+
+    Args:
+        agents: Entries from load_agent_config()
+        ollama_client: Client shared by the agents
+        chroma_manager: Vector store the collections are loaded into
+        data_root: Directory the entries' data_dir are relative to
+        memory_budget: Bytes of loaded collections (default: COLLECTION_MEMORY_MB)
+    """
+
+    def __init__(
+        self,
+        agents: List[Dict[str, Any]],
+        ollama_client,
+        chroma_manager,
+        data_root: Path,
+        memory_budget: Optional[int] = None
+    ):
+        self.entries = {agent["id"]: agent for agent in agents}
+        self.ollama_client = ollama_client
+        self.data_root = Path(data_root)
+        self.collections = LazyCollections(
+            chroma_manager,
+            {agent["collection"]: str(self.data_root / agent["data_dir"]) for agent in agents},
+            memory_budget
+        )
+        self._agents: Dict[str, BaseAgent] = {}
+        self._combined: "OrderedDict[Tuple[str, ...], CombinedAgent]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, ollama_client, chroma_manager, data_root: Path, path: Optional[str] = None) -> "AgentRegistry":
+        """Registry of AGENTS_CONFIG (see coordinator.agent_config)"""
+        return cls(load_agent_config(path), ollama_client, chroma_manager, data_root)
+
+    @property
+    def ids(self) -> List[str]:
+        return list(self.entries)
+
+    def get(self, agent_id: str) -> BaseAgent:
+        """The agent of an id, built on first use"""
+        agent = self._agents.get(agent_id)
+        if agent is not None:
+            return agent
+        with self._lock:
+            if agent_id not in self._agents:
+                self._agents[agent_id] = self._build(self.entries[agent_id])
+            return self._agents[agent_id]
+
+    def combined(self, agent_ids: List[str]) -> CombinedAgent:
+        """One agent answering from the collections of several agents"""
+        key = tuple(agent_ids)
+        with self._lock:
+            agent = self._combined.get(key)
+            if agent is not None:
+                self._combined.move_to_end(key)
+                return agent
+        agent = CombinedAgent([self.get(agent_id) for agent_id in agent_ids], self.ollama_client, self.collections)
+        with self._lock:
+            self._combined[key] = agent
+            while len(self._combined) > MAX_COMBINATIONS:
+                self._combined.popitem(last=False)
+        return agent
+
+    def preload(self) -> None:
+        """Build every agent and load every collection now (LAZY_AGENTS=false)"""
+        for agent_id in self.entries:
+            self.get(agent_id)
+        self.collections.preload()
+
+    def _build(self, entry: Dict[str, Any]) -> BaseAgent:
+        logger.info(f"Building agent '{entry['id']}' ({entry['type']}, collection '{entry['collection']}')")
+        common = {
+            "name": entry["name"],
+            "collection_name": entry["collection"],
+            "system_prompt": entry.get("system_prompt"),
+        }
+        if entry["type"] == "event":
+            data_dir = str(self.data_root / entry["data_dir"])
+            agent = DevFestAgent(self.ollama_client, self.collections, data_dir=data_dir, **common)
+        elif entry["type"] == "profile":
+            agent = KimanaAgent(self.ollama_client, self.collections, **common)
+        else:
+            agent = ConfiguredAgent(
+                ollama_client=self.ollama_client,
+                chroma_manager=self.collections,
+                description=entry.get("description", ""),
+                **common
+            )
+        if entry.get("description"):
+            agent.description = entry["description"]
+        return agent
+
+    def label(self, agent_id: str) -> str:
+        entry = self.entries.get(agent_id)
+        return entry.get("label", entry["name"]) if entry else "🤝 Agents Combinés"
+
+    def examples(self) -> Dict[str, List[str]]:
+        """Example questions per agent label"""
+        return {
+            self.label(agent_id): entry["examples"]
+            for agent_id, entry in self.entries.items() if entry.get("examples")
+        }
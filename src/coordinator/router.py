@@ -2,42 +2,73 @@
 Intelligent Router for multi-agent system
 """
 import logging
-from typing import Literal
+import os
+from typing import Dict, Any, List, Optional
+
+from utils.tracing import span
+
+from .agent_config import load_agent_config
 
 logger = logging.getLogger(__name__)
 
 
-AgentType = Literal["devfest", "kimana", "both"]
+# An agent id from config/agents.json, or "both" when several agents tie
+AgentType = str
+
+# Agents consulted at most for one ambiguous question
+MAX_CANDIDATES = int(os.getenv("ROUTER_MAX_AGENTS", "3"))
 
 
 class Router:
-    """Route questions to the appropriate agent"""
+    """
+    Route questions to the appropriate agent
     
-    # Keywords for routing
-    DEVFEST_KEYWORDS = [
-        'devfest', 'event', 'événement', 'agenda', 'programme', 'schedule',
-        'heure', 'quand', 'when', 'time', 'horaire',
-        'talk', 'présentation', 'speaker', 'intervenant',
-        'palm club', 'lieu', 'place', 'où', 'where',
-        'sponsor', 'partenaire',
-        'hackathon', 'quiz', 'activité', 'pause',
-        'gdg', 'google', 'cloud abidjan'
-    ]
+    Args:
+        agents: Agent entries with their keywords and filter rules
+            (default: load_agent_config())
+        max_candidates: Agents consulted at most when the question is ambiguous
+    """
     
-    KIMANA_KEYWORDS = [
-        'kimana', 'misago',
-        'ivoire.pro', 'ivoire pro', 'ivoirepro',
-        'marabu', 'cabinet marabu',
-        'ivoryguards', 'ivory guards',
-        'cto', 'devops', 'kubernetes',
-        'qui est', 'who is', 'profil', 'profile',
-        'co-founder', 'fondateur',
-        'guce', 'eranove',
-        'certification', 'kcna', 'google cloud certified'
-    ]
+    def __init__(self, agents: Optional[List[Dict[str, Any]]] = None, max_candidates: int = None):
+        agents = agents if agents is not None else load_agent_config()
+        self.agent_ids = [agent["id"] for agent in agents]
+        # Keywords for routing, per agent id
+        self.keywords = {agent["id"]: [kw.lower() for kw in agent.get("keywords", [])] for agent in agents}
+        # Metadata filters inferred from the question, per agent.
+        # Each rule is (keywords, where clause); matching clauses are OR-ed.
+        self.filter_rules = {
+            agent["id"]: [(rule["keywords"], rule["where"]) for rule in agent.get("filters", [])]
+            for agent in agents
+        }
+        self.descriptions = {agent["id"]: agent.get("description", agent["name"]) for agent in agents}
+        self.max_candidates = max_candidates or MAX_CANDIDATES
+        logger.info(f"Router initialized ({len(self.agent_ids)} agents)")
+    
+    def candidates(self, question: str) -> List[str]:
+        """
+        Agents best matching a question
+        
+        The agent with the most keyword matches, or every agent tied for
+        the most (all of them when nothing matches), in config order and
+        at most max_candidates.
+        """
+        with span("router.route") as s:
+            scores = self.scores(question)
+            best = max(scores.values(), default=0)
+            top = [agent_id for agent_id, score in scores.items() if score == best][:self.max_candidates]
+            
+            logger.info(f"Routing scores - {', '.join(f'{a}: {n}' for a, n in scores.items())} -> {top}")
+            s.set_attributes(route=top[0] if len(top) == 1 else "both", candidates=top)
+            s.set_attributes(**{f"score.{agent_id}": score for agent_id, score in scores.items()})
+            return top
     
-    def __init__(self):
-        logger.info("Router initialized")
+    def scores(self, question: str) -> Dict[str, int]:
+        """Keyword matches of a question, per agent id"""
+        q_lower = question.lower()
+        return {
+            agent_id: sum(1 for kw in keywords if kw in q_lower)
+            for agent_id, keywords in self.keywords.items()
+        }
     
     def route(self, question: str) -> AgentType:
         """
@@ -47,33 +78,39 @@ class Router:
             question: User question
             
         Returns:
-            Agent type: 'devfest', 'kimana', or 'both'
+            Agent id, or 'both' when several agents tie (see candidates())
         """
-        q_lower = question.lower()
-        
-        # Count keyword matches
-        devfest_score = sum(1 for kw in self.DEVFEST_KEYWORDS if kw in q_lower)
-        kimana_score = sum(1 for kw in self.KIMANA_KEYWORDS if kw in q_lower)
-        
-        logger.info(f"Routing scores - DevFest: {devfest_score}, Kimana: {kimana_score}")
+        top = self.candidates(question)
+        # Ambiguous or general question - try several agents
+        return top[0] if len(top) == 1 else "both"
+    
+    def infer_filter(self, question: str, route: AgentType) -> Optional[Dict[str, Any]]:
+        """
+        Infer a metadata filter for the routed agent's collection
         
-        # Decision logic
-        if devfest_score > kimana_score:
-            logger.info("Routed to: DevFest Agent")
-            return "devfest"
-        elif kimana_score > devfest_score:
-            logger.info("Routed to: Kimana Agent")
-            return "kimana"
-        else:
-            # Ambiguous or general question - try both
-            logger.info("Routed to: Both Agents")
-            return "both"
+        Args:
+            question: User question
+            route: Routing decision for the question
+            
+        Returns:
+            ChromaDB-style `where` dict, or None when no rule matches
+            (and always for 'both', whose collections differ)
+        """
+        q_lower = question.lower()
+        clauses: List[Dict[str, Any]] = [
+            where for keywords, where in self.filter_rules.get(route, [])
+            if any(kw in q_lower for kw in keywords)
+        ]
+        if not clauses:
+            return None
+        where = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+        logger.info(f"Inferred filter for {route}: {where}")
+        return where
     
     def get_routing_explanation(self, question: str, route: AgentType) -> str:
         """Get human-readable explanation of routing decision"""
-        explanations = {
-            "devfest": "Question dirigée vers l'agent DevFest (informations sur l'événement)",
-            "kimana": "Question dirigée vers l'agent Kimana (profil professionnel)",
-            "both": "Question ambiguë - consultation des deux agents"
-        }
-        return explanations.get(route, "Routing inconnu")
+        if route == "both":
+            return "Question ambiguë - consultation de plusieurs agents"
+        if route in self.descriptions:
+            return f"Question dirigée vers l'agent {route} ({self.descriptions[route]})"
+        return "Routing inconnu"
@@ -0,0 +1,16 @@
+from .cache import CachedEmbedder, EmbeddingCache, cached_embedder
+from .client import HttpEmbedder, RemoteEmbedder, load_embedder
+from .server import EmbeddingServer
+from .service import DynamicBatcher, EmbeddingService
+
+__all__ = [
+    "CachedEmbedder",
+    "EmbeddingCache",
+    "cached_embedder",
+    "HttpEmbedder",
+    "RemoteEmbedder",
+    "EmbeddingServer",
+    "EmbeddingService",
+    "DynamicBatcher",
+    "load_embedder",
+]
@@ -0,0 +1,234 @@
+"""
+Persistent document-embedding cache
+
+Vectors are keyed by a hash of (model name, chunk text) and stored as
+raw float32 bytes in one SQLite file, so a reindex only encodes the
+chunks whose text changed. The file can be kept between image builds
+or copied/mounted into pods (EMBEDDING_CACHE_DIR); SQLite locking makes
+it safe to share between processes on one node. When it grows past
+EMBEDDING_CACHE_MAX_MB, the least recently used vectors are evicted.
+"""
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def cache_key(model_name: str, text: str) -> bytes:
+    """16-byte key of a chunk for a given model"""
+    return hashlib.blake2b(f"{model_name}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """
+    Vectors by (model, text hash) in a SQLite file
+
+    Args:
+        path: Directory holding embeddings.sqlite
+        max_bytes: Vector bytes kept before evicting the least recently used
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evicted": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path / "embeddings.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " key BLOB PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS vectors_last_used ON vectors (last_used)")
+        self._conn.commit()
+        # Running estimate of the vector bytes, recounted only when it reaches max_bytes
+        self._approx_bytes = self._stored_bytes()
+
+    @classmethod
+    def from_env(cls) -> Optional["EmbeddingCache"]:
+        """Cache in EMBEDDING_CACHE_DIR, or None when it is unset or empty"""
+        path = os.getenv("EMBEDDING_CACHE_DIR", "")
+        if not path:
+            return None
+        max_mb = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+        return cls(path, int(max_mb * 1024 * 1024))
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """Cached vectors of the keys found (bulk lookup)"""
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start:start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM vectors WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype="<f4")
+            if found:
+                # Recency drives eviction
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE vectors SET last_used = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+
+    def put_many(self, model_name: str, keys: List[bytes], vectors: np.ndarray) -> None:
+        """Store vectors, then evict down to max_bytes if needed"""
+        vectors = np.asarray(vectors, dtype="<f4")
+        now = time.time()
+        rows = [
+            (key, model_name, vectors.shape[1], vector.tobytes(), now)
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO vectors VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+            self._approx_bytes += sum(len(row[3]) for row in rows)
+            if self._approx_bytes > self.max_bytes:
+                self._evict()
+
+    def record(self, hits: int, misses: int) -> None:
+        """Count lookups (encode() may run from several threads)"""
+        with self._lock:
+            self.stats["hits"] += hits
+            self.stats["misses"] += misses
+
+    def _stored_bytes(self) -> int:
+        return self._conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM vectors").fetchone()[0]
+
+    def _evict(self) -> None:
+        # Other processes may have written or evicted too: recount
+        size = self._approx_bytes = self._stored_bytes()
+        if size <= self.max_bytes:
+            return
+        excess = size - self.max_bytes
+        # Oldest first, until enough bytes are freed
+        rows = self._conn.execute("SELECT key, LENGTH(vector) FROM vectors ORDER BY last_used").fetchall()
+        doomed = []
+        for key, length in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= length
+        self._conn.executemany("DELETE FROM vectors WHERE key = ?", doomed)
+        self._conn.commit()
+        # excess is now <= 0: the bytes left under the limit
+        self._approx_bytes = self.max_bytes + excess
+        self.stats["evicted"] += len(doomed)
+        logger.info(f"Embedding cache over {self.max_bytes / 1024 / 1024:.1f} MB, evicted {len(doomed)} vectors")
+
+    def size(self) -> Dict[str, float]:
+        with self._lock:
+            count, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(vector)), 0) FROM vectors"
+            ).fetchone()
+        return {"entries": count, "size_mb": size / 1024 / 1024}
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            hits, misses = self.stats["hits"], self.stats["misses"]
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def report(self) -> Dict[str, float]:
+        """Hit/miss counters of this process and the current cache size"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats["hits"] + stats["misses"]
+        return {**stats, "hit_rate": stats["hits"] / lookups if lookups else 0.0, **self.size()}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbedder:
+    """
+    encode() that only sends cache misses to the wrapped embedder
+
+    Meant for document embedding: queries are not worth storing and
+    keep using the embedder directly.
+
+    Args:
+        embedder: SentenceTransformer or one of the remote embedders
+        model_name: Part of the cache key (vectors differ per model)
+        cache: Shared EmbeddingCache
+    """
+
+    def __init__(self, embedder, model_name: str, cache: EmbeddingCache):
+        self.embedder = embedder
+        self.model_name = model_name
+        self.cache = cache
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        keys = [cache_key(self.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        # Duplicate chunks are encoded once
+        missing_keys = list(dict.fromkeys(keys[i] for i in missing))
+        self.cache.record(len(texts) - len(missing), len(missing))
+        if missing_keys:
+            first = {}
+            for i in missing:
+                first.setdefault(keys[i], texts[i])
+            encoded = np.asarray(
+                self.embedder.encode(
+                    [first[key] for key in missing_keys], batch_size=batch_size, show_progress_bar=show_progress_bar
+                ),
+                dtype=np.float32
+            )
+            self.cache.put_many(self.model_name, missing_keys, encoded)
+            cached.update(zip(missing_keys, encoded))
+
+        if not texts:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+        vectors = np.stack([cached[key] for key in keys]).astype(np.float32, copy=False)
+        return vectors[0] if single else vectors
+
+    def __getattr__(self, name):
+        return getattr(self.embedder, name)
+
+
+def cached_embedder(embedder, model_name: str):
+    """Wrap an embedder with the EMBEDDING_CACHE_DIR cache (unchanged if disabled)"""
+    try:
+        cache = EmbeddingCache.from_env()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Embedding cache unavailable, encoding every chunk: {e}")
+        return embedder
+    if cache is None:
+        return embedder
+    logger.info(f"Using embedding cache at {cache.path} ({cache.size()['entries']} vectors)")
+    return CachedEmbedder(embedder, model_name, cache)
+
+
+def log_cache_report(embedder) -> None:
+    """Log the hit rate of a cached_embedder() (no-op for a bare embedder)"""
+    if not isinstance(embedder, CachedEmbedder):
+        return
+    report = embedder.cache.report()
+    logger.info(
+        f"Embedding cache: {report['hits']} hits / {report['misses']} misses "
+        f"({report['hit_rate']:.0%}), {report['entries']} vectors, {report['size_mb']:.1f} MB"
+    )
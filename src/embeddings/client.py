@@ -0,0 +1,186 @@
+"""
+Clients of the embedding server and service, and embedder selection
+"""
+import logging
+import os
+import threading
+import time
+from multiprocessing.connection import Client
+from typing import List, Optional
+
+import numpy as np
+import requests
+
+from utils.tracing import span
+
+from .wire import unpack_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class RemoteEmbedder:
+    """
+    Drop-in for SentenceTransformer.encode() backed by an EmbeddingServer
+
+    Each thread keeps its own connection; a dropped connection is
+    re-opened once before the error is raised.
+    """
+
+    def __init__(self, address: str, authkey: Optional[bytes] = None):
+        self.address = address
+        self.authkey = authkey
+        self._local = threading.local()
+        self._dimension = None
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = Client(self.address, family="AF_UNIX", authkey=self.authkey)
+            self._local.conn = conn
+        return conn
+
+    def _call(self, request):
+        for attempt in range(2):
+            try:
+                conn = self._connection()
+                conn.send(request)
+                status, payload = conn.recv()
+                break
+            except (EOFError, OSError):
+                self._local.conn = None
+                if attempt:
+                    raise
+        if status != "ok":
+            raise RuntimeError(f"Embedding server error: {payload}")
+        return payload
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+        vectors = self._call(("encode", texts, batch_size))
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            self._dimension = self._call(("dimension",))
+        return self._dimension
+
+
+class HttpEmbedder:
+    """
+    Drop-in for SentenceTransformer.encode() backed by the HTTP embedding service
+
+    When the service cannot be reached and a fallback model name is set,
+    the model is loaded locally (once) and used until `retry_after`
+    seconds have passed, then the service is tried again.
+
+    Args:
+        url: Service base URL (e.g. http://embedding-service:8080)
+        fallback_model: Model loaded locally if the service is down (None: no fallback)
+        timeout: Request timeout in seconds
+        dtype: Wire format, float16 or float32
+        retry_after: Seconds on the local model before retrying the service
+    """
+
+    def __init__(
+        self,
+        url: str,
+        fallback_model: Optional[str] = None,
+        timeout: float = 10.0,
+        dtype: str = "float16",
+        retry_after: float = 30.0
+    ):
+        self.url = url.rstrip("/")
+        self.fallback_model = fallback_model
+        self.timeout = timeout
+        self.dtype = dtype
+        self.retry_after = retry_after
+        self._session = requests.Session()
+        self._local_model = None
+        self._local_lock = threading.Lock()
+        self._down_until = 0.0
+        self._dimension = None
+
+    def _local(self):
+        with self._local_lock:
+            if self._local_model is None:
+                from sentence_transformers import SentenceTransformer
+                logger.info(f"Loading local fallback embedding model: {self.fallback_model}")
+                self._local_model = SentenceTransformer(self.fallback_model)
+            return self._local_model
+
+    def _fallback(self, error: Exception):
+        if not self.fallback_model:
+            raise error
+        if time.monotonic() >= self._down_until:
+            logger.warning(f"Embedding service {self.url} unavailable ({error}), using local model")
+        self._down_until = time.monotonic() + self.retry_after
+        try:
+            return self._local()
+        except ImportError:
+            logger.error("sentence-transformers is not installed, no local fallback")
+            raise error
+
+    def encode(self, sentences, batch_size: int = 32, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts: List[str] = [sentences] if single else list(sentences)
+
+        with span("embedding.encode", **{"embedding.texts": len(texts), "server.address": self.url}) as s:
+            if time.monotonic() < self._down_until:
+                s.set_attribute("embedding.local", True)
+                vectors = self._local().encode(texts, batch_size=batch_size, show_progress_bar=False)
+            else:
+                try:
+                    response = self._session.post(
+                        f"{self.url}/encode",
+                        json={"texts": texts, "dtype": self.dtype},
+                        timeout=self.timeout
+                    )
+                    response.raise_for_status()
+                    vectors = unpack_vectors(response.content)
+                except requests.RequestException as e:
+                    s.set_attributes(**{"embedding.local": True, "embedding.service_error": str(e)})
+                    vectors = self._fallback(e).encode(texts, batch_size=batch_size, show_progress_bar=False)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        return vectors[0] if single else vectors
+
+    def get_sentence_embedding_dimension(self) -> int:
+        if self._dimension is None:
+            try:
+                response = self._session.get(f"{self.url}/health", timeout=self.timeout)
+                response.raise_for_status()
+                self._dimension = response.json()["dimension"]
+            except requests.RequestException as e:
+                self._dimension = self._fallback(e).get_sentence_embedding_dimension()
+        return self._dimension
+
+
+def load_embedder(model_name: str, service_url: Optional[str] = None):
+    """
+    Embedding model for this process
+
+    With EMBEDDING_SERVICE_URL (or service_url) set, texts are encoded by
+    the HTTP embedding service, falling back to a local model unless
+    EMBEDDING_FALLBACK=false. With EMBEDDING_SOCKET set, queries go to the
+    shared embedding server on this node. Otherwise SentenceTransformer.
+    """
+    service_url = service_url or os.getenv("EMBEDDING_SERVICE_URL")
+    if service_url:
+        fallback = os.getenv("EMBEDDING_FALLBACK", "true").lower() == "true"
+        logger.info(f"Using embedding service at {service_url} (local fallback: {fallback})")
+        return HttpEmbedder(
+            service_url,
+            fallback_model=model_name if fallback else None,
+            timeout=float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "10")),
+            dtype=os.getenv("EMBEDDING_WIRE_DTYPE", "float16")
+        )
+
+    address = os.getenv("EMBEDDING_SOCKET")
+    if address:
+        authkey = os.getenv("EMBEDDING_AUTHKEY")
+        logger.info(f"Using shared embedding server at {address}")
+        return RemoteEmbedder(address, authkey.encode() if authkey else None)
+
+    from sentence_transformers import SentenceTransformer
+    logger.info(f"Loading embedding model: {model_name}")
+    return SentenceTransformer(model_name)
@@ -0,0 +1,79 @@
+"""
+Embedding server: one SentenceTransformer shared by local processes
+
+Listens on a Unix socket (multiprocessing.connection) and answers
+("encode", texts, batch_size) with a float32 array, so worker processes
+embed queries without loading the model themselves.
+"""
+import logging
+import os
+import threading
+from multiprocessing.connection import Listener
+from typing import Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingServer:
+    """Serve a model's encode() to RemoteEmbedder clients"""
+
+    def __init__(self, model, address: str, authkey: Optional[bytes] = None):
+        self.model = model
+        self.address = address
+        self.authkey = authkey
+        self.dimension = model.get_sentence_embedding_dimension()
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def serve_forever(self) -> None:
+        if os.path.exists(self.address):
+            os.unlink(self.address)
+        self._listener = Listener(self.address, family="AF_UNIX", authkey=self.authkey)
+        logger.info(f"Embedding server listening on {self.address} (dim={self.dimension})")
+        try:
+            while True:
+                try:
+                    conn = self._listener.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self.close()
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name="embedding-server", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.close()
+            self._listener = None
+
+    def _handle(self, conn) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(self._dispatch(request))
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {e}")
+                    conn.send(("error", str(e)))
+
+    def _dispatch(self, request):
+        command = request[0]
+        if command == "dimension":
+            return ("ok", self.dimension)
+        if command == "encode":
+            _, texts, batch_size = request
+            # One model, many connections: encode calls are serialized
+            with self._lock:
+                vectors = self.model.encode(texts, batch_size=batch_size, show_progress_bar=False)
+            return ("ok", np.asarray(vectors, dtype=np.float32))
+        raise ValueError(f"Unknown command: {command}")
@@ -0,0 +1,219 @@
+"""
+HTTP embedding service with dynamic batching
+
+Owns the SentenceTransformer so coordinator pods do not load it. Each
+POST /encode is queued; a single batcher thread groups whatever arrived
+within EMBEDDING_BATCH_WAIT_MS (up to EMBEDDING_BATCH_SIZE texts) into
+one encode() call and splits the result back per request. Vectors are
+returned in the binary format of embeddings.wire.
+
+Endpoints:
+    POST /encode   {"texts": [...], "dtype": "float16"} -> vectors
+    GET  /health   model, dimension and batching counters (JSON)
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Dict, Any
+
+import numpy as np
+
+from .wire import CONTENT_TYPE, WIRE_DTYPES, pack_vectors
+
+logger = logging.getLogger(__name__)
+
+
+class DynamicBatcher:
+    """
+    Group concurrent encode requests into shared model calls
+
+    Args:
+        model: Object with encode(texts, batch_size=...) (SentenceTransformer)
+        max_batch_size: Texts per model call
+        max_wait_ms: How long the first request of a batch waits for others
+    """
+
+    def __init__(self, model, max_batch_size: int = None, max_wait_ms: float = None):
+        self.model = model
+        self.max_batch_size = max_batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+        wait_ms = max_wait_ms if max_wait_ms is not None else float(os.getenv("EMBEDDING_BATCH_WAIT_MS", "5"))
+        self.max_wait = wait_ms / 1000
+        self.stats = {"requests": 0, "texts": 0, "batches": 0, "encode_s": 0.0}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="embedding-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future: Future = Future()
+        if not texts:
+            future.set_result(np.zeros((0, self.model.get_sentence_embedding_dimension()), dtype=np.float32))
+            return future
+        self._queue.put((texts, future))
+        return future
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def _collect(self, first) -> List:
+        pending = [first]
+        size = len(first[0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                # Stop after this batch
+                self._queue.put(None)
+                break
+            pending.append(item)
+            size += len(item[0])
+        return pending
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            pending = self._collect(first)
+            texts = [text for item_texts, _ in pending for text in item_texts]
+
+            started = time.perf_counter()
+            try:
+                vectors = np.asarray(
+                    self.model.encode(texts, batch_size=self.max_batch_size, show_progress_bar=False),
+                    dtype=np.float32
+                )
+            except Exception as e:
+                logger.error(f"Batch of {len(texts)} texts failed: {e}")
+                for _, future in pending:
+                    future.set_exception(e)
+                continue
+            self.stats["requests"] += len(pending)
+            self.stats["texts"] += len(texts)
+            self.stats["batches"] += 1
+            self.stats["encode_s"] += time.perf_counter() - started
+
+            offset = 0
+            for item_texts, future in pending:
+                future.set_result(vectors[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    service: "EmbeddingService" = None
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, self.service.health())
+        else:
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/encode":
+            self._send_json(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            texts = request["texts"]
+            if not isinstance(texts, list) or not all(isinstance(t, str) for t in texts):
+                raise ValueError("'texts' must be a list of strings")
+            dtype = request.get("dtype", "float32")
+            if not isinstance(dtype, str) or dtype not in WIRE_DTYPES:
+                raise ValueError(f"Unsupported wire dtype: {dtype}")
+            body = pack_vectors(self.service.batcher.encode(texts), dtype)
+        except (KeyError, ValueError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Encode request failed: {e}")
+            self._send_json(500, {"error": str(e)})
+            return
+        self._send(200, body, CONTENT_TYPE)
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+class EmbeddingService:
+    """
+    HTTP front of a DynamicBatcher
+
+    Args:
+        model: SentenceTransformer (or compatible) owned by the service
+        model_name: Reported by /health
+        host: Bind address
+        port: Bind port (default: EMBEDDING_SERVICE_PORT)
+    """
+
+    def __init__(self, model, model_name: str, host: str = "0.0.0.0", port: int = None, **batch_options):
+        self.model_name = model_name
+        self.dimension = model.get_sentence_embedding_dimension()
+        self.batcher = DynamicBatcher(model, **batch_options)
+        handler = type("EmbeddingHandler", (_Handler,), {"service": self})
+        port = port if port is not None else int(os.getenv("EMBEDDING_SERVICE_PORT", "8080"))
+        self.server = ThreadingHTTPServer((host, port), handler)
+        self.server.daemon_threads = True
+        self._serving = threading.Event()
+
+    @property
+    def address(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def health(self) -> Dict[str, Any]:
+        stats = dict(self.batcher.stats)
+        batches = stats["batches"]
+        stats["mean_batch_size"] = stats["texts"] / batches if batches else 0.0
+        return {"status": "ok", "model": self.model_name, "dimension": self.dimension, **stats}
+
+    def serve_forever(self) -> None:
+        logger.info(
+            f"Embedding service listening on {self.address} "
+            f"(model={self.model_name}, dim={self.dimension}, batch={self.batcher.max_batch_size}, "
+            f"wait={self.batcher.max_wait * 1000:.0f} ms)"
+        )
+        self._serving.set()
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            self.batcher.close()
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread"""
+        thread = threading.Thread(target=self.serve_forever, name="embedding-service", daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        """Stop a service running in another thread"""
+        if self._serving.is_set():
+            self.server.shutdown()
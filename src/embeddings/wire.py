@@ -0,0 +1,44 @@
+"""
+Binary vector format of the embedding service
+
+A response is a 16-byte header followed by the row-major vectors,
+little-endian:
+    magic "EMBV" | dtype code (uint8) | 3 pad bytes | rows (uint32) | dim (uint32)
+float16 halves the payload of float32; clients always get float32 back.
+"""
+import struct
+
+import numpy as np
+
+MAGIC = b"EMBV"
+CONTENT_TYPE = "application/x-embedding-vectors"
+
+_HEADER = struct.Struct("<4sB3xII")
+_DTYPES = {0: np.dtype("<f4"), 1: np.dtype("<f2")}
+_CODES = {"float32": 0, "float16": 1}
+WIRE_DTYPES = tuple(_CODES)
+
+
+def pack_vectors(vectors: np.ndarray, dtype: str = "float32") -> bytes:
+    """Serialize a (rows, dim) array"""
+    if dtype not in _CODES:
+        raise ValueError(f"Unsupported wire dtype: {dtype}")
+    code = _CODES[dtype]
+    array = np.ascontiguousarray(np.atleast_2d(vectors), dtype=_DTYPES[code])
+    rows, dim = array.shape
+    return _HEADER.pack(MAGIC, code, rows, dim) + array.tobytes()
+
+
+def unpack_vectors(payload: bytes) -> np.ndarray:
+    """Deserialize to a float32 (rows, dim) array"""
+    if len(payload) < _HEADER.size:
+        raise ValueError("Truncated vector payload")
+    magic, code, rows, dim = _HEADER.unpack_from(payload)
+    if magic != MAGIC or code not in _DTYPES:
+        raise ValueError("Not an embedding vector payload")
+    dtype = _DTYPES[code]
+    expected = _HEADER.size + rows * dim * dtype.itemsize
+    if len(payload) != expected:
+        raise ValueError(f"Vector payload is {len(payload)} bytes, expected {expected}")
+    array = np.frombuffer(payload, dtype=dtype, offset=_HEADER.size).reshape(rows, dim)
+    return array.astype(np.float32)
@@ -1,3 +1,5 @@
+from .deadline import Deadline
 from .ollama_client import OllamaClient
+from .tokens import estimate_tokens
 
-__all__ = ["OllamaClient"]
+__all__ = ["Deadline", "OllamaClient", "estimate_tokens"]
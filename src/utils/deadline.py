@@ -0,0 +1,45 @@
+"""
+Request deadlines shared by every stage of an answer
+
+The coordinator creates one Deadline per question and passes it down to
+retrieval and generation; each stage asks how much time is left (or
+takes a share of it) instead of using its own fixed timeout.
+"""
+import os
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    Point in time by which a request must be answered
+
+    Args:
+        seconds: Time allowed from now
+        parent: Deadline this one may not outlive
+    """
+
+    def __init__(self, seconds: float, parent: Optional["Deadline"] = None):
+        self.expires_at = time.monotonic() + max(0.0, seconds)
+        if parent is not None:
+            self.expires_at = min(self.expires_at, parent.expires_at)
+
+    @classmethod
+    def from_env(cls) -> Optional["Deadline"]:
+        """Deadline of REQUEST_DEADLINE_MS from now, or None if set to 0"""
+        ms = int(os.getenv("REQUEST_DEADLINE_MS", "30000"))
+        return cls(ms / 1000) if ms > 0 else None
+
+    def remaining(self) -> float:
+        """Seconds left, never negative"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def share(self, fraction: float) -> "Deadline":
+        """Sub-deadline for one stage: `fraction` of the time left"""
+        return Deadline(self.remaining() * fraction, parent=self)
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining() * 1000:.0f} ms)"
@@ -2,12 +2,22 @@
 Ollama Client for LLM interactions
 """
 import os
+import json
 import requests
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, List, Tuple
 import logging
 
+from .deadline import Deadline
+from .tokens import estimate_tokens
+from .tracing import current_span, span
+
 logger = logging.getLogger(__name__)
 
+# Smallest num_predict worth sending when the deadline is close
+MIN_PREDICT_TOKENS = 16
+# Weight of the latest response in the speed estimates
+SPEED_SMOOTHING = 0.3
+
 
 class OllamaClient:
     """Client to interact with Ollama API"""
@@ -21,6 +31,11 @@ class OllamaClient:
         self.model = model or os.getenv("OLLAMA_MODEL", "gemma3:270m")
         self.api_url = f"{self.host}/api/chat"  # Changed for v0.13+
         
+        # Generation speed estimates, refined from each response's timings;
+        # used to fit num_predict into a request deadline
+        self.tokens_per_second = float(os.getenv("OLLAMA_TOKENS_PER_SECOND", "20"))
+        self.first_token_s = int(os.getenv("OLLAMA_FIRST_TOKEN_MS", "1000")) / 1000
+        
         logger.info(f"OllamaClient initialized with host={self.host}, model={self.model}")
     
     def generate(
@@ -28,7 +43,10 @@ class OllamaClient:
         prompt: str,
         system: Optional[str] = None,
         temperature: float = 0.7,
-        max_tokens: int = 500
+        max_tokens: int = 500,
+        on_token: Optional[Callable[[str], None]] = None,
+        deadline: Optional[Deadline] = None,
+        stop: Optional[List[str]] = None
     ) -> Dict[str, Any]:
         """
         Generate text from Ollama
@@ -38,10 +56,56 @@ class OllamaClient:
             system: System message
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            on_token: Optional callback receiving each streamed text piece.
+                When set, the request is sent with stream=True.
+            deadline: Optional request deadline. The response is streamed,
+                num_predict is capped to what fits in the time left, and
+                the text streamed when the deadline passes is returned
+                with partial=True.
+            stop: Optional stop sequences ending the generation early
             
         Returns:
-            Dict with response and metadata
+            Dict with response and metadata; done_reason is "length" when
+            max_tokens cut the answer
         """
+        with span(
+            "llm.generate",
+            **{
+                "gen_ai.system": "ollama",
+                "gen_ai.request.model": self.model,
+                "gen_ai.request.max_tokens": max_tokens,
+                "gen_ai.request.temperature": temperature,
+                "gen_ai.usage.input_tokens": estimate_tokens(prompt) + estimate_tokens(system or ""),
+                "server.address": self.host,
+                "llm.stream": on_token is not None or deadline is not None,
+            }
+        ) as s:
+            result = self._generate(prompt, system, temperature, max_tokens, on_token, deadline, stop)
+            s.set_attributes(**{
+                "gen_ai.usage.output_tokens": result.get("tokens"),
+                "gen_ai.response.finish_reasons": [result["done_reason"]] if result.get("done_reason") else None,
+                "llm.partial": result.get("partial", False),
+            })
+            if result.get("error"):
+                s.set_error(result["error"])
+            return result
+    
+    def _generate(
+        self,
+        prompt: str,
+        system: Optional[str],
+        temperature: float,
+        max_tokens: int,
+        on_token: Optional[Callable[[str], None]],
+        deadline: Optional[Deadline],
+        stop: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        if deadline is not None:
+            if deadline.expired():
+                logger.warning("Deadline passed before generation")
+                return {"text": "", "model": self.model, "tokens": 0, "partial": True, "error": "deadline"}
+            max_tokens = self._fit_tokens(max_tokens, deadline.remaining())
+            on_token = on_token or (lambda piece: None)
         try:
             # Build messages for chat API
             messages = []
@@ -52,33 +116,52 @@ class OllamaClient:
             payload = {
                 "model": self.model,
                 "messages": messages,
-                "stream": False,
+                "stream": on_token is not None,
                 "options": {
                     "temperature": temperature,
                     "num_predict": max_tokens
                 }
             }
+            if stop:
+                payload["options"]["stop"] = stop
             
             logger.info(f"Sending request to Ollama: {prompt[:100]}...")
             
+            # 2 min timeout for GPU, or whatever the deadline leaves
+            timeout = 120 if deadline is None else max(0.1, deadline.remaining())
             response = requests.post(
                 self.api_url,
                 json=payload,
-                timeout=120  # 2 min timeout for GPU
+                timeout=timeout,
+                stream=on_token is not None
             )
             response.raise_for_status()
             
-            result = response.json()
-            
-            # Extract content from chat response
-            message = result.get("message", {})
-            content = message.get("content", "")
+            if on_token is not None:
+                content, result = self._read_stream(response, on_token, deadline)
+            else:
+                result = response.json()
+                
+                # Extract content from chat response
+                message = result.get("message", {})
+                content = message.get("content", "")
             
+            self._update_speed(result)
+            if result.get("prompt_eval_count"):
+                # Exact prompt size when Ollama reports it
+                current_span().set_attribute("gen_ai.usage.input_tokens", result["prompt_eval_count"])
+            partial = deadline is not None and not result.get("done", False)
+            if partial:
+                logger.warning(f"Deadline passed during generation, returning {len(content)} chars")
             return {
                 "text": content,
                 "model": self.model,
                 "done": result.get("done", False),
-                "tokens": result.get("eval_count", 0)
+                "tokens": result.get("eval_count", 0),
+                "done_reason": result.get("done_reason"),
+                # After fitting to the deadline
+                "num_predict": max_tokens,
+                "partial": partial
             }
             
         except requests.exceptions.Timeout:
@@ -100,6 +183,62 @@ class OllamaClient:
                 "error": "unexpected"
             }
     
+    def _read_stream(
+        self,
+        response: requests.Response,
+        on_token: Callable[[str], None],
+        deadline: Optional[Deadline] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Consume a streamed chat response, returning (content, final chunk)
+        
+        With a deadline, reading stops when it passes (or the stream stalls
+        past it) and the pieces received so far are returned.
+        """
+        pieces = []
+        result: Dict[str, Any] = {}
+        try:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                result = json.loads(line)
+                piece = result.get("message", {}).get("content", "")
+                if piece:
+                    pieces.append(piece)
+                    on_token(piece)
+                if result.get("done"):
+                    break
+                if deadline is not None and deadline.expired():
+                    result = {"done": False, "eval_count": len(pieces)}
+                    break
+        except requests.exceptions.ConnectionError:
+            # Read timeouts surface as ConnectionError while streaming
+            if deadline is None:
+                raise
+            result = {"done": False, "eval_count": len(pieces)}
+        finally:
+            response.close()
+        return "".join(pieces), result
+    
+    def _fit_tokens(self, max_tokens: int, remaining_s: float) -> int:
+        """Largest num_predict (up to max_tokens) expected to finish in time"""
+        budget = (remaining_s - self.first_token_s) * self.tokens_per_second
+        fitted = max(MIN_PREDICT_TOKENS, min(max_tokens, int(budget)))
+        if fitted < max_tokens:
+            logger.info(f"num_predict {max_tokens} -> {fitted} to fit {remaining_s:.1f}s left")
+        return fitted
+    
+    def _update_speed(self, result: Dict[str, Any]) -> None:
+        """Refine the speed estimates from a final chunk's timings (ns)"""
+        eval_count = result.get("eval_count", 0)
+        eval_duration = result.get("eval_duration", 0)
+        if eval_count and eval_duration:
+            speed = eval_count / (eval_duration / 1e9)
+            self.tokens_per_second += SPEED_SMOOTHING * (speed - self.tokens_per_second)
+        prefill = result.get("prompt_eval_duration", 0) + result.get("load_duration", 0)
+        if prefill:
+            self.first_token_s += SPEED_SMOOTHING * (prefill / 1e9 - self.first_token_s)
+    
     def health_check(self) -> bool:
         """Check if Ollama is running and accessible"""
         try:
@@ -109,4 +248,4 @@ class OllamaClient:
             return True
         except Exception as e:
             logger.error(f"Ollama health check failed: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,210 @@
+"""
+Opt-in per-request profiling
+
+A sampled fraction of requests (PROFILE_SAMPLE_RATE), or every request
+with PROFILE_REQUESTS=true, or one flagged by the caller, runs under
+cProfile and tracemalloc. Each profiled request writes, in PROFILE_DIR:
+    <request_id>.prof        pstats dump (snakeviz, pstats)
+    <request_id>.collapsed   collapsed stacks, microseconds ("a;b;c 123")
+    <request_id>.alloc.json  lines holding the most memory allocated during
+                             the request, and its peak traced memory
+scripts/profile_report.py aggregates dumps into flame-graph input.
+
+When a request is not selected, profile() returns a shared no-op context
+manager: no profiler or tracer is installed.
+"""
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Stacks deeper than this are truncated in the collapsed output
+MAX_STACK_DEPTH = 64
+
+
+class _NotProfiled:
+    request_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOT_PROFILED = _NotProfiled()
+
+
+class RequestProfiler:
+    """
+    Decide which requests are profiled and dump their profiles
+
+    Args:
+        sample_rate: Fraction of requests profiled (0 to 1)
+        always: Profile every request
+        output_dir: Where dumps are written
+        alloc_top: Allocation sites kept per request
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = None,
+        always: bool = None,
+        output_dir: str = None,
+        alloc_top: int = None
+    ):
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+        if always is None:
+            always = os.getenv("PROFILE_REQUESTS", "false").lower() == "true"
+        self.always = always
+        self.output_dir = Path(output_dir or os.getenv("PROFILE_DIR", "./profiles"))
+        self.alloc_top = alloc_top or int(os.getenv("PROFILE_ALLOC_TOP", "25"))
+        # One profiled request at a time: Python 3.12+ allows a single
+        # active cProfile, and tracemalloc is process-wide anyway
+        self._active = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.always or self.sample_rate > 0
+
+    def profile(self, request_id: Optional[str] = None, force: bool = False, **info: Any):
+        """
+        Context manager profiling the enclosed request if it is selected
+
+        Args:
+            request_id: Name of the dump files (default: random)
+            force: Profile this request whatever the sampling (header, flag...)
+            info: Extra fields saved with the allocation report (question...)
+        """
+        if not (force or self.always or (self.sample_rate > 0 and random.random() < self.sample_rate)):
+            return _NOT_PROFILED
+        return _ProfiledRequest(self, request_id or uuid.uuid4().hex[:12], info)
+
+
+class _ProfiledRequest:
+    def __init__(self, profiler: RequestProfiler, request_id: str, info: Dict[str, Any]):
+        self.profiler = profiler
+        self.request_id = str(request_id)
+        self.info = info
+        self._profile = None
+        self._started_tracing = False
+
+    def __enter__(self):
+        if not self.profiler._active.acquire(blocking=False):
+            logger.debug(f"Another request is being profiled, not profiling {self.request_id}")
+            return self
+        self._profile = cProfile.Profile()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start(MAX_STACK_DEPTH)
+        tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self._profile is None:
+            return False
+        self._profile.disable()
+        elapsed = time.perf_counter() - self._started
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if self._started_tracing:
+                tracemalloc.stop()
+            self._dump(elapsed, snapshot, peak)
+        except OSError as e:
+            logger.error(f"Could not write profile of request {self.request_id}: {e}")
+        finally:
+            self.profiler._active.release()
+        return False
+
+    def _dump(self, elapsed: float, snapshot: tracemalloc.Snapshot, peak: int) -> None:
+        out = self.profiler.output_dir
+        out.mkdir(parents=True, exist_ok=True)
+        base = out / self.request_id
+
+        self._profile.dump_stats(str(base) + ".prof")
+        stats = pstats.Stats(self._profile)
+        with open(str(base) + ".collapsed", "w", encoding="utf-8") as f:
+            for stack, microseconds in sorted(collapse_stats(stats).items()):
+                f.write(f"{stack} {microseconds}\n")
+
+        snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+        allocations = [
+            {
+                "file": stat.traceback[0].filename,
+                "line": stat.traceback[0].lineno,
+                "size_kb": round(stat.size / 1024, 1),
+                "count": stat.count,
+            }
+            for stat in snapshot.statistics("lineno")[:self.profiler.alloc_top]
+        ]
+        report = {
+            "request_id": self.request_id,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "peak_traced_mb": round(peak / 1024 / 1024, 2),
+            "top_allocations": allocations,
+            **self.info,
+        }
+        with open(str(base) + ".alloc.json", "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Profiled request {self.request_id} ({elapsed * 1000:.0f} ms) -> {base}.*")
+
+
+def _frame_name(func: Tuple[str, int, str]) -> str:
+    filename, line, name = func
+    if filename == "~":
+        # Built-ins: "<built-in method time.sleep>"
+        return name.strip("<>")
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapse_stats(stats: pstats.Stats) -> Dict[str, int]:
+    """
+    Collapsed stacks (frame;frame;... -> microseconds) from a cProfile run
+
+    cProfile only records caller -> callee edges, so the time of a
+    function called from several places is split between its callers in
+    proportion to the time each call edge accounts for.
+    """
+    entries = stats.stats  # func -> (cc, nc, tt, ct, callers)
+    callees: Dict[Tuple, Dict[Tuple, float]] = {}
+    for func, (_, _, _, _, callers) in entries.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+    roots = [func for func, entry in entries.items() if not entry[4]]
+
+    stacks: Dict[str, float] = {}
+
+    def walk(func: Tuple, path: Tuple, scale: float) -> None:
+        _, _, own_time, total_time, _ = entries[func]
+        frames = path + (_frame_name(func),)
+        stack = ";".join(frames)
+        stacks[stack] = stacks.get(stack, 0.0) + own_time * scale
+        if len(frames) >= MAX_STACK_DEPTH:
+            return
+        for callee, edge_time in callees.get(func, {}).items():
+            callee_total = entries[callee][3]
+            # Recursion: the callee's time is already counted higher up
+            if callee_total <= 0 or _frame_name(callee) in frames:
+                continue
+            # Paths worth less than a microsecond are dropped (keeps the walk small)
+            if scale * edge_time < 1e-6:
+                continue
+            walk(callee, frames, scale * min(1.0, edge_time / callee_total))
+
+    for root in roots:
+        walk(root, (), 1.0)
+    return {stack: int(seconds * 1_000_000) for stack, seconds in stacks.items() if seconds * 1_000_000 >= 1}
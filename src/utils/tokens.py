@@ -0,0 +1,14 @@
+"""
+Token count estimates for prompt budgeting
+
+Gemma's tokenizer is not available client-side; for French and English
+text a fixed characters-per-token ratio is close enough to size prompts.
+"""
+
+# Average characters per token (French/English prose, JSON-like chunks)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate number of tokens in a text"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
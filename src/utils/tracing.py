@@ -0,0 +1,298 @@
+"""
+Lightweight request tracing exported to local files
+
+Spans (name, trace/parent ids, attributes, start/end times, status) are
+opened with span() across the pipeline; the current span is tracked in
+a contextvar, so nested calls become children and concurrent requests
+stay apart. Finished spans are handed to a background thread that
+writes them as OTLP/JSON lines (one ExportTraceServiceRequest per line,
+the format of the OpenTelemetry Collector's otlpjsonfile receiver) to a
+size-rotated file, so no collector has to run next to the app.
+
+With TRACING_ENABLED=false (the default), span() returns a shared no-op
+span. bench_tracing.py measures the per-span cost in both modes.
+"""
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# OTLP status codes
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+
+class Span:
+    """One timed operation of a request"""
+
+    __slots__ = (
+        "name", "trace_id", "span_id", "parent_id", "attributes",
+        "start_ns", "end_ns", "status", "status_message", "_tracer", "_token"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, attributes: Dict[str, Any]):
+        parent = _current.get()
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.status_message = ""
+        self._tracer = tracer
+        self._token = None
+        self.start_ns = self.end_ns = 0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+
+    def set_error(self, message: str) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = message
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        self.start_ns = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.end_ns = time.time_ns()
+        _current.reset(self._token)
+        if exc is not None:
+            self.set_error(f"{exc_type.__name__}: {exc}")
+        self._tracer.exporter.export(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned by span() when tracing is off"""
+
+    trace_id = span_id = parent_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+
+    def set_error(self, message: str) -> None:
+        pass
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # int64 is a string in the protobuf JSON mapping
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)}
+
+
+def _otlp_span(span: Span) -> Dict[str, Any]:
+    record = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in span.attributes.items() if value is not None
+        ],
+        "status": {"code": span.status},
+    }
+    if span.parent_id:
+        record["parentSpanId"] = span.parent_id
+    if span.status_message:
+        record["status"]["message"] = span.status_message
+    return record
+
+
+class SpanExporter:
+    """
+    Write finished spans as OTLP/JSON lines from a background thread
+
+    Args:
+        path: Trace file; rotated to path.1 ... path.<backups> past max_bytes
+        service_name: service.name resource attribute
+        max_bytes: Size at which the file is rotated
+        backups: Rotated files kept
+        flush_interval: Seconds between writes (spans are batched per line)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_name: str = "devfest-rag",
+        max_bytes: int = 20 * 1024 * 1024,
+        backups: int = 5,
+        flush_interval: float = 1.0
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=100_000)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span: Span) -> None:
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            # Never block a request on tracing
+            self.dropped += 1
+
+    def close(self) -> None:
+        """Write pending spans and stop the thread"""
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch: List[Span] = []
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+                while item is not None:
+                    batch.append(item)
+                    item = self._queue.get_nowait()
+                running = False
+            except queue.Empty:
+                pass
+            if batch:
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    logger.error(f"Could not write {len(batch)} spans to {self.path}: {e}")
+
+    def _write(self, spans: List[Span]) -> None:
+        line = json.dumps({
+            "resourceSpans": [{
+                "resource": self.resource,
+                "scopeSpans": [{
+                    "scope": {"name": "devfest-rag"},
+                    "spans": [_otlp_span(span) for span in spans],
+                }],
+            }]
+        }, ensure_ascii=False)
+        if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+            self._rotate()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    def _rotate(self) -> None:
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+class Tracer:
+    """
+    Span factory; off unless an exporter is given
+
+    Args:
+        exporter: Where finished spans go (None: tracing disabled)
+    """
+
+    def __init__(self, exporter: Optional[SpanExporter] = None):
+        self.exporter = exporter
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Tracer writing to TRACE_FILE if TRACING_ENABLED=true"""
+        if os.getenv("TRACING_ENABLED", "false").lower() != "true":
+            return cls()
+        exporter = SpanExporter(
+            os.getenv("TRACE_FILE", "./traces/spans.jsonl"),
+            service_name=os.getenv("TRACE_SERVICE_NAME", "devfest-rag"),
+            max_bytes=int(float(os.getenv("TRACE_MAX_MB", "20")) * 1024 * 1024),
+            backups=int(os.getenv("TRACE_BACKUPS", "5"))
+        )
+        atexit.register(exporter.close)
+        logger.info(f"Tracing to {exporter.path}")
+        return cls(exporter)
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def span(self, name: str, **attributes: Any):
+        if self.exporter is None:
+            return NOOP_SPAN
+        return Span(self, name, attributes)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Process-wide tracer, configured from the environment on first use"""
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer.from_env()
+    return _tracer
+
+
+def set_tracer(tracer: Tracer) -> None:
+    """Replace the process-wide tracer (benchmarks, tools)"""
+    global _tracer
+    _tracer = tracer
+
+
+def span(name: str, **attributes: Any):
+    """
+    Context manager timing an operation as a child of the current span
+
+    Example:
+        with span("retrieval", collection="devfest_docs", k=3) as s:
+            results = search(...)
+            s.set_attribute("results", len(results))
+    """
+    tracer = _tracer if _tracer is not None else get_tracer()
+    return tracer.span(name, **attributes)
+
+
+def current_span():
+    """Innermost open span of this context, or the no-op span"""
+    return _current.get() or NOOP_SPAN
@@ -1,10 +1,54 @@
-try:
-    import chromadb
-    from .chroma_manager import ChromaManager
-except ImportError:
-    # Fallback to simple store if ChromaDB not available
+import importlib.util
+import logging
+import os
+import warnings
+
+logger = logging.getLogger(__name__)
+
+# Backend: chroma (ChromaDB, default), dense (in-process ANN index),
+# sharded (dense shards in worker processes) or simple (keywords)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "chroma").lower()
+
+
+def _embedder_available() -> bool:
+    # Coordinators using the embedding service (EMBEDDING_SERVICE_URL) or the
+    # shared embedding server (EMBEDDING_SOCKET) do not need the model locally
+    return (
+        bool(os.getenv("EMBEDDING_SERVICE_URL"))
+        or bool(os.getenv("EMBEDDING_SOCKET"))
+        or importlib.util.find_spec("sentence_transformers") is not None
+    )
+
+
+def _fall_back(reason: str) -> None:
+    message = f"{reason}, using SimpleVectorStore (keyword-based search) instead of VECTOR_STORE={VECTOR_STORE}"
+    warnings.warn(message)
+    logger.warning(message)
+
+
+if VECTOR_STORE == "simple":
     from .simple_store import ChromaManager
-    import warnings
-    warnings.warn("ChromaDB not installed, using SimpleVectorStore (keyword-based search)")
+elif VECTOR_STORE in ("dense", "sharded"):
+    if _embedder_available() and VECTOR_STORE == "sharded":
+        from .sharded import ShardedVectorStore as ChromaManager
+    elif _embedder_available():
+        from .dense_store import DenseVectorStore as ChromaManager
+    else:
+        from .simple_store import ChromaManager
+        _fall_back("No embedder (sentence-transformers not installed, no EMBEDDING_SERVICE_URL or EMBEDDING_SOCKET)")
+else:
+    try:
+        import chromadb
+        if not _embedder_available():
+            raise ImportError("no embedder: sentence-transformers not installed, no EMBEDDING_SERVICE_URL or EMBEDDING_SOCKET")
+        from .chroma_manager import ChromaManager
+    except ImportError as e:
+        # Fallback to simple store if ChromaDB or an embedder is not available
+        from .simple_store import ChromaManager
+        _fall_back(f"ChromaDB unavailable ({e})")
+
+from .ann_index import IVFIndex
+from .ingest import BulkIngestor
+from .lazy import LazyCollections
 
-__all__ = ["ChromaManager"]
+__all__ = ["ChromaManager", "BulkIngestor", "IVFIndex", "LazyCollections"]
@@ -0,0 +1,487 @@
+"""
+Inverted-file (IVF) approximate nearest-neighbour index, NumPy only
+
+Vectors are L2-normalized so inner product equals cosine similarity.
+A spherical k-means coarse quantizer splits the vectors into `nlist`
+inverted lists; a query only scores the vectors of its `nprobe` closest
+lists. Below `train_threshold` vectors the index stays untrained and
+searches exactly, which is both faster and exact at that size.
+
+Vectors can be stored as float32, float16 (2 bytes per dimension) or
+int8 with one float32 scale per vector (1 byte per dimension). With
+`rescore_path`, full-precision copies are appended to a file on disk
+and the best quantized candidates are re-ranked from it, memory-mapped.
+"""
+import logging
+import os
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows decoded and scored per matrix product, to bound temporary memory
+ASSIGN_BLOCK = 16384
+
+STORAGE_TYPES = ("float32", "float16", "int8")
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return float32 rows scaled to unit length"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first"""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class RawVectorFile:
+    """Append-only float32 vectors on disk, read back through a memory map"""
+
+    def __init__(self, path: str, dim: int, size: int = 0):
+        self.path = path
+        self.dim = dim
+        self.size = size
+        self._map = None
+        if size == 0:
+            open(path, 'wb').close()
+
+    def _row_bytes(self) -> int:
+        return self.dim * 4
+
+    def append(self, vectors: np.ndarray) -> None:
+        with open(self.path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.size += len(vectors)
+        self._map = None
+
+    def write(self, row: int, vector: np.ndarray) -> None:
+        with open(self.path, 'r+b') as f:
+            f.seek(row * self._row_bytes())
+            f.write(np.ascontiguousarray(vector, dtype=np.float32).tobytes())
+        self._map = None
+
+    def read(self, rows: np.ndarray) -> np.ndarray:
+        if self._map is None:
+            self._map = np.memmap(self.path, dtype=np.float32, mode='r', shape=(self.size, self.dim))
+        return np.asarray(self._map[rows])
+
+
+class IVFIndex:
+    """
+    IVF index with incremental inserts and on-disk persistence
+
+    Args:
+        dim: Vector dimension
+        nlist: Number of inverted lists (default: sqrt of the size at training)
+        nprobe: Lists scanned per query; higher is slower and more accurate
+        train_threshold: Size at which the quantizer is first trained
+        retrain_factor: Retrain once the index grows this many times past
+            the size it was trained on, so lists stay balanced
+        exact_threshold: Filtered searches over at most this many rows are
+            scored exactly instead of through the inverted lists
+        storage: float32, float16 or int8
+        rescore_path: File for full-precision copies used to re-rank
+            quantized results (None disables rescoring)
+        rescore_factor: Candidates re-ranked per requested result
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        train_threshold: int = 10000,
+        retrain_factor: float = 4.0,
+        exact_threshold: int = 4096,
+        seed: int = 0,
+        storage: str = "float32",
+        rescore_path: Optional[str] = None,
+        rescore_factor: int = 4
+    ):
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown storage '{storage}', expected one of {STORAGE_TYPES}")
+        self.dim = dim
+        self.nlist_setting = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.exact_threshold = exact_threshold
+        self.seed = seed
+        self.storage = storage
+        self.rescore_factor = rescore_factor
+        self.raw = RawVectorFile(rescore_path, dim) if rescore_path and storage != "float32" else None
+
+        self.size = 0
+        self._codes = np.empty((0, dim), dtype=storage)
+        self._scales = np.empty(0, dtype=np.float32)
+        self._assign = np.empty(0, dtype=np.int32)
+        self.centroids: Optional[np.ndarray] = None
+        self.trained_size = 0
+        # Inverted lists: row arrays with spare capacity, and their fill counts
+        self._lists = []
+        self._counts = np.empty(0, dtype=np.int64)
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    @property
+    def nbytes(self) -> int:
+        """Resident memory of the index (vectors, scales, assignments, lists)"""
+        lists = sum(rows.nbytes for rows in self._lists)
+        centroids = self.centroids.nbytes if self.trained else 0
+        return (
+            self._codes[:self.size].nbytes
+            + (self._scales[:self.size].nbytes if self.storage == "int8" else 0)
+            + self._assign[:self.size].nbytes
+            + lists + centroids
+        )
+
+    # ------------------------------------------------------------------
+    # Encoding
+    # ------------------------------------------------------------------
+
+    def _encode(self, vectors: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self.storage == "int8":
+            scales = np.abs(vectors).max(axis=1) / 127.0
+            scales[scales == 0] = 1.0
+            codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+            return codes, scales.astype(np.float32)
+        return vectors.astype(self.storage), None
+
+    def decode(self, rows) -> np.ndarray:
+        """Float32 vectors for the given rows (or slice)"""
+        vectors = self._codes[rows].astype(np.float32)
+        if self.storage == "int8":
+            vectors *= self._scales[rows][:, None]
+        return vectors
+
+    def _score(self, rows, query: np.ndarray) -> np.ndarray:
+        if self.storage == "int8":
+            return (self._codes[rows] @ query) * self._scales[rows]
+        if self.storage == "float16":
+            return self._codes[rows].astype(np.float32) @ query
+        return self._codes[rows] @ query
+
+    def _score_blocks(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Score rows block by block so quantized rows are never all decoded at once"""
+        count = self.size if rows is None else len(rows)
+        if count <= ASSIGN_BLOCK:
+            return self._score(slice(0, self.size) if rows is None else rows, query)
+        scores = np.empty(count, dtype=np.float32)
+        for start in range(0, count, ASSIGN_BLOCK):
+            end = min(start + ASSIGN_BLOCK, count)
+            block = slice(start, end) if rows is None else rows[start:end]
+            scores[start:end] = self._score(block, query)
+        return scores
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        capacity = len(self._codes)
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2, 1024)
+        codes = np.empty((capacity, self.dim), dtype=self.storage)
+        codes[:self.size] = self._codes[:self.size]
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self.size] = self._scales[:self.size]
+        assign = np.full(capacity, -1, dtype=np.int32)
+        assign[:self.size] = self._assign[:self.size]
+        self._codes, self._scales, self._assign = codes, scales, assign
+
+    def add(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Append vectors, returning their row numbers
+
+        Rows are assigned to their nearest list immediately, so inserted
+        vectors are searchable without rebuilding the index.
+        """
+        vectors = normalize_rows(vectors)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+        self._reserve(len(vectors))
+        start, end = self.size, self.size + len(vectors)
+        codes, scales = self._encode(vectors)
+        self._codes[start:end] = codes
+        if scales is not None:
+            self._scales[start:end] = scales
+        if self.raw is not None:
+            self.raw.append(vectors)
+        self.size = end
+        rows = np.arange(start, end)
+
+        if not self.trained:
+            if self.size >= self.train_threshold:
+                self.train()
+        elif self.size >= self.retrain_factor * self.trained_size:
+            self.train()
+        else:
+            self._assign_rows(rows, vectors)
+        return rows
+
+    def update(self, row: int, vector: np.ndarray) -> None:
+        """Replace the vector stored at a row (used for upserts)"""
+        vector = normalize_rows(vector)
+        codes, scales = self._encode(vector)
+        self._codes[row] = codes[0]
+        if scales is not None:
+            self._scales[row] = scales[0]
+        if self.raw is not None:
+            self.raw.write(row, vector[0])
+        if self.trained:
+            old = int(self._assign[row])
+            members = self._lists[old][:self._counts[old]]
+            kept = members[members != row]
+            self._lists[old][:len(kept)] = kept
+            self._counts[old] = len(kept)
+            self._assign_rows(np.array([row]), vector)
+
+    def compact(self, keep: np.ndarray) -> None:
+        """
+        Drop every row not in `keep` (sorted row numbers)
+
+        Kept rows are renumbered 0..len(keep)-1 in order. The quantizer is
+        not retrained: the lists are rebuilt from the existing assignments.
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        if self.raw is not None:
+            vectors = self.raw.read(keep) if len(keep) else np.empty((0, self.dim), dtype=np.float32)
+            # Recreating the file truncates it
+            self.raw = RawVectorFile(self.raw.path, self.dim)
+            self.raw.append(vectors)
+        self._codes = self._codes[keep]
+        self._scales = self._scales[keep]
+        self._assign = self._assign[keep]
+        self.size = len(keep)
+        if self.trained:
+            self._rebuild_lists()
+
+    def _nearest_centroid(self, vectors: np.ndarray) -> np.ndarray:
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), ASSIGN_BLOCK):
+            block = vectors[start:start + ASSIGN_BLOCK]
+            labels[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def _assign_rows(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        labels = self._nearest_centroid(vectors)
+        self._assign[rows] = labels
+        order = np.argsort(labels, kind="stable")
+        labels, rows = labels[order], rows[order]
+        bounds = np.flatnonzero(np.diff(labels)) + 1
+        for group in np.split(np.arange(len(rows)), bounds):
+            label = int(labels[group[0]])
+            count = self._counts[label]
+            needed = count + len(group)
+            if needed > len(self._lists[label]):
+                grown = np.empty(max(needed, 2 * len(self._lists[label]), 16), dtype=np.int64)
+                grown[:count] = self._lists[label][:count]
+                self._lists[label] = grown
+            self._lists[label][count:needed] = rows[group]
+            self._counts[label] = needed
+
+    def train(self, iterations: int = 10) -> None:
+        """Fit the coarse quantizer with spherical k-means and rebuild the lists"""
+        nlist = self.nlist_setting or int(np.sqrt(self.size))
+        nlist = max(1, min(nlist, 65536, self.size))
+
+        rng = np.random.default_rng(self.seed)
+        sample_size = min(self.size, 64 * nlist)
+        sample = self.decode(np.sort(rng.choice(self.size, sample_size, replace=False)))
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            self.centroids = centroids
+            labels = self._nearest_centroid(sample)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            # Empty lists keep their previous centroid
+            filled = counts > 0
+            centroids = centroids.copy()
+            centroids[filled] = normalize_rows(sums[filled])
+        self.centroids = centroids
+        self.trained_size = self.size
+
+        for start in range(0, self.size, ASSIGN_BLOCK):
+            end = min(start + ASSIGN_BLOCK, self.size)
+            self._assign[start:end] = self._nearest_centroid(self.decode(slice(start, end)))
+        self._rebuild_lists()
+        logger.info(f"IVF index trained: {self.size} vectors, {nlist} lists ({self.storage})")
+
+    def _rebuild_lists(self) -> None:
+        nlist = len(self.centroids)
+        labels = self._assign[:self.size]
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]].copy() for i in range(nlist)]
+        self._counts = np.diff(bounds).astype(np.int64)
+
+    def _list_rows(self, label: int) -> np.ndarray:
+        return self._lists[label][:self._counts[label]]
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+
+    def _rescore(self, rows: np.ndarray, scores: np.ndarray, query: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Keep the best candidates by quantized score, then re-rank them at full precision"""
+        fetch = k * self.rescore_factor if self.raw is not None else k
+        best = top_k(scores, fetch)
+        rows, scores = rows[best], scores[best]
+        if self.raw is None:
+            return rows, scores
+        order = np.argsort(rows)
+        exact = np.empty(len(rows), dtype=np.float32)
+        exact[order] = self.raw.read(rows[order]) @ query
+        best = top_k(exact, k)
+        return rows[best], exact[best]
+
+    def search_exact(self, query: np.ndarray, k: int, rows: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force search, optionally restricted to the given rows"""
+        query = normalize_rows(query)[0]
+        scores = self._score_blocks(query, rows)
+        if rows is None:
+            rows = np.arange(self.size)
+        return self._rescore(rows, scores, query, k)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        nprobe: Optional[int] = None,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate k-nearest-neighbour search
+
+        Args:
+            query: Query vector
+            k: Number of neighbours
+            nprobe: Lists to scan (default: self.nprobe)
+            mask: Optional boolean array over rows; only True rows are returned
+
+        Returns:
+            (rows, cosine similarities), best first
+        """
+        if self.size == 0 or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if mask is not None:
+            allowed = np.flatnonzero(mask[:self.size])
+            if not self.trained or len(allowed) <= self.exact_threshold:
+                return self.search_exact(query, k, allowed)
+        elif not self.trained:
+            return self.search_exact(query, k)
+
+        query = normalize_rows(query)[0]
+        order = np.argsort(-(self.centroids @ query))
+        probes = min(nprobe or self.nprobe, len(order))
+        while True:
+            rows = np.concatenate([self._list_rows(label) for label in order[:probes]])
+            if mask is not None:
+                rows = rows[mask[rows]]
+            # A selective filter can leave fewer than k rows: widen the probe
+            if len(rows) >= k or probes >= len(order):
+                break
+            probes = min(probes * 2, len(order))
+
+        return self._rescore(rows, self._score_blocks(query, rows), query, k)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def state(self, flat_lists: bool = False) -> Dict[str, np.ndarray]:
+        """
+        Arrays describing the index, for save() and shared snapshots
+
+        With flat_lists, the inverted lists are included as one row array
+        plus bounds, so an attached index needs no rebuild.
+        """
+        state = {
+            "codes": self._codes[:self.size],
+            "scales": self._scales[:self.size],
+            "assign": self._assign[:self.size],
+            "centroids": self.centroids if self.trained else np.empty((0, self.dim), dtype=np.float32),
+            "params": np.array([
+                self.dim, self.nlist_setting or 0, self.nprobe,
+                self.train_threshold, self.exact_threshold, self.trained_size,
+                self.rescore_factor
+            ], dtype=np.int64),
+            "storage": np.array(self.storage),
+            "retrain_factor": np.array(self.retrain_factor),
+        }
+        if flat_lists and self.trained:
+            state["list_rows"] = np.concatenate([self._list_rows(i) for i in range(len(self._lists))])
+            state["list_bounds"] = np.concatenate([[0], np.cumsum(self._counts)]).astype(np.int64)
+        return state
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray], rescore_path: Optional[str] = None) -> "IVFIndex":
+        """
+        Rebuild an index from state() arrays without copying them
+
+        Memory-mapped arrays stay memory-mapped, so processes attaching
+        the same snapshot share its pages.
+        """
+        dim, nlist, nprobe, train_threshold, exact_threshold, trained_size, rescore_factor = state["params"].tolist()
+        index = cls(
+            dim,
+            nlist=nlist or None,
+            nprobe=nprobe,
+            train_threshold=train_threshold,
+            retrain_factor=float(state["retrain_factor"]),
+            exact_threshold=exact_threshold,
+            storage=str(state["storage"]),
+            rescore_factor=rescore_factor
+        )
+        index._codes = state["codes"]
+        index._scales = state["scales"]
+        index._assign = state["assign"]
+        index.size = len(index._codes)
+        if len(state["centroids"]):
+            index.centroids = np.asarray(state["centroids"])
+            index.trained_size = trained_size
+            if "list_rows" in state:
+                rows, bounds = state["list_rows"], state["list_bounds"]
+                index._lists = [rows[bounds[i]:bounds[i + 1]] for i in range(len(bounds) - 1)]
+                index._counts = np.diff(bounds)
+            else:
+                index._rebuild_lists()
+
+        if rescore_path and index.storage != "float32" and os.path.exists(rescore_path):
+            raw_size = os.path.getsize(rescore_path) // (dim * 4)
+            if raw_size == index.size:
+                index.raw = RawVectorFile(rescore_path, dim, size=raw_size)
+            else:
+                logger.warning(f"Ignoring {rescore_path}: {raw_size} vectors for an index of {index.size}")
+        return index
+
+    def save(self, path: str) -> None:
+        """Write the index to a .npz file (atomically)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **self.state())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, rescore_path: Optional[str] = None) -> "IVFIndex":
+        """Read an index written by save(), reattaching its rescoring file if given"""
+        with np.load(path) as data:
+            return cls.from_state(dict(data), rescore_path=rescore_path)
@@ -2,12 +2,18 @@
 ChromaDB Manager for Vector Store operations
 """
 import os
-import json
 import logging
 from typing import List, Dict, Any, Optional
 import chromadb
+import numpy as np
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+
+from embeddings import load_embedder
+from embeddings.cache import cached_embedder, log_cache_report
+from utils.deadline import Deadline
+
+from .chunking import ChunkStats, json_to_chunks, iter_file_chunks, is_supported
+from .dedup import ChunkDeduplicator
 
 logger = logging.getLogger(__name__)
 
@@ -15,10 +21,19 @@ logger = logging.getLogger(__name__)
 class ChromaManager:
     """Manage ChromaDB collections for RAG"""
     
+    # Chunks embedded and written per batch by load_json_data
+    LOAD_BATCH_SIZE = 256
+    
+    # Adaptive retrieval thresholds (agents.selection): cosine similarity
+    # below which a chunk is unrelated, and drop marking a dominant hit
+    MIN_RELEVANCE = 0.3
+    SCORE_GAP = 0.15
+    
     def __init__(
         self,
         persist_dir: str = None,
-        embedding_model: str = None
+        embedding_model: str = None,
+        embedding_service_url: str = None
     ):
         self.persist_dir = persist_dir or os.getenv("CHROMA_PERSIST_DIR", "./chroma_db")
         self.embedding_model_name = embedding_model or os.getenv(
@@ -26,9 +41,11 @@ class ChromaManager:
             "sentence-transformers/all-MiniLM-L6-v2"
         )
         
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {self.embedding_model_name}")
-        self.embedding_model = SentenceTransformer(self.embedding_model_name)
+        # Initialize embedding model, or a client of the embedding service
+        # (EMBEDDING_SERVICE_URL) / shared embedding server (EMBEDDING_SOCKET)
+        self.embedding_model = load_embedder(self.embedding_model_name, embedding_service_url)
+        # Document encoder behind the persistent embedding cache, opened on first use
+        self._document_embedder = None
         
         # Initialize ChromaDB client
         self.client = chromadb.PersistentClient(
@@ -51,6 +68,13 @@ class ChromaManager:
             logger.error(f"Error creating collection {collection_name}: {e}")
             raise
     
+    def unload_collection(self, collection_name: str) -> None:
+        """
+        Nothing to do: collections live in persist_dir and ChromaDB pages
+        their segments in and out itself
+        """
+        logger.debug(f"Collection '{collection_name}' stays in ChromaDB ({self.persist_dir})")
+    
     def load_json_data(
         self,
         collection_name: str,
@@ -62,7 +86,7 @@ class ChromaManager:
         
         Args:
             collection_name: Name of the collection
-            data_dir: Directory containing JSON files
+            data_dir: Directory containing JSON or JSON Lines files
             chunk_size: Size of text chunks
             
         Returns:
@@ -80,51 +104,123 @@ class ChromaManager:
         metadatas = []
         ids = []
         doc_id = 0
+        chunk_stats = ChunkStats()
+        # First pass: near-duplicate map (CHUNK_DEDUP), applied while streaming below
+        dedup = ChunkDeduplicator.from_env()
+        if dedup is not None:
+            dedup.scan_directory(data_dir, chunk_size)
         
-        # Load all JSON files from directory
-        for filename in os.listdir(data_dir):
-            if not filename.endswith('.json'):
+        # Stream JSON / JSON Lines files so memory stays bounded by one batch
+        for filename in sorted(os.listdir(data_dir)):
+            if not is_supported(filename):
                 continue
             
             filepath = os.path.join(data_dir, filename)
             logger.info(f"Loading {filepath}")
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Convert JSON to text chunks
-            chunks = self._json_to_chunks(data, filename)
-            
-            for chunk in chunks:
+            chunks = iter_file_chunks(filepath, max_length=chunk_size)
+            if dedup is not None:
+                chunks = dedup.filter(filename, chunks)
+            for chunk in chunk_stats.track(chunks):
                 documents.append(chunk["text"])
                 metadatas.append({
                     "source": filename,
                     "type": chunk.get("type", "general"),
-                    "collection": collection_name
+                    "collection": collection_name,
+                    **chunk.get("metadata", {})
                 })
                 ids.append(f"{collection_name}_{doc_id}")
                 doc_id += 1
+                
+                if len(documents) >= self.LOAD_BATCH_SIZE:
+                    self.add_documents(collection_name, documents, metadatas, ids)
+                    documents, metadatas, ids = [], [], []
         
         if documents:
-            # Generate embeddings
-            logger.info(f"Generating embeddings for {len(documents)} chunks...")
-            embeddings = self.embedding_model.encode(
-                documents,
-                show_progress_bar=True
-            ).tolist()
-            
-            # Add to collection
-            collection.add(
-                documents=documents,
-                embeddings=embeddings,
-                metadatas=metadatas,
-                ids=ids
+            self.add_documents(collection_name, documents, metadatas, ids)
+        
+        logger.info(f"Loaded {doc_id} documents into '{collection_name}'")
+        log_cache_report(self._document_embedder)
+        if dedup is not None:
+            dedup.log_summary(collection_name)
+        summary = chunk_stats.summary()
+        if summary["chunks"]:
+            logger.info(
+                f"Chunk sizes for '{collection_name}': mean={summary['mean_chars']} "
+                f"p95={summary['p95_chars']} max={summary['max_chars']} chars"
             )
-            
-            logger.info(f"Loaded {len(documents)} documents into '{collection_name}'")
+        return doc_id
+    
+    def embed_documents(self, documents: List[str], batch_size: int = 32):
+        """Embed a batch of documents, returning a float32 array"""
+        # Only chunks missing from the embedding cache (EMBEDDING_CACHE_DIR) are encoded
+        if self._document_embedder is None:
+            self._document_embedder = cached_embedder(self.embedding_model, self.embedding_model_name)
+        return self._document_embedder.encode(
+            documents,
+            batch_size=batch_size,
+            show_progress_bar=False
+        )
+    
+    def max_batch_size(self) -> int:
+        """Largest number of records ChromaDB accepts in a single write"""
+        try:
+            return self.client.get_max_batch_size()
+        except Exception:
+            return 5000
+    
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings=None
+    ) -> int:
+        """
+        Write a batch of documents to a collection
+        
+        Uses upsert so that re-running an interrupted ingestion with the
+        same ids is idempotent.
+        
+        Returns:
+            Number of documents written
+        """
+        collection = self.create_or_get_collection(collection_name)
+        if embeddings is None:
+            embeddings = self.embed_documents(documents)
+        # Handed to ChromaDB as a float32 array: converting to nested Python
+        # lists would allocate one float object per dimension
+        embeddings = np.asarray(embeddings, dtype=np.float32)
         
+        limit = self.max_batch_size()
+        for start in range(0, len(documents), limit):
+            end = start + limit
+            collection.upsert(
+                documents=documents[start:end],
+                embeddings=embeddings[start:end],
+                metadatas=metadatas[start:end],
+                ids=ids[start:end]
+            )
         return len(documents)
     
+    def delete_documents(self, collection_name: str, ids: List[str]) -> int:
+        """
+        Remove documents from a collection by id (unknown ids are ignored)
+        
+        Returns:
+            Number of documents removed
+        """
+        collection = self.create_or_get_collection(collection_name)
+        removed = 0
+        limit = self.max_batch_size()
+        for start in range(0, len(ids), limit):
+            existing = collection.get(ids=ids[start:start + limit], include=[])["ids"]
+            if existing:
+                collection.delete(ids=existing)
+                removed += len(existing)
+        return removed
+    
     def _json_to_chunks(
         self,
         data: Dict[str, Any],
@@ -132,60 +228,15 @@ class ChromaManager:
         max_length: int = 500
     ) -> List[Dict[str, Any]]:
         """Convert JSON data to text chunks"""
-        chunks = []
-        
-        def process_value(key: str, value: Any, parent_key: str = "") -> None:
-            """Recursively process JSON values"""
-            full_key = f"{parent_key}.{key}" if parent_key else key
-            
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    process_value(k, v, full_key)
-            elif isinstance(value, list):
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        # Create a text representation of the dict
-                        text = f"{full_key}: " + json.dumps(item, ensure_ascii=False)
-                        if len(text) > max_length:
-                            # Split large texts
-                            for i in range(0, len(text), max_length):
-                                chunks.append({
-                                    "text": text[i:i+max_length],
-                                    "type": full_key,
-                                    "source": source
-                                })
-                        else:
-                            chunks.append({
-                                "text": text,
-                                "type": full_key,
-                                "source": source
-                            })
-                    else:
-                        text = f"{full_key}[{i}]: {item}"
-                        chunks.append({
-                            "text": text,
-                            "type": full_key,
-                            "source": source
-                        })
-            else:
-                text = f"{full_key}: {value}"
-                chunks.append({
-                    "text": text,
-                    "type": full_key,
-                    "source": source
-                })
-        
-        # Process the JSON data
-        for key, value in data.items():
-            process_value(key, value)
-        
-        return chunks
+        return json_to_chunks(data, source, max_length)
     
     def search(
         self,
         collection_name: str,
         query: str,
-        n_results: int = 3
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None
     ) -> List[Dict[str, Any]]:
         """
         Search in a collection
@@ -194,20 +245,27 @@ class ChromaManager:
             collection_name: Name of the collection
             query: Search query
             n_results: Number of results to return
+            where: Optional metadata filter (e.g. {"type": "schedule"}),
+                evaluated by ChromaDB before the vector search
+            deadline: Request deadline; nothing is searched once it has passed
             
         Returns:
             List of results with documents and metadata
         """
+        if deadline is not None and deadline.expired():
+            logger.warning(f"Deadline passed, skipping search in {collection_name}")
+            return []
         try:
             collection = self.client.get_collection(collection_name)
             
             # Generate query embedding
-            query_embedding = self.embedding_model.encode([query])[0].tolist()
+            query_embedding = self.embedding_model.encode([query])
             
             # Search
             results = collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results
+                query_embeddings=query_embedding,
+                n_results=n_results,
+                where=where or None
             )
             
             # Format results
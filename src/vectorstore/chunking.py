@@ -0,0 +1,398 @@
+"""
+JSON to text chunk conversion shared by the vector stores
+
+Chunks are produced from a stream of "leaf" events, so the same chunking
+policy applies whether a document is already in memory (json_to_chunks) or
+parsed incrementally from disk (iter_file_chunks). Incremental parsing
+only ever holds one list item or scalar in memory, plus a read buffer.
+"""
+import json
+import os
+from typing import List, Dict, Any, Iterator, Iterable, Tuple, TextIO
+
+JSON_EXTENSIONS = ('.json',)
+JSON_LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+SUPPORTED_EXTENSIONS = JSON_EXTENSIONS + JSON_LINES_EXTENSIONS
+
+# Events: ("record", key, dict_item) for dicts inside lists,
+#         ("item", key, (index, value)) for other list items,
+#         ("scalar", key, value) for everything else.
+Event = Tuple[str, str, Any]
+
+
+def is_supported(filename: str) -> bool:
+    """Whether a file can be chunked (JSON or JSON Lines)"""
+    return filename.endswith(SUPPORTED_EXTENSIONS)
+
+
+def _source_key(source: str) -> str:
+    """Key used for top-level arrays and JSON Lines records ('sessions.jsonl' -> 'sessions')"""
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def _walk(value: Any, key: str) -> Iterator[Event]:
+    """Yield chunking events for an in-memory JSON value"""
+    if isinstance(value, dict):
+        for k, v in value.items():
+            yield from _walk(v, f"{key}.{k}" if key else k)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            if isinstance(item, dict):
+                yield ("record", key, item)
+            else:
+                yield ("item", key, (i, item))
+    else:
+        yield ("scalar", key, value)
+
+
+class ChunkingPolicy:
+    """
+    How JSON structure is turned into chunks
+
+    Args:
+        max_length: Maximum chunk length in characters
+        whole_records: Keep each dict list item in one chunk, splitting
+            oversized records on field boundaries. When False, the
+            serialized record is sliced every max_length characters.
+        group_scalars: Merge consecutive scalar fields (and scalar list
+            items) of the same parent into one chunk instead of one
+            chunk per value
+        overlap_fields: Fields repeated at the start of the next piece
+            when an oversized record is split
+        key_fields: Identifying record fields (e.g. a speaker name)
+            repeated in every piece of a split record
+    """
+
+    def __init__(
+        self,
+        max_length: int = 500,
+        whole_records: bool = True,
+        group_scalars: bool = True,
+        overlap_fields: int = 1,
+        key_fields: Tuple[str, ...] = ("name", "title", "time")
+    ):
+        self.max_length = max_length
+        self.whole_records = whole_records
+        self.group_scalars = group_scalars
+        self.overlap_fields = overlap_fields
+        self.key_fields = tuple(key_fields)
+
+    @classmethod
+    def legacy(cls, max_length: int = 500) -> "ChunkingPolicy":
+        """Original behaviour: one chunk per scalar, records sliced by length"""
+        return cls(max_length, whole_records=False, group_scalars=False, overlap_fields=0, key_fields=())
+
+    @classmethod
+    def from_env(cls, max_length: int = 500) -> "ChunkingPolicy":
+        """Policy selected by CHUNKING_POLICY ('structured' or 'legacy')"""
+        if os.getenv("CHUNKING_POLICY", "structured").lower() == "legacy":
+            return cls.legacy(max_length)
+        return cls(max_length)
+
+
+class ChunkStats:
+    """Chunk count and size statistics, accumulated as chunks are produced"""
+
+    def __init__(self):
+        self.lengths: List[int] = []
+        self.by_type: Dict[str, int] = {}
+
+    def add(self, chunk: Dict[str, Any]) -> None:
+        self.lengths.append(len(chunk["text"]))
+        self.by_type[chunk["type"]] = self.by_type.get(chunk["type"], 0) + 1
+
+    def track(self, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass chunks through while recording them"""
+        for chunk in chunks:
+            self.add(chunk)
+            yield chunk
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.lengths:
+            return {"chunks": 0, "total_chars": 0, "by_type": {}}
+        ordered = sorted(self.lengths)
+        return {
+            "chunks": len(ordered),
+            "total_chars": sum(ordered),
+            "min_chars": ordered[0],
+            "mean_chars": round(sum(ordered) / len(ordered), 1),
+            "p50_chars": ordered[len(ordered) // 2],
+            "p95_chars": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+            "max_chars": ordered[-1],
+            "by_type": dict(sorted(self.by_type.items(), key=lambda kv: -kv[1])),
+        }
+
+
+def _split_text(text: str, max_length: int) -> Iterator[str]:
+    """Split text on whitespace into pieces of at most max_length characters"""
+    piece = ""
+    for word in text.split(" "):
+        candidate = f"{piece} {word}" if piece else word
+        if len(candidate) <= max_length:
+            piece = candidate
+            continue
+        if piece:
+            yield piece
+        # A single word longer than max_length is cut hard
+        while len(word) > max_length:
+            yield word[:max_length]
+            word = word[max_length:]
+        piece = word
+    if piece:
+        yield piece
+
+
+def _record_pieces(key: str, record: Dict[str, Any], policy: ChunkingPolicy) -> Iterator[str]:
+    """Render a record as one chunk, or several split on field boundaries"""
+
+    def render(fields: List[Tuple[str, Any]]) -> str:
+        return f"{key}: " + json.dumps(dict(fields), ensure_ascii=False)
+
+    text = render(list(record.items()))
+    if len(text) <= policy.max_length:
+        yield text
+        return
+
+    header = [
+        (k, record[k]) for k in policy.key_fields
+        if k in record and not isinstance(record[k], (dict, list))
+    ]
+    if len(render(header)) > policy.max_length // 2:
+        header = []
+    body = [(k, v) for k, v in record.items() if (k, v) not in header]
+
+    piece: List[Tuple[str, Any]] = []
+    for field in body:
+        if len(render(header + piece + [field])) <= policy.max_length:
+            piece.append(field)
+            continue
+        if piece:
+            yield render(header + piece)
+            piece = piece[-policy.overlap_fields:] if policy.overlap_fields else []
+            # Drop the overlap when it leaves no room for the next field
+            while piece and len(render(header + piece + [field])) > policy.max_length:
+                piece.pop(0)
+        if len(render(header + [field])) > policy.max_length:
+            # A single oversized field is split on whitespace
+            yield from _split_text(render(header + [field]), policy.max_length)
+            piece = []
+        else:
+            piece.append(field)
+    if piece:
+        yield render(header + piece)
+
+
+def _events_to_chunks(
+    events: Iterable[Event],
+    source: str,
+    policy: ChunkingPolicy
+) -> Iterator[Dict[str, Any]]:
+    """Turn chunking events into text chunks"""
+    max_length = policy.max_length
+    group_key = None
+    group: List[str] = []
+
+    def chunk(text: str, chunk_type: str) -> Dict[str, Any]:
+        return {"text": text, "type": chunk_type or _source_key(source), "source": source}
+
+    def flush_group() -> Iterator[Dict[str, Any]]:
+        if group:
+            text = f"{group_key}: " + " | ".join(group) if group_key else " | ".join(group)
+            yield chunk(text, group_key)
+            group.clear()
+
+    for kind, full_key, value in events:
+        if kind == "record":
+            yield from flush_group()
+            if policy.whole_records:
+                for text in _record_pieces(full_key, value, policy):
+                    yield chunk(text, full_key)
+            else:
+                # Create a text representation of the dict
+                text = f"{full_key}: " + json.dumps(value, ensure_ascii=False)
+                # Split large texts
+                for i in range(0, len(text), max_length):
+                    yield chunk(text[i:i+max_length], full_key)
+            continue
+
+        if kind == "item":
+            index, item = value
+            parent, field = full_key, str(item)
+            single = f"{full_key}[{index}]: {item}"
+        else:
+            parent, _, name = full_key.rpartition(".")
+            field = f"{name}: {value}"
+            single = f"{full_key}: {value}"
+
+        if not policy.group_scalars:
+            yield chunk(single, full_key)
+            continue
+
+        candidate = f"{parent}: " + " | ".join(group + [field])
+        if parent != group_key or len(candidate) > max_length:
+            yield from flush_group()
+            group_key = parent
+        if len(f"{parent}: {field}") > max_length:
+            for text in _split_text(single, max_length):
+                yield chunk(text, full_key)
+        else:
+            group.append(field)
+
+    yield from flush_group()
+
+
+def json_to_chunks(
+    data: Any,
+    source: str,
+    max_length: int = 500,
+    policy: ChunkingPolicy = None
+) -> List[Dict[str, Any]]:
+    """Convert JSON data to text chunks"""
+    policy = policy or ChunkingPolicy.from_env(max_length)
+    key = "" if isinstance(data, dict) else _source_key(source)
+    return list(_events_to_chunks(_walk(data, key), source, policy))
+
+
+class _IncrementalJSONReader:
+    """
+    Pull parser over a JSON text file
+
+    Objects are descended key by key and arrays item by item; each list
+    item and scalar is decoded with json.JSONDecoder.raw_decode once it
+    is fully buffered.
+    """
+
+    def __init__(self, f: TextIO, block_size: int = 1 << 16):
+        self.f = f
+        self.block_size = block_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, size: int) -> bool:
+        """Append up to size characters to the buffer; False at end of file"""
+        if self.eof:
+            return False
+        if self.pos > self.block_size:
+            # Drop the consumed prefix so the buffer does not grow with the file
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        data = self.f.read(size)
+        if not data:
+            self.eof = True
+            return False
+        self.buf += data
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it ('' at EOF)"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill(self.block_size):
+                return ""
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buf, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        """Decode one complete JSON value at the current position"""
+        self.peek()
+        read_size = self.block_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number running to the end of the buffer may be truncated
+                if self.eof or (end < len(self.buf) and self.buf[end] not in "0123456789.eE+-"):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Grow reads geometrically so re-decoding a large item stays linear
+            self._fill(read_size)
+            read_size *= 2
+
+    def events(self, key: str = "") -> Iterator[Event]:
+        """Yield chunking events for the value at the current position"""
+        char = self.peek()
+        if char == "{":
+            yield from self._object(key)
+        elif char == "[":
+            self.pos += 1
+            index = 0
+            while self.peek() != "]":
+                if index:
+                    self.expect(",")
+                item = self.value()
+                if isinstance(item, dict):
+                    yield ("record", key, item)
+                else:
+                    yield ("item", key, (index, item))
+                index += 1
+            self.pos += 1
+        else:
+            yield ("scalar", key, self.value())
+
+    def _object(self, key: str) -> Iterator[Event]:
+        self.expect("{")
+        first = True
+        while self.peek() != "}":
+            if not first:
+                self.expect(",")
+            first = False
+            name = self.value()
+            self.expect(":")
+            yield from self.events(f"{key}.{name}" if key else name)
+        self.pos += 1
+
+
+def iter_file_events(filepath: str) -> Iterator[Event]:
+    """Incrementally parse a JSON or JSON Lines file into chunking events"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        if filepath.endswith(JSON_LINES_EXTENSIONS):
+            # Each line is one item of a list named after the file
+            key = _source_key(filepath)
+            index = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    yield ("record", key, record)
+                else:
+                    yield ("item", key, (index, record))
+                index += 1
+            return
+
+        reader = _IncrementalJSONReader(f)
+        top_key = "" if reader.peek() == "{" else _source_key(filepath)
+        yield from reader.events(top_key)
+
+
+def iter_file_chunks(
+    filepath: str,
+    max_length: int = 500,
+    source: str = None,
+    policy: ChunkingPolicy = None
+) -> Iterator[Dict[str, Any]]:
+    """Stream text chunks from a JSON or JSON Lines file with bounded memory"""
+    source = source or os.path.basename(filepath)
+    policy = policy or ChunkingPolicy.from_env(max_length)
+    return _events_to_chunks(iter_file_events(filepath), source, policy)
+
+
+def chunk_file(
+    filepath: str,
+    max_length: int = 500,
+    source: str = None,
+    policy: ChunkingPolicy = None
+) -> List[Dict[str, Any]]:
+    """Load a JSON or JSON Lines file and convert it to text chunks"""
+    return list(iter_file_chunks(filepath, max_length, source, policy))
@@ -0,0 +1,294 @@
+"""
+Compact columnar storage for chunk text, ids and metadata
+
+Python keeps each str and dict as a separate heap object (a short str
+costs ~50 bytes of overhead, a small dict ~200). The in-process store
+instead keeps:
+- TextColumn: all texts UTF-8 encoded in one buffer plus an offsets array
+- MetadataColumns: one int32 code array per field, values interned in a
+  per-field vocabulary, so filters are evaluated with vectorized NumPy
+- IdMap: 64-bit id hashes in sorted arrays for id -> row lookups
+"""
+import hashlib
+import json
+from typing import List, Dict, Any, Iterable, Optional
+
+import numpy as np
+
+
+class TextColumn:
+    """Append-only list of strings stored as one UTF-8 buffer"""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = np.zeros(1024, dtype=np.int64)
+        self._size = 0
+        # Rows rewritten by set() live here instead of in the shared buffer
+        self._overrides: Dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, text: str) -> int:
+        if not isinstance(self._data, bytearray):
+            # Attached from a snapshot: copy on first write
+            self._data = bytearray(self._data.tobytes())
+        if self._size + 1 >= len(self._offsets):
+            self._offsets = np.concatenate([self._offsets, np.zeros(max(len(self._offsets), 1024), dtype=np.int64)])
+        self._data += text.encode("utf-8")
+        self._size += 1
+        self._offsets[self._size] = len(self._data)
+        return self._size - 1
+
+    def extend(self, texts: Iterable[str]) -> None:
+        for text in texts:
+            self.append(text)
+
+    def __getitem__(self, row: int) -> str:
+        if row < 0 or row >= self._size:
+            raise IndexError(row)
+        if row in self._overrides:
+            return self._overrides[row]
+        start, end = self._offsets[row], self._offsets[row + 1]
+        return bytes(self._data[start:end]).decode("utf-8")
+
+    def set(self, row: int, text: str) -> None:
+        self._overrides[row] = text
+
+    def __iter__(self):
+        for row in range(self._size):
+            yield self[row]
+
+    @property
+    def nbytes(self) -> int:
+        overrides = sum(len(t) for t in self._overrides.values())
+        return len(self._data) + self._offsets[:self._size + 1].nbytes + overrides
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        # Fold overrides back in so the saved buffer is self-contained
+        if self._overrides:
+            rebuilt = TextColumn()
+            rebuilt.extend(self)
+            return rebuilt.to_arrays(prefix)
+        return {
+            f"{prefix}_data": np.frombuffer(bytes(self._data), dtype=np.uint8),
+            f"{prefix}_offsets": self._offsets[:self._size + 1].copy(),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str) -> "TextColumn":
+        """Column over to_arrays() output; memory-mapped arrays are not copied"""
+        column = cls()
+        column._data = arrays[f"{prefix}_data"]
+        column._offsets = arrays[f"{prefix}_offsets"]
+        column._size = len(column._offsets) - 1
+        return column
+
+
+class MetadataColumns:
+    """
+    Per-field code arrays with interned values
+
+    Values must be str, int, float, bool or None (the ChromaDB metadata
+    types). A missing field is stored as code -1 and read back as absent.
+    """
+
+    def __init__(self):
+        self.fields: List[str] = []
+        self._codes: Dict[str, np.ndarray] = {}
+        self._vocab: Dict[str, List[Any]] = {}
+        self._lookup: Dict[str, Dict[Any, int]] = {}
+        self._size = 0
+        self._capacity = 1024
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _add_field(self, field: str) -> None:
+        self.fields.append(field)
+        self._codes[field] = np.full(self._capacity, -1, dtype=np.int32)
+        self._vocab[field] = []
+        self._lookup[field] = {}
+
+    def _intern(self, field: str, value: Any) -> int:
+        lookup = self._lookup[field]
+        key = (type(value).__name__, value)
+        code = lookup.get(key)
+        if code is None:
+            code = len(self._vocab[field])
+            self._vocab[field].append(value)
+            lookup[key] = code
+        return code
+
+    def append(self, metadata: Dict[str, Any]) -> int:
+        if self._size >= self._capacity:
+            self._capacity = max(self._capacity * 2, 1024)
+            for field, codes in self._codes.items():
+                grown = np.full(self._capacity, -1, dtype=np.int32)
+                grown[:self._size] = codes[:self._size]
+                self._codes[field] = grown
+        self._size += 1
+        self.set(self._size - 1, metadata)
+        return self._size - 1
+
+    def set(self, row: int, metadata: Dict[str, Any]) -> None:
+        for field in self.fields:
+            self._codes[field][row] = -1
+        for field, value in metadata.items():
+            if field not in self._codes:
+                self._add_field(field)
+            self._codes[field][row] = self._intern(field, value)
+
+    def __getitem__(self, row: int) -> Dict[str, Any]:
+        if row < 0 or row >= self._size:
+            raise IndexError(row)
+        metadata = {}
+        for field in self.fields:
+            code = self._codes[field][row]
+            if code >= 0:
+                metadata[field] = self._vocab[field][code]
+        return metadata
+
+    def values(self, field: str) -> List[Any]:
+        return list(self._vocab.get(field, []))
+
+    @property
+    def nbytes(self) -> int:
+        codes = sum(codes[:self._size].nbytes for codes in self._codes.values())
+        vocab = sum(len(str(v)) for values in self._vocab.values() for v in values)
+        return codes + vocab
+
+    # ------------------------------------------------------------------
+    # Filters
+    # ------------------------------------------------------------------
+
+    def _value_codes(self, field: str, values: Iterable[Any]) -> np.ndarray:
+        lookup = self._lookup.get(field, {})
+        codes = [lookup.get((type(v).__name__, v)) for v in values]
+        return np.array([c for c in codes if c is not None], dtype=np.int32)
+
+    def _field_mask(self, field: str, condition: Any) -> np.ndarray:
+        if field not in self._codes:
+            codes = np.full(self._size, -1, dtype=np.int32)
+        else:
+            codes = self._codes[field][:self._size]
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+
+        mask = np.ones(self._size, dtype=bool)
+        for op, operand in condition.items():
+            if op in ("$eq", "$ne"):
+                hit = np.isin(codes, self._value_codes(field, [operand]))
+                mask &= hit if op == "$eq" else ~hit
+            elif op in ("$in", "$nin"):
+                hit = np.isin(codes, self._value_codes(field, operand))
+                mask &= hit if op == "$in" else ~hit
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+        return mask
+
+    def mask(self, where: Optional[Dict[str, Any]]) -> np.ndarray:
+        """Boolean row mask for a ChromaDB-style where filter (see filters.py)"""
+        mask = np.ones(self._size, dtype=bool)
+        if not where:
+            return mask
+        for key, condition in where.items():
+            if key == "$and":
+                for clause in condition:
+                    mask &= self.mask(clause)
+            elif key == "$or":
+                any_mask = np.zeros(self._size, dtype=bool)
+                for clause in condition:
+                    any_mask |= self.mask(clause)
+                mask &= any_mask
+            else:
+                mask &= self._field_mask(key, condition)
+        return mask
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def to_arrays(self, prefix: str) -> Dict[str, np.ndarray]:
+        arrays = {}
+        for i, field in enumerate(self.fields):
+            arrays[f"{prefix}_codes_{i}"] = self._codes[field][:self._size].copy()
+        header = {"size": self._size, "fields": self.fields, "vocab": [self._vocab[f] for f in self.fields]}
+        arrays[f"{prefix}_header"] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix: str) -> "MetadataColumns":
+        """Columns over to_arrays() output; memory-mapped code arrays are not copied"""
+        header = json.loads(arrays[f"{prefix}_header"].tobytes().decode("utf-8"))
+        columns = cls()
+        columns._size = columns._capacity = header["size"]
+        for i, field in enumerate(header["fields"]):
+            columns._add_field(field)
+            columns._codes[field] = arrays[f"{prefix}_codes_{i}"]
+            for value in header["vocab"][i]:
+                columns._intern(field, value)
+        return columns
+
+
+def id_hash(doc_id: str) -> int:
+    return int.from_bytes(hashlib.blake2b(doc_id.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class IdMap:
+    """
+    id -> row lookups without a Python dict of strings
+
+    Hashes live in sorted NumPy arrays; recent inserts go to a small
+    pending dict that is merged in once it reaches merge_threshold.
+    Hash collisions are resolved by comparing against the stored id.
+    """
+
+    def __init__(self, ids: TextColumn, merge_threshold: int = 65536):
+        self.ids = ids
+        self.merge_threshold = merge_threshold
+        self._hashes = np.empty(0, dtype=np.int64)
+        self._rows = np.empty(0, dtype=np.int64)
+        self._pending: Dict[int, List[int]] = {}
+        self._pending_count = 0
+
+    def get(self, doc_id: str) -> Optional[int]:
+        h = id_hash(doc_id)
+        for row in self._pending.get(h, ()):
+            if self.ids[row] == doc_id:
+                return row
+        start = np.searchsorted(self._hashes, h, side="left")
+        end = np.searchsorted(self._hashes, h, side="right")
+        for row in self._rows[start:end].tolist():
+            if self.ids[row] == doc_id:
+                return row
+        return None
+
+    def add(self, doc_id: str, row: int) -> None:
+        self._pending.setdefault(id_hash(doc_id), []).append(row)
+        self._pending_count += 1
+        if self._pending_count >= self.merge_threshold:
+            self._merge()
+
+    def _merge(self) -> None:
+        hashes = [h for h, rows in self._pending.items() for _ in rows]
+        rows = [r for r_list in self._pending.values() for r in r_list]
+        all_hashes = np.concatenate([self._hashes, np.array(hashes, dtype=np.int64)])
+        all_rows = np.concatenate([self._rows, np.array(rows, dtype=np.int64)])
+        order = np.argsort(all_hashes, kind="stable")
+        self._hashes, self._rows = all_hashes[order], all_rows[order]
+        self._pending = {}
+        self._pending_count = 0
+
+    @classmethod
+    def build(cls, ids: TextColumn) -> "IdMap":
+        id_map = cls(ids)
+        id_map._hashes = np.array([id_hash(doc_id) for doc_id in ids], dtype=np.int64)
+        id_map._rows = np.arange(len(ids), dtype=np.int64)
+        order = np.argsort(id_map._hashes, kind="stable")
+        id_map._hashes, id_map._rows = id_map._hashes[order], id_map._rows[order]
+        return id_map
+
+    @property
+    def nbytes(self) -> int:
+        return self._hashes.nbytes + self._rows.nbytes + self._pending_count * 100
@@ -0,0 +1,162 @@
+"""
+Near-duplicate chunk elimination at ingestion
+
+Chunks are compared through MinHash signatures of their word 3-grams;
+LSH banding only puts chunks sharing a band of the signature in front
+of each other, so the cost stays linear in the number of chunks. A
+chunk whose estimated Jaccard similarity with an earlier chunk reaches
+DEDUP_THRESHOLD is dropped; the earlier (canonical) chunk records the
+sources of the chunks it absorbed.
+
+Loading is two passes over the files: scan_directory() computes the
+signatures and the duplicate map, then filter() drops duplicates from
+the chunk stream the store actually writes. Both passes chunk the
+files the same way, so chunks are identified by (source, position).
+"""
+import logging
+import os
+import re
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .chunking import is_supported, iter_file_chunks
+
+logger = logging.getLogger(__name__)
+
+# Mersenne prime for the universal hashes (a * x + b) mod p; products stay below 2**62
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+
+class ChunkDeduplicator:
+    """
+    MinHash/LSH near-duplicate detection over the chunks of a collection
+
+    Args:
+        threshold: Estimated Jaccard similarity from which chunks are duplicates
+        num_perm: MinHash permutations (signature length)
+        bands: LSH bands; num_perm / bands rows each
+        shingle_size: Words per shingle
+    """
+
+    def __init__(self, threshold: float = None, num_perm: int = 64, bands: int = 16, shingle_size: int = 3):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.85"))
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(1)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+
+        self._buckets: Dict[Tuple[int, bytes], int] = {}
+        self._signatures: List[np.ndarray] = []
+        self._keys: List[Tuple[str, int]] = []
+        self._duplicate_of: Dict[Tuple[str, int], int] = {}
+        self._sources: Dict[int, List[str]] = {}
+        self.stats = {"chunks": 0, "duplicates": 0, "chars": 0, "duplicate_chars": 0}
+
+    @classmethod
+    def from_env(cls) -> Optional["ChunkDeduplicator"]:
+        """Deduplicator unless CHUNK_DEDUP=false"""
+        if os.getenv("CHUNK_DEDUP", "true").lower() != "true":
+            return None
+        return cls()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature (num_perm uint32) of a text's word shingles"""
+        words = _WORD.findall(text.lower())
+        n = self.shingle_size
+        shingles = {" ".join(words[i:i + n]) for i in range(max(1, len(words) - n + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _find_duplicate(self, signature: np.ndarray) -> Optional[int]:
+        candidates = set()
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            canonical = self._buckets.get(key)
+            if canonical is not None:
+                candidates.add(canonical)
+        best, best_similarity = None, self.threshold
+        for canonical in sorted(candidates):
+            similarity = float(np.mean(self._signatures[canonical] == signature))
+            if similarity >= best_similarity:
+                best, best_similarity = canonical, similarity
+        return best
+
+    def _add(self, source: str, position: int, text: str) -> None:
+        signature = self.signature(text)
+        self.stats["chunks"] += 1
+        self.stats["chars"] += len(text)
+        canonical = self._find_duplicate(signature)
+        if canonical is not None:
+            self._duplicate_of[(source, position)] = canonical
+            self.stats["duplicates"] += 1
+            self.stats["duplicate_chars"] += len(text)
+            sources = self._sources.setdefault(canonical, [self._keys[canonical][0]])
+            if source not in sources:
+                sources.append(source)
+            return
+
+        index = len(self._signatures)
+        self._signatures.append(signature)
+        self._keys.append((source, position))
+        for band in range(self.bands):
+            key = (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            self._buckets.setdefault(key, index)
+
+    def scan(self, files: Iterable[Tuple[str, Iterable[Dict[str, Any]]]]) -> None:
+        """First pass: signatures of every chunk, given (source, chunks) per file"""
+        for source, chunks in files:
+            for position, chunk in enumerate(chunks):
+                self._add(source, position, chunk["text"])
+
+    def scan_directory(self, data_dir: str, chunk_size: int = 500) -> None:
+        """First pass over the files load_json_data() will load, in the same order"""
+        self.scan(
+            (filename, iter_file_chunks(os.path.join(data_dir, filename), max_length=chunk_size))
+            for filename in sorted(os.listdir(data_dir))
+            if is_supported(filename)
+        )
+
+    def filter(self, source: str, chunks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Second pass: drop the duplicates found by scan()
+
+        Canonical chunks that absorbed duplicates from other files get a
+        "metadata" entry with their comma-separated "sources".
+        """
+        canonical_positions = {}
+        for index, key in enumerate(self._keys):
+            if key[0] == source and index in self._sources:
+                canonical_positions[key[1]] = index
+        for position, chunk in enumerate(chunks):
+            if (source, position) in self._duplicate_of:
+                continue
+            index = canonical_positions.get(position)
+            if index is not None and len(self._sources[index]) > 1:
+                chunk = {**chunk, "metadata": {"sources": ", ".join(self._sources[index])}}
+            yield chunk
+
+    def summary(self) -> Dict[str, Any]:
+        chunks = self.stats["chunks"]
+        return {
+            **self.stats,
+            "removed_ratio": self.stats["duplicates"] / chunks if chunks else 0.0,
+            "removed_chars_ratio": self.stats["duplicate_chars"] / self.stats["chars"] if chunks else 0.0,
+        }
+
+    def log_summary(self, collection_name: str) -> None:
+        summary = self.summary()
+        logger.info(
+            f"Dedup for '{collection_name}': removed {summary['duplicates']}/{summary['chunks']} chunks "
+            f"({summary['removed_ratio']:.0%}, {summary['removed_chars_ratio']:.0%} of the text) "
+            f"at similarity >= {self.threshold}"
+        )
@@ -0,0 +1,411 @@
+"""
+Dense in-process vector store backed by an IVF ANN index
+
+Same interface as ChromaManager, without the ChromaDB stack: embeddings
+come from SentenceTransformer, search goes through vectorstore.ann_index
+and collections are persisted as two .npz files (index and documents).
+
+Storage is compact for small pods: vectors are float16 or int8
+(VECTOR_STORAGE), text/ids/metadata are columnar (vectorstore.columns).
+With SHARED_INDEX_DIR set, collections published by a loader process are
+attached read-only and memory-mapped (vectorstore.shared).
+"""
+import logging
+import os
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from embeddings import load_embedder
+from embeddings.cache import cached_embedder, log_cache_report
+from utils.deadline import Deadline
+
+from . import shared
+from .ann_index import IVFIndex
+from .chunking import ChunkStats, json_to_chunks, iter_file_chunks, is_supported
+from .dedup import ChunkDeduplicator
+from .columns import IdMap, MetadataColumns, TextColumn
+
+logger = logging.getLogger(__name__)
+
+
+class DenseVectorStore:
+    """In-process dense vector store with approximate nearest-neighbour search"""
+
+    LOAD_BATCH_SIZE = 256
+    # Adaptive retrieval thresholds (agents.selection): cosine similarity
+    # below which a chunk is unrelated, and drop marking a dominant hit
+    MIN_RELEVANCE = 0.3
+    SCORE_GAP = 0.15
+
+    def __init__(
+        self,
+        persist_dir: str = None,
+        embedding_model: str = None,
+        nprobe: int = None,
+        nlist: int = None,
+        storage: str = None,
+        rescore: bool = None,
+        shared_dir: str = None,
+        embedder=None
+    ):
+        self.persist_dir = persist_dir or os.getenv("DENSE_PERSIST_DIR", "./dense_db")
+        self.embedding_model_name = embedding_model or os.getenv(
+            "EMBEDDING_MODEL",
+            "sentence-transformers/all-MiniLM-L6-v2"
+        )
+        self.nprobe = nprobe or int(os.getenv("ANN_NPROBE", "8"))
+        self.nlist = nlist or int(os.getenv("ANN_NLIST", "0")) or None
+        self.storage = storage or os.getenv("VECTOR_STORAGE", "float16")
+        if rescore is None:
+            rescore = os.getenv("VECTOR_RESCORE", "false").lower() == "true"
+        self.rescore = rescore
+        self.shared_dir = shared_dir or os.getenv("SHARED_INDEX_DIR")
+
+        self.embedding_model = embedder or load_embedder(self.embedding_model_name)
+        # Document encoder behind the persistent embedding cache, opened on first use
+        self._document_embedder = None
+        self.dim = self.embedding_model.get_sentence_embedding_dimension()
+
+        self.collections: Dict[str, Dict[str, Any]] = {}
+        os.makedirs(self.persist_dir, exist_ok=True)
+        logger.info(
+            f"DenseVectorStore initialized at {self.persist_dir} "
+            f"(nprobe={self.nprobe}, storage={self.storage}, rescore={self.rescore})"
+        )
+
+    def _paths(self, collection_name: str):
+        base = os.path.join(self.persist_dir, collection_name)
+        return f"{base}.ivf.npz", f"{base}.docs.npz", f"{base}.f32"
+
+    def create_or_get_collection(self, collection_name: str):
+        """Create a collection, or load it from persist_dir if it was saved"""
+        if collection_name in self.collections:
+            return self.collections[collection_name]
+
+        if self.shared_dir:
+            collection = shared.attach(collection_name, self.shared_dir)
+            if collection is not None:
+                self.collections[collection_name] = collection
+                return collection
+            logger.warning(f"No shared snapshot of '{collection_name}' in {self.shared_dir}, loading it privately")
+
+        index_path, docs_path, raw_path = self._paths(collection_name)
+        rescore_path = raw_path if self.rescore else None
+        if os.path.exists(index_path) and os.path.exists(docs_path):
+            index = IVFIndex.load(index_path, rescore_path=rescore_path)
+            index.nprobe = self.nprobe
+            with np.load(docs_path) as arrays:
+                documents = TextColumn.from_arrays(arrays, "documents")
+                ids = TextColumn.from_arrays(arrays, "ids")
+                metadatas = MetadataColumns.from_arrays(arrays, "metadatas")
+            logger.info(f"Collection '{collection_name}' loaded ({index.size} documents, {index.storage})")
+        else:
+            index = IVFIndex(
+                self.dim,
+                nlist=self.nlist,
+                nprobe=self.nprobe,
+                storage=self.storage,
+                rescore_path=rescore_path
+            )
+            documents, ids, metadatas = TextColumn(), TextColumn(), MetadataColumns()
+            logger.info(f"Collection '{collection_name}' created")
+
+        collection = {
+            "documents": documents,
+            "metadatas": metadatas,
+            "ids": ids,
+            "rows": IdMap.build(ids),
+            "index": index
+        }
+        self.collections[collection_name] = collection
+        return collection
+
+    def persist(self, collection_name: str) -> None:
+        """Write a collection to persist_dir"""
+        collection = self.collections.get(collection_name)
+        if collection is None or collection.get("read_only"):
+            return
+        index_path, docs_path, _ = self._paths(collection_name)
+        collection["index"].save(index_path)
+        tmp_path = f"{docs_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f,
+                **collection["documents"].to_arrays("documents"),
+                **collection["ids"].to_arrays("ids"),
+                **collection["metadatas"].to_arrays("metadatas")
+            )
+        os.replace(tmp_path, docs_path)
+
+    def unload_collection(self, collection_name: str) -> None:
+        """Drop a collection from memory; create_or_get_collection() reloads it from persist_dir"""
+        self.persist(collection_name)
+        self.collections.pop(collection_name, None)
+
+    def publish(self, collection_name: str, shared_dir: str = None) -> str:
+        """Publish a collection for worker processes to attach (see vectorstore.shared)"""
+        shared_dir = shared_dir or self.shared_dir
+        if not shared_dir:
+            raise ValueError("No shared_dir given and SHARED_INDEX_DIR is not set")
+        return shared.publish(self.create_or_get_collection(collection_name), collection_name, shared_dir)
+
+    def load_json_data(
+        self,
+        collection_name: str,
+        data_dir: str,
+        chunk_size: int = 500
+    ) -> int:
+        """
+        Load JSON files from a directory into a collection
+
+        Args:
+            collection_name: Name of the collection
+            data_dir: Directory containing JSON or JSON Lines files
+            chunk_size: Size of text chunks
+
+        Returns:
+            Number of documents loaded
+        """
+        collection = self.create_or_get_collection(collection_name)
+        if len(collection["documents"]):
+            logger.info(f"Collection '{collection_name}' already has {len(collection['documents'])} documents")
+            return len(collection["documents"])
+
+        documents = []
+        metadatas = []
+        ids = []
+        doc_id = 0
+        chunk_stats = ChunkStats()
+        # First pass: near-duplicate map (CHUNK_DEDUP), applied while streaming below
+        dedup = ChunkDeduplicator.from_env()
+        if dedup is not None:
+            dedup.scan_directory(data_dir, chunk_size)
+
+        for filename in sorted(os.listdir(data_dir)):
+            if not is_supported(filename):
+                continue
+
+            filepath = os.path.join(data_dir, filename)
+            logger.info(f"Loading {filepath}")
+
+            chunks = iter_file_chunks(filepath, max_length=chunk_size)
+            if dedup is not None:
+                chunks = dedup.filter(filename, chunks)
+            for chunk in chunk_stats.track(chunks):
+                documents.append(chunk["text"])
+                metadatas.append({
+                    "source": filename,
+                    "type": chunk.get("type", "general"),
+                    "collection": collection_name,
+                    **chunk.get("metadata", {})
+                })
+                ids.append(f"{collection_name}_{doc_id}")
+                doc_id += 1
+
+                if len(documents) >= self.LOAD_BATCH_SIZE:
+                    self.add_documents(collection_name, documents, metadatas, ids)
+                    documents, metadatas, ids = [], [], []
+
+        if documents:
+            self.add_documents(collection_name, documents, metadatas, ids)
+        self.persist(collection_name)
+
+        logger.info(f"Loaded {doc_id} documents into '{collection_name}'")
+        log_cache_report(self._document_embedder)
+        if dedup is not None:
+            dedup.log_summary(collection_name)
+        summary = chunk_stats.summary()
+        if summary["chunks"]:
+            logger.info(
+                f"Chunk sizes for '{collection_name}': mean={summary['mean_chars']} "
+                f"p95={summary['p95_chars']} max={summary['max_chars']} chars"
+            )
+        return doc_id
+
+    def embed_documents(self, documents: List[str], batch_size: int = 32):
+        """Embed a batch of documents, returning a float32 array"""
+        # Only chunks missing from the embedding cache (EMBEDDING_CACHE_DIR) are encoded
+        if self._document_embedder is None:
+            self._document_embedder = cached_embedder(self.embedding_model, self.embedding_model_name)
+        return self._document_embedder.encode(
+            documents,
+            batch_size=batch_size,
+            show_progress_bar=False
+        )
+
+    def max_batch_size(self) -> int:
+        """No write limit for the in-process store"""
+        return 100_000
+
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings=None
+    ) -> int:
+        """
+        Write a batch of documents to a collection
+
+        Existing ids are overwritten in place (upsert), like ChromaManager.
+        Call persist() to save the collection to disk.
+
+        Returns:
+            Number of documents written
+        """
+        collection = self.create_or_get_collection(collection_name)
+        if collection.get("read_only"):
+            raise RuntimeError(f"Collection '{collection_name}' is a read-only shared snapshot")
+        if embeddings is None:
+            embeddings = self.embed_documents(documents)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        new_rows = []
+        for i, (document, metadata, doc_id) in enumerate(zip(documents, metadatas, ids)):
+            row = collection["rows"].get(doc_id)
+            if row is None:
+                new_rows.append(i)
+                continue
+            collection["documents"].set(row, document)
+            collection["metadatas"].set(row, metadata)
+            collection["index"].update(row, embeddings[i])
+
+        if new_rows:
+            rows = collection["index"].add(embeddings[new_rows])
+            for i, row in zip(new_rows, rows.tolist()):
+                collection["documents"].append(documents[i])
+                collection["metadatas"].append(metadatas[i])
+                collection["ids"].append(ids[i])
+                collection["rows"].add(ids[i], row)
+        return len(documents)
+
+    def delete_documents(self, collection_name: str, ids: List[str]) -> int:
+        """
+        Remove documents from a collection by id (unknown ids are ignored)
+
+        The remaining rows are renumbered. Call persist() to save the
+        collection to disk.
+
+        Returns:
+            Number of documents removed
+        """
+        collection = self.create_or_get_collection(collection_name)
+        if collection.get("read_only"):
+            raise RuntimeError(f"Collection '{collection_name}' is a read-only shared snapshot")
+        doomed = {collection["rows"].get(doc_id) for doc_id in ids} - {None}
+        if not doomed:
+            return 0
+
+        keep = np.array([row for row in range(len(collection["documents"])) if row not in doomed], dtype=np.int64)
+        collection["index"].compact(keep)
+        documents, doc_ids, metadatas = TextColumn(), TextColumn(), MetadataColumns()
+        for row in keep.tolist():
+            documents.append(collection["documents"][row])
+            doc_ids.append(collection["ids"][row])
+            metadatas.append(collection["metadatas"][row])
+        collection.update(documents=documents, ids=doc_ids, metadatas=metadatas, rows=IdMap.build(doc_ids))
+        return len(doomed)
+
+    def _json_to_chunks(
+        self,
+        data: Dict[str, Any],
+        source: str,
+        max_length: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Convert JSON data to text chunks"""
+        return json_to_chunks(data, source, max_length)
+
+    def search(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search in a collection
+
+        Args:
+            collection_name: Name of the collection
+            query: Search query
+            n_results: Number of results to return
+            where: Optional metadata filter (ChromaDB syntax)
+            nprobe: Inverted lists to scan (default: ANN_NPROBE)
+            deadline: Request deadline; nothing is searched once it has passed
+
+        Returns:
+            List of results with documents, metadata and cosine distance
+        """
+        if deadline is not None and deadline.expired():
+            logger.warning(f"Deadline passed, skipping search in {collection_name}")
+            return []
+        try:
+            query_embedding = self.embedding_model.encode([query])[0]
+            return self.search_vector(collection_name, query_embedding, n_results, where, nprobe)
+        except Exception as e:
+            logger.error(f"Search error in {collection_name}: {e}")
+            return []
+
+    def search_vector(
+        self,
+        collection_name: str,
+        query_embedding: np.ndarray,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Search with an already computed query embedding (see search())"""
+        collection = self.create_or_get_collection(collection_name)
+        if not len(collection["documents"]):
+            return []
+
+        mask = collection["metadatas"].mask(where) if where else None
+        rows, scores = collection["index"].search(query_embedding, n_results, nprobe=nprobe, mask=mask)
+
+        return [
+            {
+                "document": collection["documents"][row],
+                "metadata": collection["metadatas"][row],
+                "distance": 1.0 - float(score)
+            }
+            for row, score in zip(rows.tolist(), scores.tolist())
+        ]
+
+    def get_stats(self, collection_name: str) -> Dict[str, Any]:
+        """Get collection statistics"""
+        if collection_name not in self.collections and not os.path.exists(self._paths(collection_name)[0]):
+            return {
+                "collection": collection_name,
+                "count": 0,
+                "status": "not_found"
+            }
+
+        collection = self.create_or_get_collection(collection_name)
+        index = collection["index"]
+        count = len(collection["documents"])
+        memory = {
+            "vectors": index.nbytes,
+            "text": collection["documents"].nbytes,
+            "ids": collection["ids"].nbytes + (collection["rows"].nbytes if collection["rows"] else 0),
+            "metadata": collection["metadatas"].nbytes
+        }
+        memory["bytes_per_chunk"] = round(sum(memory.values()) / count, 1) if count else 0
+        return {
+            "collection": collection_name,
+            "count": count,
+            "status": "ready" if count > 0 else "empty",
+            "index": {
+                "trained": index.trained,
+                "nlist": len(index.centroids) if index.trained else 0,
+                "nprobe": index.nprobe,
+                "storage": index.storage,
+                "rescore": index.raw is not None
+            },
+            "memory": memory,
+            # Memory-mapped snapshot: the bytes above are shared with other workers
+            "shared": bool(collection.get("read_only"))
+        }
@@ -0,0 +1,105 @@
+"""
+Metadata filters for the in-process vector stores
+
+Filters use the ChromaDB `where` syntax so the same dict can be pushed
+down to Chroma or evaluated here:
+    {"type": "schedule"}
+    {"type": {"$in": ["schedule", "speakers"]}}
+    {"$or": [{"type": "profile.certifications"}, {"source": "profile.json"}]}
+Supported operators: $eq, $ne, $in, $nin, $and, $or.
+"""
+from typing import List, Dict, Any, Optional, Set
+
+# Metadata fields with a precomputed value -> row partition
+PARTITIONED_FIELDS = ("type", "source")
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$eq" and value != operand:
+            return False
+        if op == "$ne" and value == operand:
+            return False
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$nin" and value in operand:
+            return False
+    return True
+
+
+def matches(metadata: Dict[str, Any], where: Optional[Dict[str, Any]]) -> bool:
+    """Whether a chunk's metadata satisfies a where filter"""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches(metadata, clause) for clause in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+class MetadataIndex:
+    """Per-value row partitions for the partitioned metadata fields"""
+
+    def __init__(self, fields=PARTITIONED_FIELDS):
+        self.partitions: Dict[str, Dict[Any, List[int]]] = {field: {} for field in fields}
+
+    def add(self, row: int, metadata: Dict[str, Any]) -> None:
+        for field, partition in self.partitions.items():
+            partition.setdefault(metadata.get(field), []).append(row)
+
+    def values(self, field: str) -> List[Any]:
+        return list(self.partitions.get(field, {}))
+
+    def _rows(self, key: str, condition: Any) -> Optional[Set[int]]:
+        partition = self.partitions.get(key)
+        if partition is None:
+            return None
+        if not isinstance(condition, dict):
+            return set(partition.get(condition, ()))
+        if set(condition) == {"$eq"}:
+            return set(partition.get(condition["$eq"], ()))
+        if set(condition) == {"$in"}:
+            rows: Set[int] = set()
+            for value in condition["$in"]:
+                rows.update(partition.get(value, ()))
+            return rows
+        return None
+
+    def candidates(self, where: Optional[Dict[str, Any]]) -> Optional[Set[int]]:
+        """
+        Rows that may satisfy the filter, or None when every row may
+
+        The result is a superset: callers still check each row with
+        matches() unless the filter only uses partitioned fields.
+        """
+        if not where:
+            return None
+        result: Optional[Set[int]] = None
+        for key, condition in where.items():
+            if key == "$and":
+                rows = None
+                for clause in condition:
+                    clause_rows = self.candidates(clause)
+                    if clause_rows is not None:
+                        rows = clause_rows if rows is None else rows & clause_rows
+            elif key == "$or":
+                rows = set()
+                for clause in condition:
+                    clause_rows = self.candidates(clause)
+                    if clause_rows is None:
+                        rows = None
+                        break
+                    rows |= clause_rows
+            else:
+                rows = self._rows(key, condition)
+            if rows is not None:
+                result = rows if result is None else result & rows
+        return result
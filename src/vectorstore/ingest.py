@@ -0,0 +1,333 @@
+"""
+Parallel, batched bulk ingestion pipeline for large JSON corpora
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Any, Iterable, Optional
+
+from .chunking import ChunkStats, chunk_file, iter_file_chunks, is_supported
+
+logger = logging.getLogger(__name__)
+
+
+class IngestCheckpoint:
+    """Record of fully ingested files, used to resume an interrupted run"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.completed: Dict[str, Dict[str, Any]] = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.completed = json.load(f).get("completed", {})
+            logger.info(f"Resuming from checkpoint {path} ({len(self.completed)} files done)")
+
+    @staticmethod
+    def fingerprint(filepath: str) -> Dict[str, int]:
+        stat = os.stat(filepath)
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    def is_done(self, source: str, filepath: str) -> bool:
+        entry = self.completed.get(source)
+        return entry is not None and entry.get("file") == self.fingerprint(filepath)
+
+    def mark_done(self, source: str, filepath: str, chunks: int) -> None:
+        self.completed[source] = {"file": self.fingerprint(filepath), "chunks": chunks}
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"completed": self.completed}, f)
+        os.replace(tmp_path, self.path)
+
+
+class BulkIngestor:
+    """
+    Load a directory of JSON files into a collection
+
+    Stages:
+    1. Parsing and chunking run in a process pool, one file per task;
+       files above stream_threshold bytes and JSON Lines files are
+       streamed on the calling thread instead, so no process ever holds
+       a whole large file
+    2. Chunks are embedded in fixed-size batches on the calling thread
+    3. A writer thread adds embedded batches to the store through a
+       bounded queue, so embedding of batch N+1 overlaps the write of N
+
+    Files are recorded in a checkpoint, with their chunk count, once all
+    their chunks are written; chunk ids are deterministic, so re-running
+    after an interruption skips finished files and overwrites partial ones.
+    A changed file that now yields fewer chunks has its extra ids deleted.
+    """
+
+    def __init__(
+        self,
+        manager,
+        batch_size: int = 256,
+        workers: Optional[int] = None,
+        max_pending_writes: int = 2,
+        checkpoint_dir: Optional[str] = None,
+        max_length: int = 500,
+        progress_interval: float = 5.0,
+        stream_threshold: int = 64 * 1024 * 1024
+    ):
+        self.manager = manager
+        self.batch_size = min(batch_size, manager.max_batch_size())
+        self.workers = workers if workers is not None else (os.cpu_count() or 1)
+        self.max_pending_writes = max_pending_writes
+        self.checkpoint_dir = checkpoint_dir or getattr(manager, "persist_dir", None)
+        self.max_length = max_length
+        self.progress_interval = progress_interval
+        self.stream_threshold = stream_threshold
+
+    def _list_files(self, data_dir: str) -> List[str]:
+        files = []
+        for root, _, filenames in os.walk(data_dir):
+            for filename in filenames:
+                if is_supported(filename):
+                    files.append(os.path.join(root, filename))
+        return sorted(files)
+
+    def ingest(self, collection_name: str, data_dir: str) -> Dict[str, Any]:
+        """
+        Ingest every JSON file under data_dir into a collection
+
+        Args:
+            collection_name: Name of the collection
+            data_dir: Directory containing JSON / JSON Lines files (searched recursively)
+
+        Returns:
+            Dict with file, chunk and throughput statistics
+        """
+        checkpoint_path = None
+        if self.checkpoint_dir:
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            checkpoint_path = os.path.join(self.checkpoint_dir, f"{collection_name}.ingest.json")
+        checkpoint = IngestCheckpoint(checkpoint_path)
+
+        files = []
+        skipped = 0
+        for filepath in self._list_files(data_dir):
+            source = os.path.relpath(filepath, data_dir)
+            if checkpoint.is_done(source, filepath):
+                skipped += 1
+            else:
+                files.append((source, filepath))
+
+        logger.info(
+            f"Ingesting {len(files)} files into '{collection_name}' "
+            f"({skipped} already done, batch_size={self.batch_size}, workers={self.workers})"
+        )
+
+        self.manager.create_or_get_collection(collection_name)
+        run = _IngestRun(self, collection_name, checkpoint, total_files=len(files))
+        run.start()
+        try:
+            for source, filepath, chunks in self._chunked_files(files):
+                run.add_file(source, filepath, chunks)
+            run.finish()
+        except BaseException:
+            run.abort()
+            raise
+
+        stats = run.stats()
+        stats["files_skipped"] = skipped
+        logger.info(
+            f"Ingested {stats['chunks']} chunks from {stats['files']} files into "
+            f"'{collection_name}' in {stats['seconds']:.1f}s ({stats['chunks_per_s']:.0f} chunks/s)"
+        )
+        return stats
+
+    def _should_stream(self, filepath: str) -> bool:
+        return (
+            self.workers <= 1
+            or not filepath.endswith('.json')
+            or os.path.getsize(filepath) > self.stream_threshold
+        )
+
+    def _chunked_files(self, files):
+        """Yield (source, filepath, chunks) as files become ready for embedding"""
+        streamed = [f for f in files if self._should_stream(f[1])]
+        pooled = [f for f in files if not self._should_stream(f[1])]
+
+        if pooled:
+            window = self.workers * 2
+            pending = iter(pooled)
+            in_flight = {}
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                while True:
+                    while len(in_flight) < window:
+                        item = next(pending, None)
+                        if item is None:
+                            break
+                        future = pool.submit(chunk_file, item[1], self.max_length, item[0])
+                        in_flight[future] = item
+                    if not in_flight:
+                        break
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        source, filepath = in_flight.pop(future)
+                        yield source, filepath, future.result()
+
+        for source, filepath in streamed:
+            yield source, filepath, iter_file_chunks(filepath, self.max_length, source)
+
+
+class _IngestRun:
+    """State of one ingestion: batch buffer, writer thread and progress"""
+
+    def __init__(self, ingestor: BulkIngestor, collection_name: str, checkpoint: IngestCheckpoint, total_files: int):
+        self.ingestor = ingestor
+        self.manager = ingestor.manager
+        self.collection_name = collection_name
+        self.checkpoint = checkpoint
+        self.total_files = total_files
+
+        self.documents: List[str] = []
+        self.metadatas: List[Dict[str, Any]] = []
+        self.ids: List[str] = []
+        # (buffer position after the file's last chunk, source, filepath, chunk count)
+        self.file_ends: List[tuple] = []
+
+        self.write_queue: queue.Queue = queue.Queue(maxsize=ingestor.max_pending_writes)
+        self.writer = threading.Thread(target=self._write_loop, name="ingest-writer", daemon=True)
+        self.writer_error: Optional[BaseException] = None
+
+        # Stores that keep writes in memory until persist() (DenseVectorStore)
+        # only checkpoint once the collection is saved, at the end of the run
+        self.persist = getattr(self.manager, "persist", None)
+
+        self.chunk_stats = ChunkStats()
+        self.files_done = 0
+        self.chunks_written = 0
+        self.started = 0.0
+        self.last_progress = 0.0
+
+    def start(self) -> None:
+        self.started = self.last_progress = time.perf_counter()
+        self.writer.start()
+
+    def add_file(self, source: str, filepath: str, chunks: Iterable[Dict[str, Any]]) -> None:
+        count = 0
+        for i, chunk in enumerate(chunks):
+            self.chunk_stats.add(chunk)
+            self.documents.append(chunk["text"])
+            self.metadatas.append({
+                "source": source,
+                "type": chunk.get("type", "general"),
+                "collection": self.collection_name
+            })
+            self.ids.append(self._chunk_id(source, i))
+            count += 1
+            if len(self.documents) >= self.ingestor.batch_size:
+                self._flush(self.ingestor.batch_size)
+        self.file_ends.append((len(self.documents), source, filepath, count))
+
+    def _chunk_id(self, source: str, position: int) -> str:
+        return f"{self.collection_name}_{source}_{position}"
+
+    def _remove_stale_chunks(self, source: str, count: int) -> None:
+        """Delete the chunks a previous version of the file had past its new count"""
+        previous = self.checkpoint.completed.get(source, {}).get("chunks", 0)
+        if previous <= count:
+            return
+        removed = self.manager.delete_documents(
+            self.collection_name, [self._chunk_id(source, i) for i in range(count, previous)]
+        )
+        logger.info(f"[{self.collection_name}] {source} shrank from {previous} to {count} chunks, removed {removed}")
+
+    def finish(self) -> None:
+        if self.documents or self.file_ends:
+            self._flush(len(self.documents))
+        self.write_queue.put(None)
+        self.writer.join()
+        self._raise_writer_error()
+        if self.persist is not None:
+            self.persist(self.collection_name)
+            self.checkpoint.save()
+
+    def abort(self) -> None:
+        # Unblock the writer without waiting for queued batches
+        while True:
+            try:
+                self.write_queue.get_nowait()
+            except queue.Empty:
+                break
+        self.write_queue.put(None)
+        self.writer.join()
+
+    def _flush(self, size: int) -> None:
+        self._raise_writer_error()
+        documents = self.documents[:size]
+        batch = {
+            "documents": documents,
+            "metadatas": self.metadatas[:size],
+            "ids": self.ids[:size],
+            "embeddings": self.manager.embed_documents(documents) if documents else None,
+            "completed": [end[1:] for end in self.file_ends if end[0] <= size],
+        }
+        del self.documents[:size], self.metadatas[:size], self.ids[:size]
+        self.file_ends = [(end[0] - size,) + end[1:] for end in self.file_ends if end[0] > size]
+
+        # Blocks while max_pending_writes batches are already waiting
+        self.write_queue.put(batch)
+
+    def _write_loop(self) -> None:
+        while True:
+            batch = self.write_queue.get()
+            if batch is None:
+                return
+            if self.writer_error is not None:
+                continue
+            try:
+                if batch["documents"]:
+                    self.manager.add_documents(
+                        collection_name=self.collection_name,
+                        documents=batch["documents"],
+                        metadatas=batch["metadatas"],
+                        ids=batch["ids"],
+                        embeddings=batch["embeddings"]
+                    )
+                self.chunks_written += len(batch["documents"])
+                for source, filepath, count in batch["completed"]:
+                    self._remove_stale_chunks(source, count)
+                    self.checkpoint.mark_done(source, filepath, count)
+                    self.files_done += 1
+                if batch["completed"] and self.persist is None:
+                    self.checkpoint.save()
+                self._log_progress()
+            except BaseException as e:
+                logger.error(f"Ingestion write failed for '{self.collection_name}': {e}")
+                self.writer_error = e
+
+    def _raise_writer_error(self) -> None:
+        if self.writer_error is not None:
+            raise self.writer_error
+
+    def _log_progress(self) -> None:
+        now = time.perf_counter()
+        if now - self.last_progress < self.ingestor.progress_interval:
+            return
+        self.last_progress = now
+        elapsed = now - self.started
+        logger.info(
+            f"[{self.collection_name}] {self.files_done}/{self.total_files} files, "
+            f"{self.chunks_written} chunks, {self.chunks_written / elapsed:.0f} chunks/s"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "collection": self.collection_name,
+            "files": self.files_done,
+            "chunks": self.chunks_written,
+            "seconds": elapsed,
+            "chunks_per_s": self.chunks_written / elapsed if elapsed else 0.0,
+            "chunk_sizes": self.chunk_stats.summary(),
+        }
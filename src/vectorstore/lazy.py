@@ -0,0 +1,172 @@
+"""
+Collections loaded on first use and evicted under a memory budget
+
+LazyCollections wraps a vector store (any ChromaManager backend) and
+knows the data directory of every collection without loading any at
+startup. The first search in a collection loads it; when the loaded
+collections exceed COLLECTION_MEMORY_MB, the least recently searched
+ones are unloaded (backends that persist to disk reload them cheaply).
+Everything else is delegated to the wrapped store.
+"""
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+from utils.deadline import Deadline
+
+from .chunking import is_supported
+
+logger = logging.getLogger(__name__)
+
+# Memory estimate for backends whose stats do not report it
+# (embedding + text + metadata + index overhead, 384-dim float32)
+DEFAULT_BYTES_PER_CHUNK = 4096
+
+
+class LazyCollections:
+    """
+    Load collections on demand and keep the most recent within a budget
+
+    Args:
+        store: Vector store the collections are loaded into
+        data_dirs: Collection name -> directory of its JSON files
+        memory_budget: Bytes of loaded collections kept (0: no eviction)
+    """
+
+    def __init__(self, store, data_dirs: Dict[str, str], memory_budget: int = None):
+        self.store = store
+        self.data_dirs = dict(data_dirs)
+        if memory_budget is None:
+            memory_budget = int(float(os.getenv("COLLECTION_MEMORY_MB", "512")) * 1024 * 1024)
+        self.memory_budget = memory_budget
+        self.stats = {"loads": 0, "evictions": 0}
+        # Loaded collection -> estimated bytes, least recently used first
+        self._loaded: "OrderedDict[str, int]" = OrderedDict()
+        # Document count at the last load of each collection
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._loading: Dict[str, threading.Lock] = {}
+
+    def ensure(self, collection_name: str) -> None:
+        """Load a collection if needed and mark it as recently used"""
+        with self._lock:
+            if collection_name in self._loaded:
+                self._loaded.move_to_end(collection_name)
+                return
+            if collection_name not in self.data_dirs:
+                # Not managed here (created by a tool, a benchmark...)
+                return
+            loading = self._loading.setdefault(collection_name, threading.Lock())
+
+        # One load per collection at a time; other collections stay searchable
+        with loading:
+            with self._lock:
+                if collection_name in self._loaded:
+                    self._loaded.move_to_end(collection_name)
+                    return
+            logger.info(f"Loading collection '{collection_name}' on first use")
+            count = self.store.load_json_data(collection_name, self.data_dirs[collection_name])
+            size = self._estimate_bytes(collection_name, count)
+            with self._lock:
+                self._loaded[collection_name] = size
+                self._counts[collection_name] = count
+                self.stats["loads"] += 1
+                self._evict(keep=collection_name)
+
+    def preload(self, collection_names: Optional[List[str]] = None) -> None:
+        """Load collections now (all managed ones by default)"""
+        for name in collection_names or list(self.data_dirs):
+            self.ensure(name)
+
+    def _estimate_bytes(self, collection_name: str, count: int) -> int:
+        memory = self.store.get_stats(collection_name).get("memory")
+        if memory:
+            return int(sum(v for k, v in memory.items() if k != "bytes_per_chunk"))
+        return count * DEFAULT_BYTES_PER_CHUNK
+
+    def _evict(self, keep: str) -> None:
+        if not self.memory_budget:
+            return
+        used = sum(self._loaded.values())
+        for name in list(self._loaded):
+            if used <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            used -= self._loaded.pop(name)
+            unload = getattr(self.store, "unload_collection", None)
+            if unload is not None:
+                unload(name)
+            self.stats["evictions"] += 1
+            logger.info(
+                f"Unloaded collection '{name}' (least recently used, "
+                f"{used / 1024 / 1024:.1f}/{self.memory_budget / 1024 / 1024:.0f} MB loaded)"
+            )
+
+    def search(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        deadline: Optional[Deadline] = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        self.ensure(collection_name)
+        return self.store.search(
+            collection_name=collection_name,
+            query=query,
+            n_results=n_results,
+            where=where,
+            deadline=deadline,
+            **kwargs
+        )
+
+    def get_stats(self, collection_name: str) -> Dict[str, Any]:
+        """Store stats, without loading a collection that is not loaded yet"""
+        with self._lock:
+            loaded = collection_name in self._loaded or collection_name not in self.data_dirs
+        if loaded:
+            return self.store.get_stats(collection_name)
+        return {
+            "collection": collection_name,
+            "count": self._counts.get(collection_name, 0),
+            "status": "not_loaded"
+        }
+
+    def version(self) -> Hashable:
+        """
+        Fingerprint of the collections' data files (name, size, mtime)
+
+        Changes when the data changes on disk, not when a collection is
+        loaded or evicted, so loading on first use does not look like new data.
+        """
+        fingerprint = []
+        for collection_name, data_dir in sorted(self.data_dirs.items()):
+            try:
+                files = sorted(os.listdir(data_dir))
+            except OSError:
+                continue
+            for filename in files:
+                if not is_supported(filename):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(data_dir, filename))
+                except OSError:
+                    continue
+                fingerprint.append((collection_name, filename, stat.st_size, stat.st_mtime_ns))
+        return tuple(fingerprint)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "loaded": list(self._loaded),
+                "loaded_mb": sum(self._loaded.values()) / 1024 / 1024,
+                "budget_mb": self.memory_budget / 1024 / 1024,
+            }
+
+    def __getattr__(self, name):
+        return getattr(self.store, name)
@@ -0,0 +1,494 @@
+"""
+Sharded scatter-gather retrieval across worker processes
+
+A collection is partitioned by id hash across N shard workers, each a
+separate process holding its partition in a DenseVectorStore. The query
+is embedded once in the caller, scattered to every shard, and the
+per-shard top-k lists (already sorted by distance) are merged with a
+heap. Shards that miss the per-shard timeout or fail are left out and
+the result is flagged as partial instead of failing the whole search.
+
+Shards are local processes for now; a remote shard only needs the same
+submit() -> Future and abandon(future) interface as _LocalShard.
+"""
+import atexit
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, wait
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from embeddings import load_embedder
+from embeddings.cache import cached_embedder, log_cache_report
+from utils.deadline import Deadline
+
+from .chunking import ChunkStats, json_to_chunks, iter_file_chunks, is_supported
+from .dedup import ChunkDeduplicator
+from .columns import id_hash
+
+logger = logging.getLogger(__name__)
+
+# Writes are not subject to the search timeout, only to this safety net
+WRITE_TIMEOUT = 300.0
+
+
+class _PrecomputedEmbeddings:
+    """Embedder stand-in for shard workers: vectors arrive already computed"""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, *args, **kwargs):
+        raise RuntimeError("Shard workers receive embeddings, they do not compute them")
+
+
+def _shard_main(shard_id: int, requests, responses, persist_dir: str, dim: int, options: Dict[str, Any]) -> None:
+    """Shard worker loop: one DenseVectorStore, requests served in order"""
+    from .dense_store import DenseVectorStore
+
+    # Shards own their partition: no shared snapshots, no embedding server
+    os.environ.pop("SHARED_INDEX_DIR", None)
+    os.environ.pop("EMBEDDING_SOCKET", None)
+    logging.basicConfig(level=logging.WARNING)
+    store = DenseVectorStore(persist_dir=persist_dir, embedder=_PrecomputedEmbeddings(dim), **options)
+
+    while True:
+        message = requests.get()
+        if message is None:
+            return
+        request_id, command, args = message
+        try:
+            if command == "search":
+                result = store.search_vector(*args)
+            elif command == "add":
+                result = store.add_documents(*args)
+            elif command == "delete":
+                result = store.delete_documents(*args)
+            elif command == "create":
+                store.create_or_get_collection(*args)
+                result = None
+            elif command == "persist":
+                result = store.persist(*args)
+            elif command == "unload":
+                result = store.unload_collection(*args)
+            elif command == "stats":
+                result = store.get_stats(*args)
+            else:
+                raise ValueError(f"Unknown shard command: {command}")
+            responses.put((request_id, True, result))
+        except Exception as e:
+            responses.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+
+class _LocalShard:
+    """Client side of a shard worker process"""
+
+    def __init__(self, shard_id: int, context, persist_dir: str, dim: int, options: Dict[str, Any]):
+        self.shard_id = shard_id
+        self.requests = context.Queue()
+        self.responses = context.Queue()
+        self.process = context.Process(
+            target=_shard_main,
+            args=(shard_id, self.requests, self.responses, persist_dir, dim, options),
+            name=f"vector-shard-{shard_id}",
+            daemon=True
+        )
+        self.process.start()
+
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._reader = threading.Thread(target=self._read_loop, name=f"shard-{shard_id}-reader", daemon=True)
+        self._reader.start()
+
+    def submit(self, command: str, *args) -> Future:
+        future: Future = Future()
+        if not self.process.is_alive():
+            future.set_exception(RuntimeError(f"shard {self.shard_id}: process exited ({self.process.exitcode})"))
+            return future
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = future
+        self.requests.put((request_id, command, args))
+        return future
+
+    def abandon(self, future: Future) -> None:
+        """Stop waiting for a request (its late response is dropped)"""
+        with self._lock:
+            for request_id, pending in self._pending.items():
+                if pending is future:
+                    del self._pending[request_id]
+                    break
+        future.cancel()
+
+    def _read_loop(self) -> None:
+        while True:
+            message = self.responses.get()
+            if message is None:
+                return
+            request_id, ok, payload = message
+            with self._lock:
+                future = self._pending.pop(request_id, None)
+            # None: the caller already gave up on this request
+            if future is None:
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(RuntimeError(f"shard {self.shard_id}: {payload}"))
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self.process.is_alive():
+            self.requests.put(None)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+        self.responses.put(None)
+        self._reader.join(timeout)
+
+
+class ShardedVectorStore:
+    """
+    Vector store partitioned across shard worker processes
+
+    Same interface as ChromaManager; search_with_status() also reports
+    which shards answered.
+
+    Args:
+        num_shards: Number of shard processes (default: SEARCH_SHARDS)
+        persist_dir: Base directory, one sub-directory per shard
+        embedding_model: Model name used to embed queries and documents
+        timeout: Per-search shard timeout in seconds (default: SHARD_TIMEOUT_MS)
+        embedder: Pre-built embedder (default: load_embedder)
+        **shard_options: Passed to each shard's DenseVectorStore (storage, nprobe...)
+    """
+
+    LOAD_BATCH_SIZE = 256
+    # Adaptive retrieval thresholds (agents.selection): cosine similarity
+    # below which a chunk is unrelated, and drop marking a dominant hit
+    MIN_RELEVANCE = 0.3
+    SCORE_GAP = 0.15
+
+    def __init__(
+        self,
+        num_shards: int = None,
+        persist_dir: str = None,
+        embedding_model: str = None,
+        timeout: float = None,
+        embedder=None,
+        **shard_options
+    ):
+        self.num_shards = num_shards or int(os.getenv("SEARCH_SHARDS", "2"))
+        self.persist_dir = persist_dir or os.getenv("SHARDED_PERSIST_DIR", "./sharded_db")
+        self.timeout = timeout if timeout is not None else int(os.getenv("SHARD_TIMEOUT_MS", "2000")) / 1000
+        self.embedding_model_name = embedding_model or os.getenv(
+            "EMBEDDING_MODEL",
+            "sentence-transformers/all-MiniLM-L6-v2"
+        )
+        self.embedding_model = embedder or load_embedder(self.embedding_model_name)
+        # Document encoder behind the persistent embedding cache, opened on first use
+        self._document_embedder = None
+        self.dim = self.embedding_model.get_sentence_embedding_dimension()
+
+        # spawn: shard processes must not inherit model or thread state
+        context = multiprocessing.get_context("spawn")
+        self.shards = [
+            _LocalShard(i, context, os.path.join(self.persist_dir, f"shard-{i}"), self.dim, shard_options)
+            for i in range(self.num_shards)
+        ]
+        atexit.register(self.close)
+        logger.info(
+            f"ShardedVectorStore started with {self.num_shards} shards at {self.persist_dir} "
+            f"(timeout={self.timeout * 1000:.0f} ms)"
+        )
+
+    def close(self) -> None:
+        """Stop the shard processes"""
+        for shard in self.shards:
+            shard.close()
+        self.shards = []
+
+    def shard_for(self, doc_id: str) -> int:
+        return id_hash(doc_id) % self.num_shards
+
+    def _broadcast(self, command: str, *args, timeout: float = WRITE_TIMEOUT) -> List[Any]:
+        futures = [shard.submit(command, *args) for shard in self.shards]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def create_or_get_collection(self, collection_name: str):
+        """Create a collection on every shard"""
+        self._broadcast("create", collection_name)
+        return collection_name
+
+    def unload_collection(self, collection_name: str) -> None:
+        """Persist and drop a collection from every shard's memory"""
+        self._broadcast("unload", collection_name)
+
+    def persist(self, collection_name: str) -> None:
+        """Save every shard's partition to disk"""
+        self._broadcast("persist", collection_name)
+
+    def load_json_data(
+        self,
+        collection_name: str,
+        data_dir: str,
+        chunk_size: int = 500
+    ) -> int:
+        """
+        Load JSON files from a directory, spreading chunks over the shards
+
+        Returns:
+            Number of documents loaded
+        """
+        # A write path: wait for shards still opening their partition from disk
+        existing_count = self.get_stats(collection_name, timeout=WRITE_TIMEOUT).get("count", 0)
+        if existing_count > 0:
+            logger.info(f"Collection '{collection_name}' already has {existing_count} documents")
+            return existing_count
+
+        documents = []
+        metadatas = []
+        ids = []
+        doc_id = 0
+        chunk_stats = ChunkStats()
+        # First pass: near-duplicate map (CHUNK_DEDUP), applied while streaming below
+        dedup = ChunkDeduplicator.from_env()
+        if dedup is not None:
+            dedup.scan_directory(data_dir, chunk_size)
+
+        for filename in sorted(os.listdir(data_dir)):
+            if not is_supported(filename):
+                continue
+
+            filepath = os.path.join(data_dir, filename)
+            logger.info(f"Loading {filepath}")
+
+            chunks = iter_file_chunks(filepath, max_length=chunk_size)
+            if dedup is not None:
+                chunks = dedup.filter(filename, chunks)
+            for chunk in chunk_stats.track(chunks):
+                documents.append(chunk["text"])
+                metadatas.append({
+                    "source": filename,
+                    "type": chunk.get("type", "general"),
+                    "collection": collection_name,
+                    **chunk.get("metadata", {})
+                })
+                ids.append(f"{collection_name}_{doc_id}")
+                doc_id += 1
+
+                if len(documents) >= self.LOAD_BATCH_SIZE:
+                    self.add_documents(collection_name, documents, metadatas, ids)
+                    documents, metadatas, ids = [], [], []
+
+        if documents:
+            self.add_documents(collection_name, documents, metadatas, ids)
+        self.persist(collection_name)
+
+        logger.info(f"Loaded {doc_id} documents into '{collection_name}' across {self.num_shards} shards")
+        log_cache_report(self._document_embedder)
+        if dedup is not None:
+            dedup.log_summary(collection_name)
+        summary = chunk_stats.summary()
+        if summary["chunks"]:
+            logger.info(
+                f"Chunk sizes for '{collection_name}': mean={summary['mean_chars']} "
+                f"p95={summary['p95_chars']} max={summary['max_chars']} chars"
+            )
+        return doc_id
+
+    def embed_documents(self, documents: List[str], batch_size: int = 32):
+        """Embed a batch of documents, returning a float32 array"""
+        # Only chunks missing from the embedding cache (EMBEDDING_CACHE_DIR) are encoded
+        if self._document_embedder is None:
+            self._document_embedder = cached_embedder(self.embedding_model, self.embedding_model_name)
+        return self._document_embedder.encode(
+            documents,
+            batch_size=batch_size,
+            show_progress_bar=False
+        )
+
+    def max_batch_size(self) -> int:
+        return 100_000
+
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings=None
+    ) -> int:
+        """
+        Write a batch of documents, each to the shard owning its id
+
+        Returns:
+            Number of documents written
+        """
+        if embeddings is None:
+            embeddings = self.embed_documents(documents)
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+
+        by_shard: Dict[int, List[int]] = {}
+        for i, doc_id in enumerate(ids):
+            by_shard.setdefault(self.shard_for(doc_id), []).append(i)
+
+        futures = []
+        for shard_id, rows in by_shard.items():
+            futures.append(self.shards[shard_id].submit(
+                "add",
+                collection_name,
+                [documents[i] for i in rows],
+                [metadatas[i] for i in rows],
+                [ids[i] for i in rows],
+                embeddings[rows]
+            ))
+        for future in futures:
+            future.result(timeout=WRITE_TIMEOUT)
+        return len(documents)
+
+    def delete_documents(self, collection_name: str, ids: List[str]) -> int:
+        """
+        Remove documents by id from the shards owning them
+
+        Returns:
+            Number of documents removed
+        """
+        by_shard: Dict[int, List[str]] = {}
+        for doc_id in ids:
+            by_shard.setdefault(self.shard_for(doc_id), []).append(doc_id)
+        futures = [
+            self.shards[shard_id].submit("delete", collection_name, shard_ids)
+            for shard_id, shard_ids in by_shard.items()
+        ]
+        return sum(future.result(timeout=WRITE_TIMEOUT) for future in futures)
+
+    def _json_to_chunks(
+        self,
+        data: Dict[str, Any],
+        source: str,
+        max_length: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Convert JSON data to text chunks"""
+        return json_to_chunks(data, source, max_length)
+
+    def search_with_status(
+        self,
+        collection_name: str,
+        query_embedding: np.ndarray,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Scatter a query to all shards and merge their top-k lists
+
+        Shards are waited for up to the shard timeout, or until the request
+        deadline if that comes first.
+
+        Returns:
+            Dict with results, shards answered, failed shards and a partial flag
+        """
+        query_embedding = np.asarray(query_embedding, dtype=np.float32)
+        futures = {
+            shard.submit("search", collection_name, query_embedding, n_results, where, nprobe): shard.shard_id
+            for shard in self.shards
+        }
+        timeout = self.timeout if deadline is None else min(self.timeout, deadline.remaining())
+        done, not_done = wait(futures, timeout=timeout)
+
+        lists = []
+        failed = {futures[f]: "timeout" for f in not_done}
+        for future in not_done:
+            # A hung shard must not accumulate the requests nobody waits for
+            self.shards[futures[future]].abandon(future)
+        for future in done:
+            try:
+                lists.append(future.result())
+            except Exception as e:
+                failed[futures[future]] = str(e)
+
+        # Each shard list is sorted by distance: a k-way heap merge suffices
+        merged = heapq.merge(*lists, key=lambda r: r["distance"])
+        results = list(itertools.islice(merged, n_results))
+        return {
+            "results": results,
+            "shards": len(self.shards),
+            "shards_ok": len(lists),
+            "failed": failed,
+            "partial": bool(failed)
+        }
+
+    def search(
+        self,
+        collection_name: str,
+        query: str,
+        n_results: int = 3,
+        where: Optional[Dict[str, Any]] = None,
+        nprobe: Optional[int] = None,
+        deadline: Optional[Deadline] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Search in a collection across all shards
+
+        A shard that times out (or misses the request deadline) or fails is
+        skipped: the results then come from the remaining shards and a
+        warning is logged.
+        """
+        if deadline is not None and deadline.expired():
+            logger.warning(f"Deadline passed, skipping search in {collection_name}")
+            return []
+        try:
+            query_embedding = self.embedding_model.encode([query])[0]
+            status = self.search_with_status(collection_name, query_embedding, n_results, where, nprobe, deadline)
+            if status["partial"]:
+                logger.warning(
+                    f"Partial results for '{collection_name}': "
+                    f"{status['shards_ok']}/{status['shards']} shards answered ({status['failed']})"
+                )
+            return status["results"]
+        except Exception as e:
+            logger.error(f"Search error in {collection_name}: {e}")
+            return []
+
+    def get_stats(self, collection_name: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Collection statistics summed over the shards
+
+        Shards that do not answer within `timeout` (default: the shard
+        timeout) are reported as unavailable.
+        """
+        futures = [shard.submit("stats", collection_name) for shard in self.shards]
+        done, not_done = wait(futures, timeout=self.timeout if timeout is None else timeout)
+        for shard, future in zip(self.shards, futures):
+            if future in not_done:
+                shard.abandon(future)
+
+        shards = []
+        for shard_id, future in enumerate(futures):
+            if future in done and future.exception() is None:
+                stats = future.result()
+                shards.append({"shard": shard_id, "count": stats.get("count", 0), "status": stats["status"]})
+            else:
+                shards.append({"shard": shard_id, "count": 0, "status": "unavailable"})
+
+        count = sum(s["count"] for s in shards)
+        if any(s["status"] == "unavailable" for s in shards):
+            status = "degraded"
+        else:
+            status = "ready" if count > 0 else "empty"
+        return {
+            "collection": collection_name,
+            "count": count,
+            "status": status,
+            "shards": shards
+        }
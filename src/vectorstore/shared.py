@@ -0,0 +1,117 @@
+"""
+Read-only collection snapshots shared between processes
+
+A loader process publishes each DenseVectorStore collection as a
+directory of uncompressed .npy files. Worker processes attach them with
+np.load(mmap_mode='r'): vectors, inverted lists, text and metadata codes
+are served from the page cache, so every worker on the node shares one
+copy and attaching costs almost no private memory.
+
+Layout under shared_dir:
+    <collection>.current         name of the live snapshot directory
+    <collection>.<generation>/   index_*.npy, documents_*.npy, ids_*.npy,
+                                 metadatas_*.npy, manifest.json
+Publishing writes a new generation and switches `.current` atomically;
+workers that already attached keep reading their generation.
+"""
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from .ann_index import IVFIndex
+from .columns import MetadataColumns, TextColumn
+
+logger = logging.getLogger(__name__)
+
+# Older generations kept on disk for workers that have not re-attached yet
+KEEP_GENERATIONS = 2
+
+
+def _pointer_path(shared_dir: str, collection_name: str) -> str:
+    return os.path.join(shared_dir, f"{collection_name}.current")
+
+
+def publish(collection: Dict[str, Any], collection_name: str, shared_dir: str) -> str:
+    """
+    Write a snapshot of a DenseVectorStore collection
+
+    Returns:
+        Path of the snapshot directory
+    """
+    os.makedirs(shared_dir, exist_ok=True)
+    generation = f"{collection_name}.{time.time_ns()}"
+    target = os.path.join(shared_dir, generation)
+    os.makedirs(target)
+
+    arrays = {f"index_{k}": v for k, v in collection["index"].state(flat_lists=True).items()}
+    arrays.update(collection["documents"].to_arrays("documents"))
+    arrays.update(collection["ids"].to_arrays("ids"))
+    arrays.update(collection["metadatas"].to_arrays("metadatas"))
+    for name, array in arrays.items():
+        np.save(os.path.join(target, f"{name}.npy"), array)
+    with open(os.path.join(target, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump({"collection": collection_name, "arrays": sorted(arrays), "count": len(collection["ids"])}, f)
+
+    pointer = _pointer_path(shared_dir, collection_name)
+    with open(f"{pointer}.tmp", 'w', encoding='utf-8') as f:
+        f.write(generation)
+    os.replace(f"{pointer}.tmp", pointer)
+    logger.info(f"Published '{collection_name}' ({len(collection['ids'])} documents) to {target}")
+
+    _prune(shared_dir, collection_name, generation)
+    return target
+
+
+def _prune(shared_dir: str, collection_name: str, current: str) -> None:
+    # Attached workers keep their mappings alive after the files are removed
+    prefix = f"{collection_name}."
+    generations = sorted(
+        name for name in os.listdir(shared_dir)
+        if name.startswith(prefix) and name[len(prefix):].isdigit() and name != current
+    )
+    for name in generations[:-(KEEP_GENERATIONS - 1) or None]:
+        shutil.rmtree(os.path.join(shared_dir, name), ignore_errors=True)
+
+
+def _load(path: str) -> np.ndarray:
+    # Small arrays (parameters, scalars, empty lists) are simply read: mapping
+    # them saves nothing and NumPy maps 0-d arrays as shape (1,)
+    if os.path.getsize(path) < 4096:
+        return np.load(path)
+    return np.load(path, mmap_mode='r')
+
+
+def attach(collection_name: str, shared_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Map the current snapshot of a collection, read-only
+
+    Returns:
+        Collection dict as used by DenseVectorStore, or None if the
+        collection was never published
+    """
+    pointer = _pointer_path(shared_dir, collection_name)
+    if not os.path.exists(pointer):
+        return None
+    with open(pointer, 'r', encoding='utf-8') as f:
+        target = os.path.join(shared_dir, f.read().strip())
+    with open(os.path.join(target, "manifest.json"), 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    arrays = {name: _load(os.path.join(target, f"{name}.npy")) for name in manifest["arrays"]}
+    state = {k[len("index_"):]: v for k, v in arrays.items() if k.startswith("index_")}
+    collection = {
+        "index": IVFIndex.from_state(state),
+        "documents": TextColumn.from_arrays(arrays, "documents"),
+        "ids": TextColumn.from_arrays(arrays, "ids"),
+        "metadatas": MetadataColumns.from_arrays(arrays, "metadatas"),
+        "rows": None,
+        "read_only": True,
+        "snapshot": target
+    }
+    logger.info(f"Attached shared collection '{collection_name}' ({manifest['count']} documents) from {target}")
+    return collection
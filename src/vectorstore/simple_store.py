@@ -2,18 +2,29 @@
 Simple In-Memory Vector Store (Alternative à ChromaDB)
 Pour test rapide sans dépendances lourdes
 """
-import json
 import logging
 import numpy as np
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import os
 
+from utils.deadline import Deadline
+
+from .chunking import ChunkStats, json_to_chunks, iter_file_chunks, is_supported
+from .dedup import ChunkDeduplicator
+from .filters import MetadataIndex, PARTITIONED_FIELDS, matches as matches_filter
+
 logger = logging.getLogger(__name__)
 
 
 class SimpleVectorStore:
     """Simple in-memory vector store avec recherche basique"""
     
+    # Adaptive retrieval thresholds (agents.selection). Keyword scores are
+    # too coarse for a floor: any returned match qualifies, and one more
+    # matching word (0.5 -> 0.67) is not a dominant hit, an exact phrase is
+    MIN_RELEVANCE = 0.0
+    SCORE_GAP = 0.2
+    
     def __init__(self):
         self.collections = {}
         logger.info("SimpleVectorStore initialized (in-memory)")
@@ -24,18 +35,24 @@ class SimpleVectorStore:
             self.collections[collection_name] = {
                 "documents": [],
                 "metadatas": [],
-                "ids": []
+                "ids": [],
+                # Precomputed per-type / per-source partitions for filtered search
+                "index": MetadataIndex()
             }
             logger.info(f"Collection '{collection_name}' created")
         return collection_name
     
+    def unload_collection(self, collection_name: str) -> None:
+        """Drop a collection from memory (reloaded from its files by load_json_data)"""
+        self.collections.pop(collection_name, None)
+    
     def load_json_data(
         self,
         collection_name: str,
         data_dir: str,
         chunk_size: int = 500
     ) -> int:
-        """Load JSON files from a directory"""
+        """Load JSON / JSON Lines files from a directory"""
         self.create_or_get_collection(collection_name)
         
         collection = self.collections[collection_name]
@@ -46,34 +63,96 @@ class SimpleVectorStore:
             return len(collection["documents"])
         
         doc_id = 0
+        chunk_stats = ChunkStats()
+        # First pass: near-duplicate map (CHUNK_DEDUP), applied while streaming below
+        dedup = ChunkDeduplicator.from_env()
+        if dedup is not None:
+            dedup.scan_directory(data_dir, chunk_size)
         
-        # Load all JSON files
-        for filename in os.listdir(data_dir):
-            if not filename.endswith('.json'):
+        # Stream all JSON / JSON Lines files
+        for filename in sorted(os.listdir(data_dir)):
+            if not is_supported(filename):
                 continue
             
             filepath = os.path.join(data_dir, filename)
             logger.info(f"Loading {filepath}")
             
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Convert JSON to text chunks
-            chunks = self._json_to_chunks(data, filename)
-            
-            for chunk in chunks:
-                collection["documents"].append(chunk["text"])
-                collection["metadatas"].append({
-                    "source": filename,
-                    "type": chunk.get("type", "general"),
-                    "collection": collection_name
-                })
-                collection["ids"].append(f"{collection_name}_{doc_id}")
+            chunks = iter_file_chunks(filepath, max_length=chunk_size)
+            if dedup is not None:
+                chunks = dedup.filter(filename, chunks)
+            for chunk in chunk_stats.track(chunks):
+                self._append(
+                    collection,
+                    chunk["text"],
+                    {
+                        "source": filename,
+                        "type": chunk.get("type", "general"),
+                        "collection": collection_name,
+                        **chunk.get("metadata", {})
+                    },
+                    f"{collection_name}_{doc_id}"
+                )
                 doc_id += 1
         
         logger.info(f"Loaded {len(collection['documents'])} documents into '{collection_name}'")
+        if dedup is not None:
+            dedup.log_summary(collection_name)
+        summary = chunk_stats.summary()
+        if summary["chunks"]:
+            logger.info(
+                f"Chunk sizes for '{collection_name}': mean={summary['mean_chars']} "
+                f"p95={summary['p95_chars']} max={summary['max_chars']} chars"
+            )
         return len(collection["documents"])
     
+    def embed_documents(self, documents: List[str], batch_size: int = 32):
+        """Keyword store: no embeddings"""
+        return None
+    
+    def max_batch_size(self) -> int:
+        """No write limit for the in-memory store"""
+        return 100_000
+    
+    def add_documents(
+        self,
+        collection_name: str,
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str],
+        embeddings=None
+    ) -> int:
+        """Append a batch of documents to a collection (embeddings ignored)"""
+        self.create_or_get_collection(collection_name)
+        collection = self.collections[collection_name]
+        for document, metadata, doc_id in zip(documents, metadatas, ids):
+            self._append(collection, document, metadata, doc_id)
+        return len(documents)
+    
+    def delete_documents(self, collection_name: str, ids: List[str]) -> int:
+        """Remove documents from a collection by id, returning how many were removed"""
+        if collection_name not in self.collections:
+            return 0
+        collection = self.collections[collection_name]
+        doomed = set(ids)
+        kept = [
+            (document, metadata, doc_id)
+            for document, metadata, doc_id in zip(collection["documents"], collection["metadatas"], collection["ids"])
+            if doc_id not in doomed
+        ]
+        removed = len(collection["ids"]) - len(kept)
+        if removed:
+            # Rows are renumbered: rebuild the partitions too
+            collection.update(documents=[], metadatas=[], ids=[], index=MetadataIndex())
+            for document, metadata, doc_id in kept:
+                self._append(collection, document, metadata, doc_id)
+        return removed
+    
+    def _append(self, collection: Dict[str, Any], document: str, metadata: Dict[str, Any], doc_id: str) -> None:
+        collection["index"].add(len(collection["documents"]), metadata)
+        collection["documents"].append(document)
+        collection["metadatas"].append(metadata)
+        collection["ids"].append(doc_id)
+    
     def _json_to_chunks(
         self,
         data: Dict[str, Any],
@@ -81,60 +160,28 @@ class SimpleVectorStore:
         max_length: int = 500
     ) -> List[Dict[str, Any]]:
         """Convert JSON data to text chunks"""
-        chunks = []
-        
-        def process_value(key: str, value: Any, parent_key: str = "") -> None:
-            full_key = f"{parent_key}.{key}" if parent_key else key
-            
-            if isinstance(value, dict):
-                for k, v in value.items():
-                    process_value(k, v, full_key)
-            elif isinstance(value, list):
-                for i, item in enumerate(value):
-                    if isinstance(item, dict):
-                        text = f"{full_key}: " + json.dumps(item, ensure_ascii=False)
-                        if len(text) > max_length:
-                            for i in range(0, len(text), max_length):
-                                chunks.append({
-                                    "text": text[i:i+max_length],
-                                    "type": full_key,
-                                    "source": source
-                                })
-                        else:
-                            chunks.append({
-                                "text": text,
-                                "type": full_key,
-                                "source": source
-                            })
-                    else:
-                        text = f"{full_key}[{i}]: {item}"
-                        chunks.append({
-                            "text": text,
-                            "type": full_key,
-                            "source": source
-                        })
-            else:
-                text = f"{full_key}: {value}"
-                chunks.append({
-                    "text": text,
-                    "type": full_key,
-                    "source": source
-                })
-        
-        for key, value in data.items():
-            process_value(key, value)
-        
-        return chunks
+        return json_to_chunks(data, source, max_length)
     
     def search(
         self,
         collection_name: str,
         query: str,
-        n_results: int = 3
+        n_results: int = 3,
+        where: Dict[str, Any] = None,
+        deadline: Optional[Deadline] = None
     ) -> List[Dict[str, Any]]:
-        """Simple keyword-based search (pas de embeddings)"""
+        """
+        Simple keyword-based search (pas de embeddings)
+        
+        A `where` metadata filter (ChromaDB syntax) restricts scoring to
+        the matching type/source partitions instead of the whole collection.
+        Nothing is searched once the request `deadline` has passed.
+        """
         if collection_name not in self.collections:
             return []
+        if deadline is not None and deadline.expired():
+            logger.warning(f"Deadline passed, skipping search in {collection_name}")
+            return []
         
         collection = self.collections[collection_name]
         
@@ -142,9 +189,21 @@ class SimpleVectorStore:
         query_lower = query.lower()
         query_words = set(query_lower.split())
         
+        # Restrict to the filter's partitions
+        rows = collection["index"].candidates(where)
+        if rows is None:
+            rows = range(len(collection["documents"]))
+        else:
+            rows = sorted(rows)
+        exact_partitions = where is None or _partitioned_only(where)
+        
         # Score each document
         scored_docs = []
-        for i, doc in enumerate(collection["documents"]):
+        documents = collection["documents"]
+        for i in rows:
+            if not exact_partitions and not matches_filter(collection["metadatas"][i], where):
+                continue
+            doc = documents[i]
             doc_lower = doc.lower()
             doc_words = set(doc_lower.split())
             
@@ -186,5 +245,20 @@ class SimpleVectorStore:
         }
 
 
+def _partitioned_only(where: Dict[str, Any]) -> bool:
+    """Whether partition lookups alone resolve a filter exactly"""
+    for key, condition in where.items():
+        if key in ("$and", "$or"):
+            if not all(_partitioned_only(clause) for clause in condition):
+                return False
+        elif key not in PARTITIONED_FIELDS:
+            return False
+        elif isinstance(condition, dict) and (len(condition) != 1 or set(condition) - {"$eq", "$in"}):
+            # MetadataIndex only resolves a lone $eq or $in; anything else
+            # (including $eq and $in together) needs the per-row check
+            return False
+    return True
+
+
 # Alias pour compatibilité
 ChromaManager = SimpleVectorStore
@@ -0,0 +1,164 @@
+"""
+IVF index against exact search, and its persistence
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.ann_index import IVFIndex, normalize_rows
+
+DIM = 32
+K = 10
+
+
+def clustered(count: int, seed: int) -> np.ndarray:
+    """Vectors around 40 centres, like embeddings of related chunks"""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((40, DIM))
+    return (centres[rng.integers(0, 40, count)] + 0.35 * rng.standard_normal((count, DIM))).astype(np.float32)
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return clustered(4000, seed=1)
+
+
+@pytest.fixture(scope="module")
+def queries():
+    return clustered(50, seed=2)
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int = K, rows=None) -> np.ndarray:
+    scores = normalize_rows(vectors) @ normalize_rows(query)[0]
+    if rows is not None:
+        order = rows[np.argsort(-scores[rows], kind="stable")]
+    else:
+        order = np.argsort(-scores, kind="stable")
+    return order[:k]
+
+
+def recall(index: IVFIndex, vectors: np.ndarray, queries: np.ndarray, **search) -> float:
+    hits = 0
+    for query in queries:
+        rows, _ = index.search(query, K, **search)
+        hits += len(set(rows.tolist()) & set(exact_top_k(vectors, query).tolist()))
+    return hits / (K * len(queries))
+
+
+def build(vectors: np.ndarray, **options) -> IVFIndex:
+    index = IVFIndex(DIM, train_threshold=1000, **options)
+    for start in range(0, len(vectors), 500):
+        index.add(vectors[start:start + 500])
+    return index
+
+
+def test_untrained_index_is_exact(vectors, queries):
+    index = IVFIndex(DIM, train_threshold=len(vectors) + 1)
+    index.add(vectors)
+    assert not index.trained
+    for query in queries[:10]:
+        rows, scores = index.search(query, K)
+        assert rows.tolist() == exact_top_k(vectors, query).tolist()
+        assert np.all(np.diff(scores) <= 1e-6)
+
+
+def test_trained_index_recall(vectors, queries):
+    index = build(vectors)
+    assert index.trained and index.size == len(vectors)
+    assert recall(index, vectors, queries, nprobe=8) >= 0.9
+    # Probing every list is exact
+    assert recall(index, vectors, queries, nprobe=len(index.centroids)) == 1.0
+
+
+def test_masked_search_only_returns_allowed_rows(vectors, queries):
+    index = build(vectors, exact_threshold=100)
+    mask = np.zeros(len(vectors), dtype=bool)
+    mask[::7] = True
+    allowed = np.flatnonzero(mask)
+    for query in queries[:10]:
+        rows, _ = index.search(query, K, mask=mask)
+        assert len(rows) == K and mask[rows].all()
+        # Selective masks below exact_threshold are scored exactly
+        few = np.zeros(len(vectors), dtype=bool)
+        few[allowed[:50]] = True
+        rows, _ = index.search(query, K, mask=few)
+        assert rows.tolist() == exact_top_k(vectors, query, rows=allowed[:50]).tolist()
+
+
+def test_update_replaces_a_vector(vectors, queries):
+    index = build(vectors)
+    index.update(123, queries[0])
+    rows, scores = index.search(queries[0], 1, nprobe=len(index.centroids))
+    assert rows[0] == 123 and scores[0] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_save_and_load_round_trip(vectors, queries, tmp_path):
+    index = build(vectors)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert loaded.size == index.size and loaded.trained
+    for query in queries[:10]:
+        expected_rows, expected_scores = index.search(query, K)
+        rows, scores = loaded.search(query, K)
+        assert rows.tolist() == expected_rows.tolist()
+        np.testing.assert_allclose(scores, expected_scores, rtol=1e-6)
+    # A loaded index keeps accepting inserts
+    new_rows = loaded.add(queries[:3])
+    assert new_rows.tolist() == [len(vectors), len(vectors) + 1, len(vectors) + 2]
+    rows, _ = loaded.search(queries[1], 1, nprobe=len(loaded.centroids))
+    assert rows[0] == len(vectors) + 1
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_storage_recall(vectors, queries, storage):
+    index = build(vectors, storage=storage)
+    assert index._codes.dtype == np.dtype(storage)
+    assert recall(index, vectors, queries, nprobe=len(index.centroids)) >= 0.95
+    assert recall(index, vectors, queries, nprobe=8) >= 0.85
+    assert index.nbytes < build(vectors).nbytes
+
+
+def test_int8_rescoring_from_disk(vectors, queries, tmp_path):
+    rescore_path = str(tmp_path / "raw.f32")
+    index = build(vectors, storage="int8", rescore_path=rescore_path)
+    plain = build(vectors, storage="int8")
+    nprobe = len(index.centroids)
+    assert recall(index, vectors, queries, nprobe=nprobe) >= recall(plain, vectors, queries, nprobe=nprobe)
+    # Rescored similarities are the full-precision ones
+    rows, scores = index.search(queries[0], K, nprobe=nprobe)
+    expected = normalize_rows(vectors[rows]) @ normalize_rows(queries[0])[0]
+    np.testing.assert_allclose(scores, expected, rtol=1e-5)
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_save_and_load(vectors, queries, storage, tmp_path):
+    rescore_path = str(tmp_path / "raw.f32")
+    index = build(vectors, storage=storage, rescore_path=rescore_path)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path, rescore_path=rescore_path)
+    assert loaded.storage == storage and loaded.raw is not None
+    for query in queries[:10]:
+        assert loaded.search(query, K)[0].tolist() == index.search(query, K)[0].tolist()
+
+
+@pytest.mark.parametrize("storage", ["float32", "int8"])
+def test_compact_renumbers_kept_rows(vectors, queries, storage, tmp_path):
+    index = build(vectors, storage=storage, rescore_path=str(tmp_path / "raw.f32"))
+    keep = np.flatnonzero(np.arange(len(vectors)) % 3 != 0)
+    index.compact(keep)
+    assert index.size == len(keep) and index.trained
+    kept = vectors[keep]
+    assert recall(index, kept, queries, nprobe=len(index.centroids)) >= 0.95
+    # Rescoring reads the compacted full-precision copies
+    rows, scores = index.search(queries[0], K, nprobe=len(index.centroids))
+    np.testing.assert_allclose(scores, normalize_rows(kept[rows]) @ normalize_rows(queries[0])[0], rtol=1e-5)
+    assert index.add(queries[:1]).tolist() == [len(keep)]
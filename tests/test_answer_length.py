@@ -0,0 +1,40 @@
+"""
+Question types that size the generation budget
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from agents.answer_length import ANSWER_PROFILES, answer_profile, classify_question
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("À quelle heure commence la keynote ?", "factual"),
+    ("Où se déroule le DevFest ?", "factual"),
+    ("Qui présente le panel ?", "factual"),
+    ("Combien de speakers y a-t-il ?", "factual"),
+    ("How many speakers are there?", "factual"),
+    ("How long is the hackathon?", "factual"),
+    ("Quels sont les sponsors ?", "list"),
+    ("List the speakers", "list"),
+    ("Pourquoi venir au DevFest ?", "explanation"),
+    ("How does the hackathon work?", "explanation"),
+    ("Qui est Kimana ?", "explanation"),
+    ("Parle-moi de ses projets", "explanation"),
+    ("Kubernetes", "explanation"),
+])
+def test_classify_question(question, expected):
+    assert classify_question(question) == expected
+
+
+def test_answer_profile_carries_the_type():
+    profile = answer_profile("How many speakers are there?")
+    assert profile["type"] == "factual"
+    assert profile["max_tokens"] == ANSWER_PROFILES["factual"]["max_tokens"]
+    assert profile["max_tokens"] < ANSWER_PROFILES["explanation"]["max_tokens"]
@@ -0,0 +1,112 @@
+"""
+Streaming JSON / JSON Lines chunking against the in-memory chunker
+Run from project root: python3 -m pytest tests
+"""
+import io
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.chunking import (
+    ChunkingPolicy,
+    _IncrementalJSONReader,
+    _walk,
+    chunk_file,
+    json_to_chunks,
+)
+
+DATA_FILES = sorted((project_root / "data").glob("*/*.json"))
+
+DOCUMENT = {
+    "event": {"name": "DevFest", "year": 2025, "ratio": 1.5e-3, "free": True, "venue": None},
+    "schedule": [
+        {"time": "09:00 - 09:30", "title": "Accueil", "speakers": []},
+        {"time": "09:30 - 10:00", "title": "Keynote « IA »", "speakers": ["A", "B"], "notes": "x" * 1200},
+    ],
+    "tags": ["cloud", 12345678901234567890, -0.25, {"nested": [1, 2]}],
+    "empty": {},
+}
+
+
+@pytest.mark.parametrize("path", DATA_FILES, ids=lambda p: f"{p.parent.name}/{p.name}")
+@pytest.mark.parametrize("policy", [ChunkingPolicy(500), ChunkingPolicy.legacy(500)], ids=["structured", "legacy"])
+def test_streaming_matches_in_memory_on_data(path, policy):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    assert chunk_file(str(path), policy=policy) == json_to_chunks(data, path.name, policy=policy)
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 64, 1 << 16])
+def test_reader_events_do_not_depend_on_block_size(block_size):
+    # Tiny blocks cut numbers, strings and escapes across buffer refills
+    reader = _IncrementalJSONReader(io.StringIO(json.dumps(DOCUMENT, indent=1)), block_size=block_size)
+    assert list(reader.events()) == list(_walk(DOCUMENT, ""))
+
+
+def test_top_level_array_is_keyed_by_file_name(tmp_path):
+    records = DOCUMENT["schedule"]
+    path = tmp_path / "sessions.json"
+    path.write_text(json.dumps(records), encoding='utf-8')
+    chunks = chunk_file(str(path), policy=ChunkingPolicy(500))
+    assert chunks == json_to_chunks(records, "sessions.json", policy=ChunkingPolicy(500))
+    assert {chunk["type"] for chunk in chunks} == {"sessions"}
+
+
+def test_json_lines_match_the_equivalent_array(tmp_path):
+    records = DOCUMENT["schedule"] + [{"time": "10:00 - 10:30", "title": "Pause"}]
+    path = tmp_path / "sessions.jsonl"
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n\n", encoding='utf-8')
+    policy = ChunkingPolicy(200)
+    assert chunk_file(str(path), policy=policy) == json_to_chunks(records, "sessions.jsonl", policy=policy)
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "broken.json"
+    path.write_text('{"a": [1, 2', encoding='utf-8')
+    with pytest.raises(json.JSONDecodeError):
+        chunk_file(str(path))
+
+
+def test_structured_policy_keeps_small_records_whole():
+    chunks = json_to_chunks(DOCUMENT["schedule"][:1], "agenda.json", policy=ChunkingPolicy(500))
+    assert [c["text"] for c in chunks] == ['agenda: {"time": "09:00 - 09:30", "title": "Accueil", "speakers": []}']
+
+
+def test_split_record_pieces_fit_and_repeat_key_fields():
+    record = {"name": "Kimana", "role": "CTO", "bio": "word " * 60, "talks": ["a" * 40, "b" * 40], "city": "Abidjan"}
+    policy = ChunkingPolicy(120)
+    chunks = json_to_chunks([record], "speakers.json", policy=policy)
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= policy.max_length for c in chunks)
+    # Every piece that starts a record carries the identifying field
+    # (continuations of a word-split field do not)
+    starts = [c["text"] for c in chunks if c["text"].startswith("speakers: {")]
+    assert len(starts) >= 3
+    assert all(text.startswith('speakers: {"name": "Kimana"') for text in starts)
+    assert all(value in " ".join(c["text"] for c in chunks) for value in ("CTO", "Abidjan", "a" * 40))
+
+
+def test_structured_policy_groups_sibling_scalars():
+    chunks = json_to_chunks({"event": DOCUMENT["event"]}, "event.json", policy=ChunkingPolicy(500))
+    assert [c["text"] for c in chunks] == [
+        "event: name: DevFest | year: 2025 | ratio: 0.0015 | free: True | venue: None"
+    ]
+
+
+def test_legacy_policy_emits_one_chunk_per_scalar():
+    chunks = json_to_chunks({"event": DOCUMENT["event"]}, "event.json", policy=ChunkingPolicy.legacy(500))
+    assert [c["text"] for c in chunks] == [
+        "event.name: DevFest", "event.year: 2025", "event.ratio: 0.0015", "event.free: True", "event.venue: None"
+    ]
+
+
+def test_oversized_scalar_is_split_on_words():
+    chunks = json_to_chunks({"about": "mot " * 100}, "profile.json", policy=ChunkingPolicy(50))
+    assert len(chunks) > 1
+    assert all(len(c["text"]) <= 50 for c in chunks)
@@ -0,0 +1,82 @@
+"""
+Columnar chunk storage: texts, metadata filters and id lookups
+Run from project root: python3 -m pytest tests
+"""
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.columns import IdMap, MetadataColumns, TextColumn
+from vectorstore.filters import matches
+
+WHERE = [
+    {"type": "schedule"},
+    {"type": {"$in": ["schedule", "profile"]}, "level": {"$ne": 2}},
+    {"$or": [{"type": "profile"}, {"source": {"$nin": ["agenda.json"]}}]},
+    {"$and": [{"level": {"$in": [0, 1]}}, {"type": {"$ne": "speakers"}}]},
+    {"missing": {"$ne": "x"}},
+    {"missing": "x"},
+]
+
+
+@pytest.fixture(scope="module")
+def metadatas():
+    rng = random.Random(3)
+    rows = []
+    for _ in range(2500):
+        metadata = {"type": rng.choice(["schedule", "speakers", "profile"]), "source": rng.choice(["agenda.json", "speakers.json"])}
+        if rng.random() < 0.7:
+            metadata["level"] = rng.randint(0, 3)
+        rows.append(metadata)
+    return rows
+
+
+@pytest.mark.parametrize("where", WHERE, ids=str)
+def test_mask_matches_per_row_filter(metadatas, where):
+    columns = MetadataColumns()
+    for metadata in metadatas:
+        columns.append(metadata)
+    expected = np.array([matches(m, where) for m in metadatas])
+    np.testing.assert_array_equal(columns.mask(where), expected)
+
+
+def test_metadata_round_trip(metadatas):
+    columns = MetadataColumns()
+    for metadata in metadatas:
+        columns.append(metadata)
+    columns.set(5, {"type": "profile"})
+    restored = MetadataColumns.from_arrays(columns.to_arrays("meta"), "meta")
+    assert [restored[i] for i in range(len(restored))] == [columns[i] for i in range(len(columns))]
+    assert restored[5] == {"type": "profile"}
+    assert [columns[i] for i in range(10) if i != 5] == [m for i, m in enumerate(metadatas[:10]) if i != 5]
+
+
+def test_text_column_round_trip():
+    texts = TextColumn()
+    values = [f"chunk {i} — é" * (i % 5) for i in range(3000)]
+    texts.extend(values)
+    texts.set(7, "rewritten")
+    values[7] = "rewritten"
+    assert list(texts) == values
+    restored = TextColumn.from_arrays(texts.to_arrays("text"), "text")
+    restored.append("after")
+    assert list(restored) == values + ["after"]
+
+
+def test_id_map_lookups_across_merges():
+    ids = TextColumn()
+    id_map = IdMap(ids, merge_threshold=100)
+    for row in range(1000):
+        ids.append(f"doc_{row}")
+        id_map.add(f"doc_{row}", row)
+    assert all(id_map.get(f"doc_{row}") == row for row in range(0, 1000, 37))
+    assert id_map.get("doc_missing") is None
+    built = IdMap.build(ids)
+    assert built.get("doc_999") == 999
@@ -0,0 +1,25 @@
+"""
+Combined agent prompt built from the agents it wraps
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from agents import CombinedAgent, ConfiguredAgent, KimanaAgent
+
+
+def test_prompt_names_each_wrapped_agent():
+    agents = [
+        ConfiguredAgent("Meetup Agent", "meetup_docs", None, None, description="les meetups GDG Bouaké"),
+        ConfiguredAgent("Notes Agent", "notes_docs", None, None),
+        KimanaAgent(None, None),
+    ]
+    prompt = CombinedAgent(agents, None, None).system_prompt
+    assert "- Meetup Agent : les meetups GDG Bouaké" in prompt
+    assert "- Notes Agent\n" in prompt
+    assert f"- Kimana Agent : {KimanaAgent.description}" in prompt
+    assert "DevFest" not in prompt
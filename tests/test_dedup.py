@@ -0,0 +1,91 @@
+"""
+Near-duplicate chunk elimination (MinHash/LSH) at ingestion
+Run from project root: python3 -m pytest tests
+"""
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.dedup import ChunkDeduplicator
+from vectorstore.simple_store import SimpleVectorStore
+
+BIO = (
+    "Kimana Misago est ingénieure logicielle à Abidjan, spécialisée en systèmes distribués, "
+    "en apprentissage automatique et en outils pour développeurs ; elle anime des ateliers "
+    "sur Kubernetes et Python dans les communautés tech d'Afrique de l'Ouest depuis 2019"
+)
+OTHER = (
+    "Le DevFest Abidjan réunit chaque année développeurs, étudiants et entreprises autour "
+    "de conférences sur le cloud, le web, le mobile et l'intelligence artificielle"
+)
+
+
+def chunks(*texts):
+    return [{"text": text, "type": "profile"} for text in texts]
+
+
+def test_signature_similarity_tracks_jaccard():
+    dedup = ChunkDeduplicator(threshold=0.85)
+    same = dedup.signature(BIO)
+    assert np.array_equal(same, dedup.signature(BIO.upper()))
+    near = np.mean(same == dedup.signature(BIO + " et 2020"))
+    far = np.mean(same == dedup.signature(OTHER))
+    assert near >= 0.85 > far
+
+
+def test_near_duplicates_across_files_are_dropped():
+    dedup = ChunkDeduplicator(threshold=0.85)
+    files = {
+        "profile.json": chunks(BIO, OTHER),
+        "speakers.json": chunks(OTHER + ".", "Un texte sans rapport avec le reste"),
+        "projects.json": chunks(BIO + " et 2020"),
+    }
+    dedup.scan(files.items())
+    kept = {source: list(dedup.filter(source, items)) for source, items in files.items()}
+    assert [c["text"] for c in kept["profile.json"]] == [BIO, OTHER]
+    assert [c["text"] for c in kept["speakers.json"]] == ["Un texte sans rapport avec le reste"]
+    assert kept["projects.json"] == []
+    # The canonical chunks remember where their duplicates came from
+    assert kept["profile.json"][0]["metadata"] == {"sources": "profile.json, projects.json"}
+    assert kept["profile.json"][1]["metadata"] == {"sources": "profile.json, speakers.json"}
+    summary = dedup.summary()
+    assert (summary["chunks"], summary["duplicates"]) == (5, 2)
+
+
+def test_distinct_chunks_are_kept():
+    dedup = ChunkDeduplicator(threshold=0.85)
+    texts = [f"Session {i} : {word} avec l'équipe {i * 7}" for i, word in enumerate(["cloud", "web", "mobile", "IA"])]
+    dedup.scan([("agenda.json", chunks(*texts))])
+    assert [c["text"] for c in dedup.filter("agenda.json", chunks(*texts))] == texts
+    assert dedup.summary()["duplicates"] == 0
+
+
+def test_threshold_controls_what_counts_as_duplicate():
+    edited = BIO.replace("systèmes distribués", "bases de données").replace("2019", "2021")
+    strict, loose = ChunkDeduplicator(threshold=0.99), ChunkDeduplicator(threshold=0.5)
+    for dedup in (strict, loose):
+        dedup.scan([("a.json", chunks(BIO)), ("b.json", chunks(edited))])
+    assert strict.summary()["duplicates"] == 0
+    assert loose.summary()["duplicates"] == 1
+
+
+def test_store_loads_each_duplicate_once(tmp_path, monkeypatch):
+    (tmp_path / "a.json").write_text(json.dumps({"profile": {"bio": BIO}}), encoding="utf-8")
+    (tmp_path / "b.json").write_text(json.dumps({"profile": {"bio": BIO}, "event": {"about": OTHER}}), encoding="utf-8")
+    monkeypatch.setenv("CHUNK_DEDUP", "true")
+    deduplicated = SimpleVectorStore().load_json_data("docs", str(tmp_path))
+    monkeypatch.setenv("CHUNK_DEDUP", "false")
+    assert ChunkDeduplicator.from_env() is None
+    assert deduplicated == SimpleVectorStore().load_json_data("docs", str(tmp_path)) - 1
+
+
+def test_bands_must_divide_permutations():
+    with pytest.raises(ValueError):
+        ChunkDeduplicator(num_perm=64, bands=10)
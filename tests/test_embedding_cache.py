@@ -0,0 +1,125 @@
+"""
+Persistent embedding cache: lookups, eviction and the caching embedder
+Run from project root: python3 -m pytest tests
+"""
+import hashlib
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from embeddings.cache import CachedEmbedder, EmbeddingCache, cache_key, cached_embedder
+
+DIM = 8
+
+
+class CountingModel:
+    """Deterministic embedder that records the texts it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.encoded.extend(texts)
+        return np.array([vector(t) for t in texts], dtype=np.float32)
+
+
+def vector(text: str) -> np.ndarray:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return np.frombuffer(digest[:DIM * 4], dtype=np.uint32).astype(np.float32) / 2 ** 32 - 0.5
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache"), max_bytes=1 << 20)
+    yield cache
+    cache.close()
+
+
+def test_put_and_get_round_trip(cache):
+    keys = [cache_key("m", f"text {i}") for i in range(3)]
+    vectors = np.array([vector(f"text {i}") for i in range(3)])
+    cache.put_many("m", keys, vectors)
+    found = cache.get_many(keys + [cache_key("m", "absent")])
+    assert set(found) == set(keys)
+    for key, expected in zip(keys, vectors):
+        np.testing.assert_array_equal(found[key], expected)
+
+
+def test_key_depends_on_model_and_text():
+    assert cache_key("a", "text") == cache_key("a", "text")
+    assert cache_key("a", "text") != cache_key("b", "text")
+    assert cache_key("a", "text") != cache_key("a", "text ")
+
+
+def test_cached_embedder_only_encodes_misses(cache):
+    model = CountingModel()
+    embedder = CachedEmbedder(model, "m", cache)
+    texts = ["a", "b", "a", "c"]
+    np.testing.assert_array_equal(embedder.encode(texts), np.array([vector(t) for t in texts]))
+    # Duplicates are encoded once
+    assert model.encoded == ["a", "b", "c"]
+    np.testing.assert_array_equal(embedder.encode(["c", "d"]), np.array([vector("c"), vector("d")]))
+    assert model.encoded == ["a", "b", "c", "d"]
+    assert embedder.encode("a").shape == (DIM,)
+    assert embedder.encode([]).shape == (0, DIM)
+    report = cache.report()
+    assert (report["hits"], report["misses"]) == (2, 5)
+    assert report["entries"] == 4
+
+
+def test_other_model_does_not_reuse_vectors(cache):
+    first, second = CountingModel(), CountingModel()
+    CachedEmbedder(first, "model-a", cache).encode(["a"])
+    CachedEmbedder(second, "model-b", cache).encode(["a"])
+    assert second.encoded == ["a"]
+
+
+def test_least_recently_used_vectors_are_evicted(tmp_path):
+    row_bytes = DIM * 4
+    cache = EmbeddingCache(str(tmp_path / "cache"), max_bytes=3 * row_bytes)
+    try:
+        keys = [cache_key("m", str(i)) for i in range(4)]
+        for key in keys[:3]:
+            cache.put_many("m", [key], np.ones((1, DIM)))
+        # Touch the oldest so the second one is evicted instead
+        cache.get_many([keys[0]])
+        cache.put_many("m", [keys[3]], np.ones((1, DIM)))
+        assert set(cache.get_many(keys)) == {keys[0], keys[2], keys[3]}
+        assert cache.stats["evicted"] == 1
+        assert cache.size()["entries"] == 3
+    finally:
+        cache.close()
+
+
+def test_vectors_persist_across_reopen(tmp_path):
+    path = str(tmp_path / "cache")
+    cache = EmbeddingCache(path, max_bytes=1 << 20)
+    CachedEmbedder(CountingModel(), "m", cache).encode(["a", "b"])
+    cache.close()
+    reopened = EmbeddingCache(path, max_bytes=1 << 20)
+    try:
+        model = CountingModel()
+        CachedEmbedder(model, "m", reopened).encode(["a", "b"])
+        assert model.encoded == []
+    finally:
+        reopened.close()
+
+
+def test_cache_is_disabled_unless_configured(monkeypatch, tmp_path):
+    monkeypatch.delenv("EMBEDDING_CACHE_DIR", raising=False)
+    assert EmbeddingCache.from_env() is None
+    model = CountingModel()
+    assert cached_embedder(model, "m") is model
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path / "cache"))
+    wrapped = cached_embedder(model, "m")
+    assert isinstance(wrapped, CachedEmbedder)
+    wrapped.cache.close()
@@ -0,0 +1,100 @@
+"""
+Embedding service: wire format, dynamic batching and HTTP endpoint
+Run from project root: python3 -m pytest tests
+"""
+import hashlib
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+import requests
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from embeddings.client import HttpEmbedder
+from embeddings.service import DynamicBatcher, EmbeddingService
+from embeddings.wire import pack_vectors, unpack_vectors
+
+DIM = 8
+
+
+class HashModel:
+    """Deterministic SentenceTransformer stand-in that records its batches"""
+
+    def __init__(self):
+        self.batches = []
+        self.lock = threading.Lock()
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        with self.lock:
+            self.batches.append(len(texts))
+        return np.array([vector(t) for t in texts], dtype=np.float32)
+
+
+def vector(text: str) -> np.ndarray:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return np.frombuffer(digest[:DIM * 4], dtype=np.uint32).astype(np.float32) / 2 ** 32 - 0.5
+
+
+@pytest.mark.parametrize("dtype, tolerance", [("float32", 0), ("float16", 1e-3)])
+def test_wire_round_trip(dtype, tolerance):
+    vectors = np.random.default_rng(0).standard_normal((17, 384)).astype(np.float32)
+    decoded = unpack_vectors(pack_vectors(vectors, dtype))
+    assert decoded.dtype == np.float32 and decoded.shape == vectors.shape
+    np.testing.assert_allclose(decoded, vectors, atol=tolerance * np.abs(vectors).max())
+
+
+def test_wire_rejects_bad_payloads():
+    payload = pack_vectors(np.ones((2, 3), dtype=np.float32))
+    for bad in (payload[:10], payload[:-1], b"XXXX" + payload[4:]):
+        with pytest.raises(ValueError):
+            unpack_vectors(bad)
+    with pytest.raises(ValueError):
+        pack_vectors(np.ones((1, 3)), "int8")
+
+
+def test_batcher_groups_concurrent_requests_and_keeps_order():
+    model = HashModel()
+    batcher = DynamicBatcher(model, max_batch_size=64, max_wait_ms=50)
+    try:
+        requests_texts = [[f"q{i}-{j}" for j in range(i % 3 + 1)] for i in range(24)]
+        with ThreadPoolExecutor(max_workers=24) as pool:
+            results = list(pool.map(batcher.encode, requests_texts))
+        for texts, vectors in zip(requests_texts, results):
+            np.testing.assert_array_equal(vectors, np.array([vector(t) for t in texts]))
+        assert len(model.batches) < len(requests_texts)
+        assert max(model.batches) <= 64 + 3
+        assert batcher.encode([]).shape == (0, DIM)
+    finally:
+        batcher.close()
+
+
+@pytest.fixture(scope="module")
+def service():
+    service = EmbeddingService(HashModel(), "hash", host="127.0.0.1", port=0, max_wait_ms=1)
+    service.start()
+    yield service
+    service.close()
+
+
+def test_http_embedder_round_trip(service):
+    embedder = HttpEmbedder(service.address, dtype="float32")
+    texts = ["Kimana Misago", "DevFest Abidjan", "é"]
+    np.testing.assert_array_equal(embedder.encode(texts), np.array([vector(t) for t in texts]))
+    assert embedder.encode("seul").shape == (DIM,)
+    assert embedder.get_sentence_embedding_dimension() == DIM
+
+
+@pytest.mark.parametrize("body", [{"texts": 5}, {"texts": "a"}, {"texts": [1]}, [1], {"texts": ["a"], "dtype": "int8"}, {}])
+def test_invalid_requests_get_400(service, body):
+    response = requests.post(f"{service.address}/encode", json=body, timeout=5)
+    assert response.status_code == 400
+    assert "error" in response.json()
@@ -0,0 +1,69 @@
+"""
+EventIndex lookups on the DevFest data
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from agents.event_index import EventIndex
+
+
+@pytest.fixture(scope="module")
+def index():
+    return EventIndex(str(project_root / "data" / "devfest"))
+
+
+@pytest.mark.parametrize("question", [
+    "Où se trouve le stand de Orange ?",
+    "Y a-t-il un parking où se garer ?",
+    "Où est la salle du talk de Kimana ?",
+])
+def test_places_the_index_does_not_know_fall_back_to_rag(index, question):
+    assert index.lookup(question) is None
+
+
+def test_event_venue(index):
+    hit = index.lookup("Où se déroule le DevFest ?")
+    assert hit is not None
+    assert hit["intent"] == "venue"
+    assert "Palm Club" in hit["answer"]
+
+
+def test_session_time(index):
+    hit = index.lookup("À quelle heure parle Kimana ?")
+    assert hit is not None
+    assert hit["intent"] == "time"
+
+
+@pytest.mark.parametrize("question", [
+    "Qui est Kimana ?",
+    "Who is Kimana?",
+    "Pourquoi le talk de Kimana commence-t-il en retard ?",
+    "Comment se passe le talk de Kimana ?",
+    "Le sponsor Google a-t-il un stand ?",
+])
+def test_identity_explanations_and_single_sponsor_fall_back_to_rag(index, question):
+    assert index.lookup(question) is None
+
+
+def test_who_speaks_in_a_session(index):
+    hit = index.lookup("Qui présente la keynote ?")
+    assert hit is not None
+    assert hit["intent"] == "who"
+
+
+@pytest.mark.parametrize("question", [
+    "Quels sont les sponsors ?",
+    "Liste des partenaires",
+    "Who are the sponsors?",
+])
+def test_sponsor_list(index, question):
+    hit = index.lookup(question)
+    assert hit is not None
+    assert hit["intent"] == "sponsors"
@@ -0,0 +1,84 @@
+"""
+Metadata filters and partitions against a brute-force scan
+Run from project root: python3 -m pytest tests
+"""
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.filters import MetadataIndex, matches
+from vectorstore.simple_store import SimpleVectorStore, _partitioned_only
+
+TYPES = ["schedule", "speakers", "event_info", "profile"]
+SOURCES = ["agenda.json", "speakers.json", "profile.json"]
+
+WHERE = [
+    {"type": "schedule"},
+    {"type": {"$eq": "speakers"}},
+    {"type": {"$in": ["schedule", "profile"]}},
+    {"type": {"$ne": "schedule"}},
+    {"type": {"$nin": ["schedule", "speakers"]}},
+    {"type": {"$eq": "schedule", "$in": ["speakers"]}},
+    {"type": {"$eq": "schedule", "$in": ["schedule", "speakers"]}},
+    {"type": "schedule", "source": "agenda.json"},
+    {"$or": [{"type": "profile"}, {"source": "agenda.json"}]},
+    {"$and": [{"type": {"$in": TYPES[:2]}}, {"source": {"$ne": "agenda.json"}}]},
+    {"$or": [{"type": "schedule"}, {"level": 2}]},
+    {"level": {"$in": [1, 3]}},
+    {"type": "unknown"},
+]
+
+
+@pytest.fixture(scope="module")
+def metadatas():
+    rng = random.Random(7)
+    return [
+        {"type": rng.choice(TYPES), "source": rng.choice(SOURCES), "level": rng.randint(0, 3)}
+        for _ in range(300)
+    ]
+
+
+def brute_force(metadatas, where):
+    return {i for i, metadata in enumerate(metadatas) if matches(metadata, where)}
+
+
+@pytest.mark.parametrize("where", WHERE, ids=str)
+def test_partitions_are_a_superset_and_exact_when_claimed(metadatas, where):
+    index = MetadataIndex()
+    for row, metadata in enumerate(metadatas):
+        index.add(row, metadata)
+    expected = brute_force(metadatas, where)
+    candidates = index.candidates(where)
+    if candidates is None:
+        candidates = set(range(len(metadatas)))
+    assert expected <= candidates
+    if _partitioned_only(where):
+        assert candidates == expected
+
+
+@pytest.mark.parametrize("where", WHERE, ids=str)
+def test_filtered_search_returns_exactly_the_matching_rows(metadatas, where):
+    store = SimpleVectorStore()
+    store.add_documents(
+        "docs",
+        [f"chunk{i} common" for i in range(len(metadatas))],
+        metadatas,
+        [f"docs_{i}" for i in range(len(metadatas))]
+    )
+    results = store.search("docs", "common", n_results=len(metadatas), where=where)
+    assert {int(r["document"].split()[0][5:]) for r in results} == brute_force(metadatas, where)
+
+
+def test_matches_operators():
+    metadata = {"type": "schedule", "level": 2}
+    assert matches(metadata, None)
+    assert matches(metadata, {"level": {"$in": [1, 2]}, "type": {"$ne": "profile"}})
+    assert not matches(metadata, {"type": {"$nin": ["schedule"]}})
+    assert not matches(metadata, {"missing": "x"})
+    assert matches(metadata, {"missing": {"$ne": "x"}})
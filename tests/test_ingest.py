@@ -0,0 +1,115 @@
+"""
+Bulk ingestion re-runs: checkpoints, upserts and chunks of shrunk files
+Run from project root: python3 -m pytest tests
+"""
+import hashlib
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from vectorstore.dense_store import DenseVectorStore
+from vectorstore.ingest import BulkIngestor
+from vectorstore.simple_store import SimpleVectorStore
+
+DIM = 16
+
+
+class HashModel:
+    """Deterministic SentenceTransformer stand-in"""
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return DIM
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        single = isinstance(texts, str)
+        vectors = np.array([vector(t) for t in ([texts] if single else texts)], dtype=np.float32)
+        return vectors[0] if single else vectors
+
+
+def vector(text: str) -> np.ndarray:
+    digest = hashlib.sha256(text.encode("utf-8")).digest() * 2
+    return np.frombuffer(digest[:DIM * 4], dtype=np.uint32).astype(np.float32) / 2 ** 32 - 0.5
+
+
+def write_sessions(path: Path, count: int, label: str) -> None:
+    path.write_text(
+        "\n".join(json.dumps({"title": f"{label} session {i}", "room": f"R{i}"}) for i in range(count)) + "\n",
+        encoding="utf-8"
+    )
+
+
+def ingest(store, data_dir: Path, checkpoint_dir: Path):
+    ingestor = BulkIngestor(store, batch_size=4, workers=1, checkpoint_dir=str(checkpoint_dir))
+    return ingestor.ingest("docs", str(data_dir))
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    data = tmp_path / "data"
+    data.mkdir()
+    write_sessions(data / "agenda.jsonl", 6, "old")
+    write_sessions(data / "other.jsonl", 3, "other")
+    return data
+
+
+@pytest.mark.parametrize("rescore", [False, True], ids=["plain", "rescore"])
+def test_shrunk_file_leaves_no_stale_chunks(data_dir, tmp_path, rescore):
+    persist_dir = tmp_path / "dense"
+    store = DenseVectorStore(persist_dir=str(persist_dir), embedder=HashModel(), storage="int8", rescore=rescore)
+    ingest(store, data_dir, tmp_path / "checkpoints")
+    assert store.get_stats("docs")["count"] == 9
+
+    write_sessions(data_dir / "agenda.jsonl", 2, "new")
+    stats = ingest(store, data_dir, tmp_path / "checkpoints")
+    assert (stats["files"], stats["files_skipped"]) == (1, 1)
+    assert store.get_stats("docs")["count"] == 5
+    texts = [r["document"] for r in store.search("docs", "session", n_results=10)]
+    assert not any("old" in text for text in texts)
+    assert sum("new" in text for text in texts) == 2
+
+    # The compacted collection is what gets persisted
+    reopened = DenseVectorStore(persist_dir=str(persist_dir), embedder=HashModel(), storage="int8", rescore=rescore)
+    assert reopened.get_stats("docs")["count"] == 5
+    hit = reopened.search("docs", '"title": "new session 1"', n_results=1)
+    assert hit and hit[0]["document"] == store.search("docs", '"title": "new session 1"', n_results=1)[0]["document"]
+
+
+def test_grown_file_is_upserted(data_dir, tmp_path):
+    store = DenseVectorStore(persist_dir=str(tmp_path / "dense"), embedder=HashModel())
+    ingest(store, data_dir, tmp_path / "checkpoints")
+    write_sessions(data_dir / "agenda.jsonl", 8, "new")
+    ingest(store, data_dir, tmp_path / "checkpoints")
+    assert store.get_stats("docs")["count"] == 11
+
+
+def test_dense_delete_keeps_the_other_rows_searchable(tmp_path):
+    store = DenseVectorStore(persist_dir=str(tmp_path / "dense"), embedder=HashModel())
+    texts = [f"chunk {i}" for i in range(20)]
+    store.add_documents("docs", texts, [{"source": "a.json", "type": "x"}] * 20, [f"id_{i}" for i in range(20)])
+    assert store.delete_documents("docs", ["id_3", "id_7", "missing"]) == 2
+    assert store.delete_documents("docs", ["id_3"]) == 0
+    assert store.get_stats("docs")["count"] == 18
+    for i in (0, 8, 19):
+        assert store.search_vector("docs", vector(f"chunk {i}"), 1)[0]["document"] == f"chunk {i}"
+    # Ids map to their renumbered rows, so upserts still replace in place
+    store.add_documents("docs", ["chunk 8 bis"], [{"source": "a.json", "type": "x"}], ["id_8"])
+    assert store.get_stats("docs")["count"] == 18
+    assert store.search_vector("docs", vector("chunk 8 bis"), 1)[0]["document"] == "chunk 8 bis"
+
+
+def test_simple_delete_rebuilds_partitions():
+    store = SimpleVectorStore()
+    metadatas = [{"source": "a.json", "type": t} for t in ["schedule", "profile", "schedule", "profile"]]
+    store.add_documents("docs", [f"chunk {i} common" for i in range(4)], metadatas, [f"id_{i}" for i in range(4)])
+    assert store.delete_documents("docs", ["id_0", "id_3"]) == 2
+    assert store.get_stats("docs")["count"] == 2
+    results = store.search("docs", "common", n_results=10, where={"type": "schedule"})
+    assert [r["document"] for r in results] == ["chunk 2 common"]
+    assert store.delete_documents("unknown", ["id_1"]) == 0
@@ -0,0 +1,61 @@
+"""
+Follow-up rewriting of ConversationMemory
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from coordinator.memory import ConversationMemory, _compactor
+from coordinator.router import Router
+
+
+@pytest.fixture
+def memory():
+    memory = ConversationMemory(router=Router())
+    memory.add_turn("Quelles sont les compétences de Kimana Misago ?", "…")
+    return memory
+
+
+def test_inverted_il_is_not_a_follow_up(memory):
+    question = "Y a-t-il des ateliers au DevFest ?"
+    assert memory.rewrite(question) == question
+
+
+def test_question_with_router_keyword_keeps_its_subject(memory):
+    question = "Où se trouve le DevFest ?"
+    assert memory.rewrite(question) == question
+
+
+def test_connector_carries_the_subject(memory):
+    assert "Kimana" in memory.rewrite("Et à quelle heure parle-t-il ?")
+
+
+def test_pronoun_carries_the_subject(memory):
+    assert "Kimana" in memory.rewrite("Quels sont ses projets ?")
+
+
+def test_failed_compaction_does_not_block_the_next_one(monkeypatch):
+    memory = ConversationMemory(window_tokens=40, summary_tokens=50)
+    summarize = memory._summarize
+    calls = []
+
+    def flaky(summary, turns):
+        calls.append(len(turns))
+        if len(calls) == 1:
+            raise RuntimeError("summary crashed")
+        return summarize(summary, turns)
+
+    monkeypatch.setattr(memory, "_summarize", flaky)
+    for i in range(3):
+        memory.add_turn(f"Question numéro {i} sur le DevFest ?", "Réponse " * 10)
+        # Wait for the background compaction
+        _compactor.submit(lambda: None).result()
+    assert len(calls) >= 2
+    assert not memory._compacting
+    assert "Question numéro 1" in memory.summary
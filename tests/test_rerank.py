@@ -0,0 +1,121 @@
+"""
+Second-stage reranking: lexical scores, time budget and fallbacks
+Run from project root: python3 -m pytest tests
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from agents.rerank import LexicalScorer, Reranker, _terms
+from utils.deadline import Deadline
+
+QUESTION = "Quel est le talk de Kimana sur Kubernetes ?"
+
+
+def result(document: str, relevance: float):
+    return {"document": document, "distance": 1 - relevance}
+
+
+@pytest.fixture
+def results():
+    # First-stage order favours the generic chunks
+    return [
+        result("agenda: Pause café et networking dans le hall", 0.8),
+        result("speakers: Kimana Misago, ingénieure à Abidjan", 0.75),
+        result("agenda: 14:00 talk de Kimana Misago sur Kubernetes en production", 0.7),
+        result("event_info: DevFest Abidjan, salle principale", 0.65),
+    ]
+
+
+class SlowScorer:
+    """Scorer that outlives any budget"""
+
+    name = "slow"
+    SCORE_GAP = 0.1
+
+    def score(self, query, results, deadline):
+        while not deadline.expired():
+            time.sleep(0.001)
+        return None
+
+
+class FailingScorer:
+    name = "failing"
+    SCORE_GAP = 0.1
+
+    def score(self, query, results, deadline):
+        raise RuntimeError("model crashed")
+
+
+def test_terms_drop_stopwords_accents_and_plurals():
+    assert _terms("Les Présentations de Kimana à l'événement") == ["presentation", "kimana", "evenement"]
+
+
+def test_lexical_scorer_prefers_chunks_matching_the_question(results):
+    scores = LexicalScorer().score(QUESTION, results, Deadline(1))
+    assert len(scores) == len(results)
+    assert all(0 <= s <= 1 for s in scores)
+    assert scores.index(max(scores)) == 2
+    assert scores[1] > scores[0] and scores[1] > scores[3]
+
+
+def test_question_without_terms_keeps_first_stage_relevance(results):
+    scores = LexicalScorer().score("Qui est-ce ?", results, Deadline(1))
+    assert scores == pytest.approx([0.8, 0.75, 0.7, 0.65])
+
+
+def test_rerank_orders_by_score_and_adds_it(results):
+    reranker = Reranker(LexicalScorer(), budget_ms=1000)
+    ranked = reranker.rerank(QUESTION, results)
+    assert ranked[0]["document"] == results[2]["document"]
+    scores = [r["rerank_score"] for r in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert sorted(r["document"] for r in ranked) == sorted(r["document"] for r in results)
+    # Inputs are not modified
+    assert all("rerank_score" not in r for r in results)
+    assert reranker.score_gap == LexicalScorer.SCORE_GAP
+
+
+@pytest.mark.parametrize("scorer", [SlowScorer(), FailingScorer()], ids=["over_budget", "error"])
+def test_fallback_keeps_first_stage_order(results, scorer):
+    reranker = Reranker(scorer, budget_ms=5)
+    assert reranker.rerank(QUESTION, results) == results
+    report = reranker.report()
+    assert (report["reranks"], report["fallbacks"]) == (1, 1)
+
+
+def test_expired_request_deadline_caps_the_budget(results):
+    reranker = Reranker(LexicalScorer(), budget_ms=1000)
+    assert reranker.rerank(QUESTION, results, deadline=Deadline(0)) == results
+    assert reranker.report()["fallbacks"] == 1
+
+
+def test_single_result_is_returned_as_is(results):
+    assert Reranker(SlowScorer()).rerank(QUESTION, results[:1]) == results[:1]
+
+
+def test_chunk_features_are_cached(results):
+    scorer = LexicalScorer(cache_size=3)
+    first = scorer.features(results[0]["document"])
+    assert scorer.features(results[0]["document"]) is first
+    for r in results[1:]:
+        scorer.features(r["document"])
+    # Least recently used chunk evicted past cache_size
+    assert len(scorer._features) == 3
+    assert results[0]["document"] not in scorer._features
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("RERANKER", "off")
+    assert Reranker.from_env() is None
+    monkeypatch.setenv("RERANKER", "auto")
+    monkeypatch.delenv("RERANK_MODEL", raising=False)
+    monkeypatch.setenv("RERANK_SCORE_GAP", "0.3")
+    reranker = Reranker.from_env()
+    assert isinstance(reranker.scorer, LexicalScorer) and reranker.score_gap == 0.3
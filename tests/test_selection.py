@@ -0,0 +1,74 @@
+"""
+Adaptive selection of the retrieved chunks put in a prompt
+Run from project root: python3 -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add src to path
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root / "src"))
+
+from agents.selection import relevance, select_results
+
+# 100 tokens at 4 characters per token
+DOCUMENT = "x" * 400
+
+
+def result(name: str, relevance: float, **extra):
+    return {"document": DOCUMENT, "name": name, "distance": 1 - relevance, **extra}
+
+
+def select(results, max_results=5, min_relevance=0.3, max_gap=0.5, token_budget=1000, **options):
+    selected, reason = select_results(results, max_results, min_relevance, max_gap, token_budget, **options)
+    return [r["name"] for r in selected], reason
+
+
+def test_results_are_ordered_best_first():
+    results = [result("c", 0.5), result("a", 0.9), result("b", 0.7)]
+    assert select(results) == (["a", "b", "c"], "exhausted")
+
+
+def test_relevance_floor():
+    results = [result("a", 0.9), result("b", 0.6), result("c", 0.2)]
+    assert select(results) == (["a", "b"], "threshold")
+    assert select([result("a", 0.1)]) == ([], "threshold")
+
+
+def test_score_gap_ends_the_list():
+    results = [result("a", 0.95), result("b", 0.4), result("c", 0.38)]
+    assert select(results, max_gap=0.3) == (["a"], "gap")
+    assert select(results, max_gap=0.6) == (["a", "b", "c"], "exhausted")
+
+
+def test_token_budget_ends_the_list():
+    results = [result(name, 0.9 - i * 0.01) for i, name in enumerate("abcd")]
+    assert select(results, token_budget=250) == (["a", "b"], "budget")
+    # The best chunk is sent even when it alone exceeds the budget
+    assert select(results, token_budget=10) == (["a"], "budget")
+
+
+def test_max_results():
+    results = [result(name, 0.9 - i * 0.01) for i, name in enumerate("abcd")]
+    assert select(results, max_results=3) == (["a", "b", "c"], "max_results")
+    assert select([], max_results=3) == ([], "exhausted")
+
+
+def test_custom_score_orders_and_cuts_but_floor_uses_relevance():
+    results = [
+        result("a", 0.9, rerank_score=0.2),
+        result("b", 0.5, rerank_score=0.8),
+        result("c", 0.2, rerank_score=0.95),
+        result("d", 0.6, rerank_score=0.75),
+    ]
+    score = lambda r: r["rerank_score"]
+    assert select(results, max_gap=0.3, score=score) == (["b", "d"], "gap")
+    assert select(results, max_gap=1.0, score=score) == (["b", "d", "a"], "threshold")
+
+
+@pytest.mark.parametrize("distance, expected", [(0.0, 1.0), (0.25, 0.75), (1.0, 0.0)])
+def test_relevance_is_one_minus_distance(distance, expected):
+    assert relevance({"distance": distance}) == pytest.approx(expected)
+    assert relevance({}) == 0.0